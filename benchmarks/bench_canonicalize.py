@@ -0,0 +1,95 @@
+"""
+Memory of parsed trees before and after ``canonicalize``, measured with
+tracemalloc (Python 3 only).
+
+Every resource repeats the same query parameters, responses and bodies,
+as specs sharing them by includes or YAML aliases do, and has methods
+with null bodies. Retained size is memory allocated by the tree after
+garbage collection; peak is the highest traced memory, the tree included,
+while parsing or canonicalizing.
+
+    $ python benchmarks/bench_canonicalize.py
+"""
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml import parser  # noqa: E402
+from pyraml.hashing import canonicalize  # noqa: E402
+
+
+SIZES = (100, 1000, 5000)
+
+RESOURCE = """\
+/r{0}:
+  get:
+    queryParameters:
+      page: {{type: integer, minimum: 1, description: Page number}}
+      per_page: {{type: integer, maximum: 100}}
+    responses:
+      200:
+        body:
+          application/json:
+            example: '{{"items": []}}'
+      404:
+        body:
+          application/json:
+            example: '{{"error": "not found"}}'
+  delete:
+    responses:
+      204:
+      404:
+        body:
+          application/json:
+            example: '{{"error": "not found"}}'
+"""
+
+
+def make_spec(size):
+    return ('#%RAML 0.8\n'
+            'title: Canonical\n'
+            'baseUri: http://localhost\n' +
+            ''.join(RESOURCE.format(i) for i in range(size)))
+
+
+def measure(spec):
+    """ Return retained and peak sizes of parse and canonicalize, KiB """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        data = parser.parse(spec, '.')
+        gc.collect()
+        parsed, parse_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        canonicalize(data)
+        gc.collect()
+        canonical, canonicalize_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return [size / 1024.0 for size in
+            (parsed, parse_peak, canonical, canonicalize_peak)]
+
+
+def main():
+    if not hasattr(tracemalloc, 'reset_peak'):
+        sys.exit('Python 3.9+ is required')
+
+    print('{0:>10} {1:>14} {2:>14} {3:>14} {4:>14} {5:>8}'.format(
+        'resources', 'parsed, KiB', 'parse peak', 'canonical, KiB',
+        'canon. peak', 'saved'))
+    for size in SIZES:
+        parsed, parse_peak, canonical, canonicalize_peak = \
+            measure(make_spec(size))
+        print('{0:>10} {1:>14.0f} {2:>14.0f} {3:>14.0f} {4:>14.0f} '
+              '{5:>7.0%}'.format(size, parsed, parse_peak, canonical,
+                                 canonicalize_peak, 1 - canonical / parsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Parse time per resource of specs with deeply nested resources.
+
+Every level is a separate included file, so both the include resolver
+and the resource builder walk chains as long as the spec is deep.
+
+Time per level must stay flat as specs get deeper; the script exits with
+status 1 if it grows more than ``MAX_SLOWDOWN`` times between the
+shallowest and the deepest spec. With ``--baseline`` the same specs are
+parsed by pyraml of a git revision too, e.g. the recursive
+implementation, which fails beyond the recursion limit:
+
+    $ python benchmarks/bench_deep_specs.py
+    $ python benchmarks/bench_deep_specs.py --baseline 294d2f3^
+"""
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEPTHS = (100, 1000, 5000)
+REPEAT = 3
+MAX_SLOWDOWN = 3.0
+
+# Run in a child process, so each implementation is imported alone
+MEASURE = """
+import sys, timeit
+sys.path.insert(0, sys.argv[1])
+from pyraml import parser
+try:
+    print(min(timeit.repeat(lambda: parser.load(sys.argv[2]),
+                            number=1, repeat=int(sys.argv[3]))))
+except RuntimeError:
+    # RecursionError on Python 3
+    print('recursion')
+"""
+
+
+def write_spec(directory, depth):
+    def write(name, content):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+    write('api.raml', '#%RAML 0.8\n'
+                      'title: Deep\n'
+                      'baseUri: http://localhost\n'
+                      '/r0: !include r0.yaml\n')
+    for i in range(depth):
+        write('r{0}.yaml'.format(i),
+              'get: {{description: level {0}}}\n'
+              '/r{1}: !include r{1}.yaml\n'.format(i, i + 1))
+    write('r{0}.yaml'.format(depth), 'displayName: Bottom\n')
+    return os.path.join(directory, 'api.raml')
+
+
+def parse_time(source_dir, path):
+    """ Best parse time of ``path`` by pyraml in ``source_dir``, or None
+    if it exceeds the recursion limit
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', MEASURE, source_dir, path, str(REPEAT)])
+    output = output.decode('utf-8').strip()
+    return None if output == 'recursion' else float(output)
+
+
+def export_revision(revision, directory):
+    """ Extract pyraml package of git ``revision`` into ``directory`` """
+    archive = subprocess.check_output(
+        ['git', 'archive', '--format=tar', revision, 'pyraml'], cwd=ROOT)
+    process = subprocess.Popen(['tar', '-x', '-C', directory],
+                               stdin=subprocess.PIPE)
+    process.communicate(archive)
+
+
+def per_level(elapsed, depth):
+    if elapsed is None:
+        return '{0:>14}'.format('RecursionError')
+    return '{0:>14.1f}'.format(elapsed * 1e6 / (depth + 1))
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arguments.add_argument('--baseline', help='git revision to compare with')
+    options = arguments.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        baseline_dir = None
+        if options.baseline:
+            baseline_dir = os.path.join(tmp_dir, 'baseline')
+            os.mkdir(baseline_dir)
+            export_revision(options.baseline, baseline_dir)
+
+        print('{0:>8} {1:>12} {2:>14}{3}'.format(
+            'depth', 'parse, ms', 'per level, us',
+            ' {0:>14}'.format('baseline, us') if baseline_dir else ''))
+        times = []
+        for depth in DEPTHS:
+            spec_dir = os.path.join(tmp_dir, str(depth))
+            os.mkdir(spec_dir)
+            path = write_spec(spec_dir, depth)
+            elapsed = parse_time(ROOT, path)
+            times.append(elapsed * 1e6 / (depth + 1))
+            baseline = ' ' + per_level(
+                parse_time(baseline_dir, path), depth) if baseline_dir else ''
+            print('{0:>8} {1:>12.1f} {2}{3}'.format(
+                depth, elapsed * 1e3, per_level(elapsed, depth), baseline))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    slowdown = times[-1] / times[0]
+    print('per level slowdown from depth {0} to {1}: {2:.2f}x '
+          '(bound {3:.1f}x)'.format(DEPTHS[0], DEPTHS[-1], slowdown,
+                                    MAX_SLOWDOWN))
+    sys.exit(1 if slowdown > MAX_SLOWDOWN else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Cumulative import times of pyraml modules reported by
+``python -X importtime`` (Python 3.7+), checked against their budgets.
+Modules are imported twice, so bytecode compilation is not measured.
+Exits with status 1 if any budget is exceeded.
+
+    $ python benchmarks/bench_import_time.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+import subprocess
+
+
+# Budgets of cumulative times, in microseconds
+IMPORT_TIME_BUDGETS = {
+    'pyraml.entities': 30000,
+    'pyraml.parser': 150000,
+}
+REPEAT = 5
+
+
+def run_python(code, *options):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    cwd = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    process = subprocess.Popen(
+        [sys.executable] + list(options) + ['-c', code], cwd=cwd, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode('utf-8'))
+    return stderr.decode('utf-8')
+
+
+def cumulative_import_time(module_name):
+    """ Best cumulative import time of ``module_name`` in microseconds """
+    run_python('import ' + module_name)
+    times = []
+    for _ in range(REPEAT):
+        stderr = run_python('import ' + module_name, '-X', 'importtime')
+        # import time: self [us] | cumulative | imported package
+        for line in stderr.splitlines():
+            _, cumulative, name = line.split('|')
+            if name.strip() == module_name:
+                times.append(int(cumulative))
+    if not times:
+        raise RuntimeError(
+            '{0} not found in importtime output'.format(module_name))
+    return min(times)
+
+
+def main():
+    if sys.version_info < (3, 7):
+        sys.exit('-X importtime requires Python 3.7')
+    exceeded = False
+    print('{0:<16} {1:>8} {2:>10}'.format('module', 'us', 'budget, us'))
+    for module_name, budget in sorted(IMPORT_TIME_BUDGETS.items()):
+        elapsed = cumulative_import_time(module_name)
+        exceeded = exceeded or elapsed >= budget
+        print('{0:<16} {1:>8} {2:>10}{3}'.format(
+            module_name, elapsed, budget,
+            '' if elapsed < budget else '  EXCEEDED'))
+    sys.exit(1 if exceeded else 0)
+
+
+if __name__ == '__main__':
+    main()
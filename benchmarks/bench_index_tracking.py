@@ -0,0 +1,81 @@
+"""
+Parse time of a spec with many resources without and with tracking of
+assignments of entity attributes, which invalidate lookup indexes. It's
+turned on when the first ``RamlRoot.indexes`` is built in the process;
+programs which never use indexes parse at the "untracked" speed.
+
+    $ python benchmarks/bench_index_tracking.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml import parser  # noqa: E402
+from pyraml.indexes import IndexedEntity, _track_assignments  # noqa: E402
+from pyraml.instrumentation import _clock  # noqa: E402
+
+
+SIZES = (100, 300, 1000)
+REPEAT = 5
+
+RESOURCE = """/r{0}:
+  displayName: Resource {0}
+  is: [paged]
+  /{{id}}:
+    get:
+      is: [paged]
+      responses:
+        200:
+          body:
+            application/json:
+              example: '{{"id": {0}}}'
+    put:
+      body:
+        application/json:
+          example: '{{"id": {0}}}'
+"""
+
+
+def make_spec(size):
+    return ('#%RAML 0.8\n'
+            'title: Indexed\n'
+            'baseUri: http://localhost\n'
+            'traits:\n'
+            '  - paged:\n'
+            '      queryParameters: {page: {type: integer}}\n' +
+            ''.join(RESOURCE.format(i) for i in range(size)))
+
+
+def parse_time(spec, tracked):
+    """ Best time of parse of ``spec`` with or without tracking of
+    assignments
+    """
+    times = []
+    for _ in range(REPEAT):
+        if tracked:
+            _track_assignments()
+        elif '__setattr__' in vars(IndexedEntity):
+            del IndexedEntity.__setattr__
+        start = _clock()
+        parser.parse(spec, '.')
+        times.append(_clock() - start)
+    return min(times)
+
+
+def main():
+    print('{0:>9} {1:>15} {2:>12} {3:>9}'.format(
+        'resources', 'untracked, ms', 'tracked, ms', 'overhead'))
+    for size in SIZES:
+        spec = make_spec(size)
+        untracked = parse_time(spec, False)
+        tracked = parse_time(spec, True)
+        print('{0:>9} {1:>15.1f} {2:>12.1f} {3:>8.1f}%'.format(
+            size, untracked * 1e3, tracked * 1e3,
+            (tracked / untracked - 1) * 100))
+
+
+if __name__ == '__main__':
+    main()
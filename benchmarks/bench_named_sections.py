@@ -0,0 +1,43 @@
+"""
+Parse time of ``traits`` and ``resourceTypes`` given as sequences of
+single-entry maps, per entry.
+
+    $ python benchmarks/bench_named_sections.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml import parser  # noqa: E402
+
+
+SIZES = (1000, 5000, 10000)
+REPEAT = 3
+
+
+def make_spec(size):
+    entries = ''.join('  - n{0}: {{usage: u{0}}}\n'.format(i)
+                      for i in range(size))
+    return ('#%RAML 0.8\n'
+            'title: Sections\n'
+            'baseUri: http://localhost\n'
+            'traits:\n' + entries +
+            'resourceTypes:\n' + entries)
+
+
+def main():
+    print('{0:>8} {1:>12} {2:>16}'.format('entries', 'parse, ms', 'per entry, us'))
+    for size in SIZES:
+        spec = make_spec(size)
+        elapsed = min(timeit.repeat(
+            lambda: parser.parse(spec, '.'), number=1, repeat=REPEAT))
+        print('{0:>8} {1:>12.1f} {2:>16.1f}'.format(
+            size, elapsed * 1e3, elapsed * 1e6 / (2 * size)))
+
+
+if __name__ == '__main__':
+    main()
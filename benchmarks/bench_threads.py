@@ -0,0 +1,61 @@
+"""
+Throughput of parses of the same spec from 1 to 8 threads. Parses scale
+with threads only on free-threaded (no GIL) CPython builds, e.g.
+``python3.13t``; with the GIL throughput stays about the same.
+
+    $ python benchmarks/bench_threads.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml import parser  # noqa: E402
+from pyraml.instrumentation import _clock  # noqa: E402
+
+
+THREAD_COUNTS = (1, 2, 4, 8)
+PARSES_PER_THREAD = 20
+SPEC = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples',
+                    'full-config.yaml')
+
+
+def gil_enabled():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled() if is_gil_enabled is not None else True
+
+
+def run(thread_count):
+    """ Return parses per second of ``thread_count`` threads """
+    def parse_many():
+        for _ in range(PARSES_PER_THREAD):
+            parser.load(SPEC)
+
+    threads = [threading.Thread(target=parse_many)
+               for _ in range(thread_count)]
+    start = _clock()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return thread_count * PARSES_PER_THREAD / (_clock() - start)
+
+
+def main():
+    print('GIL enabled: {0}'.format(gil_enabled()))
+    # Warm up imports and caches
+    parser.load(SPEC)
+    print('{0:>8} {1:>12} {2:>8}'.format('threads', 'parses/s', 'scaling'))
+    single = None
+    for thread_count in THREAD_COUNTS:
+        throughput = run(thread_count)
+        single = single or throughput
+        print('{0:>8} {1:>12.1f} {2:>8.2f}'.format(
+            thread_count, throughput, throughput / single))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Time of conversion of loaded YAML to models of a spec with many
+resources, validated and trusted. Time spent loading YAML is the same
+for both and left out.
+
+    $ python benchmarks/bench_trusted.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml import parser  # noqa: E402
+from pyraml.instrumentation import ParseStats, observe, _clock  # noqa: E402
+
+
+SIZES = (100, 300, 1000)
+REPEAT = 3
+
+RESOURCE = """/r{0}:
+  description: resource {0}
+  /{{id}}:
+    uriParameters:
+      id: {{type: integer, minimum: 1, required: true}}
+    get:
+      queryParameters:
+        fields: {{type: string, maxLength: 100}}
+        page: [{{type: integer}}, {{type: string, enum: [last]}}]
+      responses:
+        200:
+          body:
+            application/json:
+              example: '{{"id": {0}, "tags": ["a", "b"]}}'
+"""
+
+
+def make_spec(size):
+    return ('#%RAML 0.8\n'
+            'title: Trusted\n'
+            'baseUri: http://localhost\n' +
+            ''.join(RESOURCE.format(i) for i in range(size)))
+
+
+def conversion_time(spec, trusted):
+    """ Best time of parse of ``spec`` minus time of YAML loading """
+    times = []
+    for _ in range(REPEAT):
+        stats = ParseStats()
+        with observe(stats):
+            start = _clock()
+            parser.parse(spec, '.', trusted=trusted)
+            elapsed = _clock() - start
+        times.append(elapsed - stats.phases['yaml_load'][1])
+    return min(times)
+
+
+def main():
+    print('{0:>9} {1:>15} {2:>13} {3:>8}'.format(
+        'resources', 'validated, ms', 'trusted, ms', 'speedup'))
+    for size in SIZES:
+        spec = make_spec(size)
+        validated = conversion_time(spec, False)
+        trusted = conversion_time(spec, True)
+        print('{0:>9} {1:>15.1f} {2:>13.1f} {3:>8.2f}'.format(
+            size, validated * 1e3, trusted * 1e3, validated / trusted))
+
+
+if __name__ == '__main__':
+    main()
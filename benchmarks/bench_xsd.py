@@ -0,0 +1,58 @@
+"""
+Time of validation of XML bodies against an XML schema, compiling the
+schema for every body and with compiled schemas cached. Requires lxml.
+
+    $ python benchmarks/bench_xsd.py
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyraml.fields import parse_xml_string  # noqa: E402
+from pyraml.schemas import XMLSchemaCache, xsd_supported  # noqa: E402
+
+
+NUMBER = 200
+ELEMENTS = 50
+
+XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="users">
+    <xs:complexType>
+      <xs:sequence>
+""" + "".join(
+    '        <xs:element name="e{0}" type="xs:string" minOccurs="0"/>\n'.format(i)
+    for i in range(ELEMENTS)) + """      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>"""
+
+BODY = b'<users><e0>a</e0><e1>b</e1></users>'
+
+
+def main():
+    if not xsd_supported():
+        print('lxml is not installed')
+        return
+    from lxml import etree
+    schema = parse_xml_string(XSD)
+    cache = XMLSchemaCache()
+
+    def compile_every_time():
+        etree.fromstring(BODY, etree.XMLParser(schema=etree.XMLSchema(schema)))
+
+    def cached():
+        cache.validate(schema, BODY)
+
+    print('{0:>20} {1:>14}'.format('', 'per body, us'))
+    for name, func in [('compile every time', compile_every_time),
+                       ('cached', cached)]:
+        elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print('{0:>20} {1:>14.1f}'.format(name, elapsed * 1e6 / NUMBER))
+
+
+if __name__ == '__main__':
+    main()
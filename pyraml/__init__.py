@@ -1,11 +1,5 @@
 __author__ = 'ad'
 
-import mimetypes
-import yaml
-
-
-from .constants import RAML_CONTENT_MIME_TYPES
-
 
 class ValidationError(Exception):
     def __init__(self, validation_errors):
@@ -15,12 +9,13 @@ class ValidationError(Exception):
         return repr(self.errors)
 
 
-# Bootstrapping: making able mimetypes package to recognize RAML and YAML
-# file types
-for mtype in RAML_CONTENT_MIME_TYPES:
-    mimetypes.add_type(mtype, ".raml")
-    mimetypes.add_type(mtype, ".yaml")
+class RamlException(Exception):
+    pass
+
+
+class RamlNotFoundException(RamlException):
+    pass
+
 
-# making able mimetypes package to recognize JSON file type
-mimetypes.add_type("application/json", ".json")
-mimetypes.add_type("application/json", ".schema")
+class RamlParseException(RamlException):
+    pass
@@ -0,0 +1,236 @@
+__author__ = 'ad'
+
+import os.path
+import posixpath
+import threading
+
+import six
+
+from . import RamlException, RamlNotFoundException
+from .provenance import LazyValue, mark_included
+from .resolvers import IncludeResolver, _guess_mime_type, _is_mime_type_raml
+
+
+__all__ = ["RamlArchiveException", "RamlArchive", "LazyArchiveText",
+           "split_archive_uri"]
+
+# Separator of archive path and member name in URIs given to
+# :func:`pyraml.parser.load`, e.g. ``specs-1.2.zip!/api.raml``
+ARCHIVE_SEPARATOR = '!/'
+
+
+class RamlArchiveException(RamlException):
+    pass
+
+
+def split_archive_uri(uri):
+    """
+    Split ``archive.zip!/dir/api.raml`` to path of the archive and name
+    of the member.
+
+    :return: 2 elements tuple: archive path and member name, or None if
+        ``uri`` doesn't point into an existing local file
+    """
+    archive_path, separator, member = uri.partition(ARCHIVE_SEPARATOR)
+    if not separator or not os.path.isfile(archive_path):
+        return None
+    return archive_path, member
+
+
+class RamlArchive(IncludeResolver):
+    """ RAML spec packed in a zip or tar archive.
+
+    Members are located with the archive index (central directory of
+    zip, member headers of tar) read once when the archive is opened,
+    and read only when they are included. Decompressed members are
+    cached until the archive is closed, so a member included many times
+    is decompressed once.
+
+    Includes of documents loaded with :meth:`load` are resolved relative
+    to the including member, inside the archive: the archive is an
+    include resolver of locations starting with :attr:`prefix`.
+
+     >>> with RamlArchive('specs-1.2.zip') as archive:
+     ...     root = archive.load('api.raml')
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path of zip or tar (possibly compressed) archive
+        :type path: str
+
+        :raise RamlArchiveException: if file isn't a supported archive
+        """
+        # Archive modules are imported only when archives are used
+        import tarfile
+        import zipfile
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache = {}
+        # member name -> (info, size)
+        if zipfile.is_zipfile(path):
+            self._open = zipfile.ZipFile
+            self._handle = zipfile.ZipFile(path)
+            self._members = dict(
+                (_normalize(info.filename), (info, info.file_size))
+                for info in self._handle.infolist()
+                if not info.filename.endswith('/'))
+        elif tarfile.is_tarfile(path):
+            self._open = tarfile.open
+            self._handle = tarfile.open(path)
+            self._members = dict(
+                (_normalize(info.name), (info, info.size))
+                for info in self._handle.getmembers() if info.isfile())
+        else:
+            raise RamlArchiveException(
+                "{0} is not a zip or tar archive".format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """ Close the archive and drop decompressed members. Members can
+        still be read, e.g. by lazy values of loaded trees, the archive
+        is reopened for every such read.
+        """
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            self._cache.clear()
+
+    def names(self):
+        """ Return names of all files in the archive """
+        return sorted(self._members)
+
+    @property
+    def prefix(self):
+        """ Prefix of locations of members """
+        return self.path + ARCHIVE_SEPARATOR
+
+    def location(self, name):
+        """ Location of member ``name`` reported in include sources """
+        return self.prefix + name
+
+    def join(self, base, file_name):
+        return self.location(_normalize(posixpath.join(
+            self._member(base), file_name)))
+
+    def dirname(self, location):
+        return self.location(posixpath.dirname(self._member(location)))
+
+    def fetch(self, location):
+        """ Load member at ``location``, non-RAML members are returned as
+        :class:`LazyArchiveText` decompressed on first use
+        """
+        name = self._member(location)
+        mime_type = _guess_mime_type(name)
+        if not _is_mime_type_raml(mime_type):
+            # Fail early on missing members, like for local files
+            self.size(name)
+            return LazyArchiveText(self, name), mime_type
+        return self.read(name), mime_type
+
+    def size(self, name):
+        """ Size of decompressed member ``name`` in bytes """
+        return self._info(name)[1]
+
+    def read(self, name):
+        """
+        Read and decompress member ``name``
+
+        :rtype: bytes
+
+        :raise pyraml.RamlNotFoundException: if there is no such member
+        """
+        info = self._info(name)[0]
+        with self._lock:
+            content = self._cache.get(name)
+            if content is not None:
+                return content
+            if self._handle is None:
+                with self._open(self.path) as handle:
+                    return _read_member(handle, info)
+            content = self._cache[name] = _read_member(self._handle, info)
+            return content
+
+    def load(self, name, **kwargs):
+        """
+        Load and parse RAML member ``name``, see
+        :func:`pyraml.parser.load` for other parameters
+
+        :rtype: pyraml.entities.RamlRoot
+        """
+        from .parser import parse_archive_member
+        return parse_archive_member(self, name, **kwargs)
+
+    def _member(self, location):
+        return location[len(self.prefix):]
+
+    def _info(self, name):
+        try:
+            return self._members[name]
+        except KeyError:
+            raise RamlNotFoundException(
+                "No such file {0} found".format(self.location(name)))
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.path)
+
+
+def _read_member(handle, info):
+    if not hasattr(handle, 'extractfile'):
+        # zip
+        return handle.read(info)
+    f = handle.extractfile(info)
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def _normalize(name):
+    name = posixpath.normpath(name.replace('\\', '/'))
+    return name.lstrip('/') if name != '.' else ''
+
+
+@six.python_2_unicode_compatible
+class LazyArchiveText(LazyValue):
+    """ Handle of an included non-RAML archive member, decompressed only
+    when a field consumes the value (see
+    :class:`pyraml.provenance.LazyIncludedText`).
+    """
+    __slots__ = ('archive', 'name', '_text')
+
+    def __init__(self, archive, name):
+        """
+        :type archive: RamlArchive
+
+        :param name: member name
+        :type name: str
+        """
+        self.archive = archive
+        self.name = name
+        self._text = None
+
+    def read(self):
+        """ Read and return content of the member as
+        :class:`pyraml.provenance.IncludedText`
+        """
+        if self._text is None:
+            self._text = mark_included(
+                self.archive.read(self.name), self.archive.location(self.name))
+        return self._text
+
+    def __len__(self):
+        return self.archive.size(self.name)
+
+    def __str__(self):
+        return self.read()
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.name)
@@ -0,0 +1,224 @@
+__author__ = 'ad'
+
+# ASGI applications built on parsed RAML trees, requires Python 3.5+
+
+import json
+import random
+from urllib.parse import quote
+
+from .instrumentation import _clock
+from .validation import ValidationPlans, LatencyCounter
+
+
+__all__ = ["MockASGIApp", "ValidationMiddleware"]
+
+
+class MockASGIApp(object):
+    """ ASGI adapter of :class:`pyraml.mockserver.MockServer`.
+
+    Response messages are rendered by the mock up front and sent as is.
+    """
+
+    def __init__(self, mock):
+        """
+        :type mock: pyraml.mockserver.MockServer
+        """
+        self.mock = mock
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await _serve_lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(
+                "Unsupported ASGI scope type {0!r}".format(scope['type']))
+
+        response = self.mock.respond(
+            scope['method'], _request_path(scope), raw=True)
+        await send(response.asgi_start)
+        await send(response.asgi_body)
+
+
+def _request_path(scope):
+    """ Return percent-encoded path of request ``scope``, as routes are
+    matched. ``path`` of ASGI scopes is decoded already, so the raw path
+    is used if the server provides it: ``%2F`` within a segment isn't a
+    separator and values are decoded only once.
+    """
+    raw_path = scope.get('raw_path')
+    if raw_path:
+        return raw_path.split(b'?', 1)[0].decode('latin-1')
+    return quote(scope['path'], safe="/!$&'()*+,;=:@~")
+
+
+async def _serve_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+class ValidationMiddleware(object):
+    """ ASGI middleware validating traffic against a RAML tree.
+
+    Validation plans of all methods are compiled when the middleware is
+    created (see :class:`pyraml.validation.ValidationPlans`). Requests of
+    described methods are checked before they reach the application:
+    URI, query and header parameters, media type of the body and, when
+    its media type has a schema or is JSON/XML, the body itself. Invalid
+    requests are answered with ``400`` and a JSON list of errors unless
+    ``reject`` is False. Requests which aren't described pass through.
+
+    Status codes of responses are checked against declared responses for
+    a ``response_sample_rate`` share of requests. Undeclared responses
+    are reported to ``on_response_error`` and sent unchanged.
+
+    Time spent validating is counted per route in :attr:`request_latency`
+    and :attr:`response_latency`, keyed by plan name like
+    ``"GET /users/{userId}"``.
+    """
+
+    def __init__(self, app, root, prefix=None, reject=True,
+                 response_sample_rate=0.0, on_request_error=None,
+                 on_response_error=None):
+        """
+        :param app: ASGI application
+        :param root: parsed RAML tree
+        :type root: pyraml.entities.RamlRoot
+
+        :param prefix: path prefix of requests, see
+            :class:`pyraml.routing.RouteTable`
+
+        :param reject: answer invalid requests with 400
+        :type reject: bool
+
+        :param response_sample_rate: share of responses to validate,
+            from 0 to 1
+        :type response_sample_rate: float
+
+        :param on_request_error: callable receiving scope and list of
+            errors of invalid requests
+        :param on_response_error: callable receiving scope and error of
+            invalid responses
+        """
+        self.app = app
+        self.plans = ValidationPlans(root, prefix)
+        self.reject = reject
+        self.response_sample_rate = response_sample_rate
+        self.on_request_error = on_request_error
+        self.on_response_error = on_response_error
+        self.request_latency = {}
+        self.response_latency = {}
+        self._random = random.random
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        plan, uri_values = self.plans.match(
+            scope['method'], _request_path(scope), raw=True)
+        if plan is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = _clock()
+        headers = _HeaderLookup(scope['headers'])
+        body = None
+        if plan.needs_body:
+            body, receive = await _buffer_body(receive)
+        content_type = None
+        if plan.bodies is not None:
+            values = headers('content-type')
+            if values:
+                content_type = values[0].split(';', 1)[0].strip()
+        errors = plan.validate_request(
+            uri_values, scope.get('query_string', b'').decode('latin-1'),
+            headers, body, content_type)
+        self._count(self.request_latency, plan.name, _clock() - start)
+
+        if errors:
+            if self.on_request_error is not None:
+                self.on_request_error(scope, errors)
+            if self.reject:
+                await _send_errors(send, errors)
+                return
+
+        if self.response_sample_rate and \
+                self._random() < self.response_sample_rate:
+            send = self._validating_send(scope, plan, send)
+        await self.app(scope, receive, send)
+
+    def _validating_send(self, scope, plan, send):
+        async def validating_send(message):
+            if message['type'] == 'http.response.start':
+                start = _clock()
+                error = plan.validate_status(message['status'])
+                self._count(self.response_latency, plan.name,
+                            _clock() - start)
+                if error is not None and self.on_response_error is not None:
+                    self.on_response_error(scope, error)
+            await send(message)
+        return validating_send
+
+    @staticmethod
+    def _count(counters, name, elapsed):
+        counter = counters.get(name)
+        if counter is None:
+            counter = counters.setdefault(name, LatencyCounter())
+        counter.add(elapsed)
+
+
+class _HeaderLookup(object):
+    """ Values of request headers by lower case name, decoded on first
+    lookup
+    """
+    __slots__ = ('raw', 'decoded')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.decoded = None
+
+    def __call__(self, name):
+        if self.decoded is None:
+            self.decoded = {}
+            for key, value in self.raw:
+                self.decoded.setdefault(
+                    key.decode('latin-1').lower(), []).append(
+                    value.decode('latin-1'))
+        return self.decoded.get(name)
+
+
+async def _buffer_body(receive):
+    """ Read whole request body, return it and ``receive`` replaying it """
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            # Client disconnected, let the application see it
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    body = b''.join(chunks)
+    replayed = [False]
+
+    async def replay():
+        if not replayed[0]:
+            replayed[0] = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return await receive()
+    return body, replay
+
+
+async def _send_errors(send, errors):
+    body = json.dumps({'errors': errors}).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': 400,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode('latin-1'))],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,99 @@
+__author__ = 'ad'
+
+import json
+import hashlib
+try:
+    from collections import OrderedDict
+except ImportError:
+    # For python 2.6 additional package ordereddict should be installed
+    from ordereddict import OrderedDict
+
+from . import RamlException
+from .serialization import to_data, from_data
+
+
+__all__ = ["RamlBundleException", "bundle", "write_bundle", "load_bundle"]
+
+BUNDLE_FORMAT = b'PYRAML-BUNDLE'
+BUNDLE_FORMAT_VERSION = b'1'
+
+
+class RamlBundleException(RamlException):
+    pass
+
+
+def bundle(uri, output_path):
+    """
+    Load RAML file with all its includes and write it as a single
+    self-contained bundle.
+
+    :param uri: URL or local path of the RAML file
+    :type uri: str
+
+    :param output_path: path of the bundle file to write
+    :type output_path: str
+
+    :return: SHA-256 hex digest of the bundle payload
+    :rtype: str
+    """
+    from .parser import load
+    return write_bundle(load(uri), output_path)
+
+
+def write_bundle(root, output_path):
+    """
+    Write already parsed RAML tree as a bundle.
+
+    Bundle file consists of a header line ``PYRAML-BUNDLE <version>
+    <sha256 of payload>`` followed by JSON payload encoded with
+    :func:`pyraml.serialization.to_data`.
+
+    :param root: parsed RAML
+    :type root: pyraml.entities.RamlRoot
+
+    :param output_path: path of the bundle file to write
+    :type output_path: str
+
+    :return: SHA-256 hex digest of the bundle payload
+    :rtype: str
+    """
+    payload = json.dumps(to_data(root), separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(payload).hexdigest()
+    header = b' '.join(
+        [BUNDLE_FORMAT, BUNDLE_FORMAT_VERSION, digest.encode('ascii')])
+    with open(output_path, 'wb') as f:
+        f.write(header + b'\n' + payload)
+    return digest
+
+
+def load_bundle(path):
+    """
+    Load RAML tree from a bundle written by :func:`bundle`.
+
+    The bundle is read at once, no includes are resolved and no field
+    validation is done.
+
+    :param path: path of the bundle file
+    :type path: str
+
+    :return: RamlRoot object
+    :rtype: pyraml.entities.RamlRoot
+
+    :raise RamlBundleException: if the file is not a bundle or its
+        payload doesn't match the recorded hash
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    header, _, payload = content.partition(b'\n')
+    header_tuple = header.split()
+    if len(header_tuple) != 3 or header_tuple[0] != BUNDLE_FORMAT:
+        raise RamlBundleException("Invalid bundle header", path)
+    if header_tuple[1] != BUNDLE_FORMAT_VERSION:
+        raise RamlBundleException(
+            "Unsupported bundle format version", header_tuple[1])
+    if hashlib.sha256(payload).hexdigest().encode('ascii') != header_tuple[2]:
+        raise RamlBundleException("Bundle integrity check failed", path)
+
+    return from_data(json.loads(payload.decode('utf-8'),
+                                object_pairs_hook=OrderedDict))
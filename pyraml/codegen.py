@@ -0,0 +1,175 @@
+__author__ = 'ad'
+
+import os
+import pprint
+import hashlib
+import py_compile
+
+import six
+
+from .parser import (
+    load, _is_network_resource, _fetch_document, _resolver_registry)
+from .archive import RamlArchive, split_archive_uri, ARCHIVE_SEPARATOR
+from .serialization import to_data
+from .instrumentation import IncludesCollector, observe, current_observer
+from . import RamlNotFoundException
+
+
+__all__ = ["generate_module_source", "compile_spec", "sources_hash",
+           "is_stale"]
+
+
+MODULE_TEMPLATE = '''\
+# -*- coding: utf-8 -*-
+# Generated by pyraml.codegen from {source!r}, do not edit.
+from pyraml.serialization import from_data
+
+SOURCE = {source!r}
+SOURCE_HASH = {source_hash!r}
+SOURCES = {sources!r}
+
+root = from_data(
+{data})
+'''
+
+
+def generate_module_source(uri, resolvers=None):
+    """
+    Generate source of a Python module which builds the RAML tree of
+    ``uri`` from literal data when imported.
+
+    The module defines:
+
+        * ``root``: the RamlRoot object
+        * ``SOURCES``: RAML file and all included resources
+        * ``SOURCE_HASH``: hash of ``SOURCES`` content, see :func:`is_stale`
+
+    :param uri: URL, local path of the RAML file or its location in an
+        archive or served by ``resolvers``, see :func:`pyraml.parser.load`
+    :type uri: str
+
+    :param resolvers: resolvers of the RAML file and included resources,
+        see :func:`pyraml.parser.load`
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+
+    :return: module source code
+    :rtype: str
+    """
+    resolvers = _resolver_registry(resolvers)
+    uri = _absolute_uri(uri, resolvers)
+
+    collector = IncludesCollector(current_observer())
+    with observe(collector):
+        root = load(uri, resolvers=resolvers)
+
+    sources = [uri] + collector.paths
+    return MODULE_TEMPLATE.format(
+        source=uri,
+        source_hash=sources_hash(sources, resolvers),
+        sources=sources,
+        data=pprint.pformat(to_data(root)))
+
+
+def compile_spec(uri, output_path, resolvers=None):
+    """
+    Generate a module for RAML file ``uri`` (see
+    :func:`generate_module_source`), write it to ``output_path`` and
+    byte-compile it.
+
+    :param uri: URL or local path of the RAML file
+    :type uri: str
+
+    :param output_path: path of the ``.py`` file to write
+    :type output_path: str
+
+    :param resolvers: resolvers of the RAML file and included resources
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+    """
+    source = generate_module_source(uri, resolvers)
+    with open(output_path, 'wb') as f:
+        f.write(source.encode('utf-8'))
+    py_compile.compile(output_path, doraise=True)
+
+
+def sources_hash(sources, resolvers=None):
+    """
+    Compute SHA-256 hash of content of RAML sources.
+
+    Sources are read like by :func:`pyraml.parser.load`: from archives,
+    by ``resolvers``, from network or from local file system.
+
+    :param sources: local paths, URLs or locations in archives or served
+        by ``resolvers``
+    :type sources: list of str
+
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+
+    :return: hex digest
+    :rtype: str
+    """
+    resolvers = _resolver_registry(resolvers)
+    digest = hashlib.sha256()
+    # archive path -> RamlArchive, each archive is opened once
+    archives = {}
+    try:
+        for source in sources:
+            digest.update(source.encode('utf-8') + b'\0')
+            digest.update(_read_source(source, resolvers, archives))
+    finally:
+        for archive in archives.values():
+            archive.close()
+    return digest.hexdigest()
+
+
+def is_stale(module, resolvers=None):
+    """
+    Check whether a generated module is out of date, i.e. any of its
+    sources has changed or disappeared since it was generated.
+
+    :param module: imported generated module
+    :type module: module
+
+    :param resolvers: resolvers the module was generated with
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+
+    :rtype: bool
+    """
+    try:
+        return sources_hash(module.SOURCES, resolvers) != module.SOURCE_HASH
+    except (IOError, OSError, RamlNotFoundException):
+        return True
+
+
+def _absolute_uri(uri, resolvers):
+    """ Make local path of ``uri``, or of the archive it points into,
+    absolute
+    """
+    if _is_network_resource(uri):
+        return uri
+    archive_uri = split_archive_uri(uri)
+    if archive_uri is not None:
+        archive_path, member = archive_uri
+        return os.path.abspath(archive_path) + ARCHIVE_SEPARATOR + member
+    if resolvers is not None and resolvers.find(uri) is not None:
+        return uri
+    return os.path.abspath(uri)
+
+
+def _read_source(source, resolvers, archives):
+    """ Read ``source`` as bytes, see :func:`sources_hash` """
+    archive_uri = None if _is_network_resource(source) else \
+        split_archive_uri(source)
+    if archive_uri is not None:
+        archive_path, member = archive_uri
+        archive = archives.get(archive_path)
+        if archive is None:
+            archive = archives[archive_path] = RamlArchive(archive_path)
+        return archive.read(member)
+
+    content, _ = _fetch_document(source, resolvers)
+    if isinstance(content, six.text_type):
+        return content.encode('utf-8')
+    if not isinstance(content, six.binary_type):
+        # Already loaded data, dicts are sorted
+        return pprint.pformat(content).encode('utf-8')
+    return content
@@ -9,6 +9,15 @@ RAML_CONTENT_MIME_TYPES = [
     'application/yaml',
     'application/x-yaml',
 ]
+# File types recognized by extension before falling back to ``mimetypes``
+FILE_EXTENSION_MIME_TYPES = {
+    '.raml': 'application/raml+yaml',
+    '.yaml': 'application/raml+yaml',
+    '.json': 'application/json',
+    '.schema': 'application/json',
+}
+# Local files of at least this size are memory-mapped instead of read
+MMAP_THRESHOLD = 1024 * 1024
 HTTP_METHODS = set([
     'connect', 'options', 'patch', 'trace',
     'get', 'post', 'put', 'delete', 'head',
@@ -1,10 +1,14 @@
 __author__ = 'ad'
 
+import six
+
 from .model import Model
+from .options import current_options
 from .fields import (
     String, Reference, Map, List, Bool, Int, Float, Or, Null,
-    Choice, RamlNamedParametersMap, JSONData, XMLData)
+    Choice, RamlNamedParametersMap, JSONData, SchemaData)
 from .constants import NAMED_PARAMETER_TYPES, RAML_VALID_PROTOCOLS
+from .indexes import IndexedEntity, RamlIndexes
 
 
 class SecuredEntity(object):
@@ -36,6 +40,14 @@ class ResourceTypedEntity(object):
                    Map(String(), Or(String(), Int()))),
                field_name='type')
 
+    @property
+    def type(self):
+        return self.type_
+
+    @type.setter
+    def type(self, value):
+        self.type_ = value
+
 
 class RamlDocumentation(Model):
     """ The documentation property MUST be an array of documents.
@@ -75,17 +87,29 @@ class RamlHeader(RamlNamedParameters):
     pass
 
 
-class RamlBody(Model):
+class RamlBody(IndexedEntity, Model):
     """ A method's body is defined in the body property as a hashmap,
     in which the key MUST be a valid media type.
     """
-    schema = Or(JSONData(), XMLData(), String())
+    schema = SchemaData()
     example = Or(JSONData(), String())
     notNull = Bool()
     formParameters = RamlNamedParametersMap()
 
+    @classmethod
+    def from_json(cls, json_object, trusted=False):
+        rv = super(RamlBody, cls).from_json(json_object, trusted)
+        # Decoded schema is shared by all bodies with the same schema,
+        # remember name of the declared schema this body references
+        name = json_object.get('schema')
+        options = current_options()
+        if isinstance(name, six.string_types) and options is not None and \
+                options.schemas is not None and name in options.schemas.named:
+            rv._schema_reference = (name, rv.schema)
+        return rv
 
-class RamlResponse(Model):
+
+class RamlResponse(IndexedEntity, Model):
     """ Responses MUST be a map of one or more HTTP status codes,
     where each status code itself is a map that describes that status
     code.
@@ -109,7 +133,7 @@ class RamlTrait(Model):
     responses = Map(Or(String(),Int()), Reference(RamlResponse))
 
 
-class RamlMethod(TraitedEntity, SecuredEntity, Model):
+class RamlMethod(IndexedEntity, TraitedEntity, SecuredEntity, Model):
     """ http://raml.org/spec.html#methods """
     notNull = Bool()
     description = String()
@@ -124,7 +148,8 @@ class RamlMethod(TraitedEntity, SecuredEntity, Model):
     isOptional = Bool()
 
 
-class RamlResource(ResourceTypedEntity, TraitedEntity, SecuredEntity, Model):
+class RamlResource(IndexedEntity, ResourceTypedEntity, TraitedEntity,
+                   SecuredEntity, Model):
     """ http://raml.org/spec.html#resources-and-nested-resources """
     displayName = String()
     description = String()
@@ -177,7 +202,7 @@ class RamlSecurityScheme(Model):
                       List(String())))
 
 
-class RamlRoot(SecuredEntity, Model):
+class RamlRoot(IndexedEntity, SecuredEntity, Model):
     """ http://raml.org/spec.html#root-section """
     raml_version = String(required=True)
     title = String(required=True)
@@ -191,6 +216,26 @@ class RamlRoot(SecuredEntity, Model):
     traits = Map(String(), Reference(RamlTrait))
     resources = Map(String(), Reference(RamlResource))
     resourceTypes = Map(String(), Reference(RamlResourceType))
-    schemas = Map(String(), Or(JSONData(), XMLData(), String()))
+    schemas = Map(String(), SchemaData())
     baseUriParameters = RamlNamedParametersMap()
     securitySchemes = Map(String(), Reference(RamlSecurityScheme))
+
+    @property
+    def indexes(self):
+        """ Lookup indexes over resources of this RAML.
+
+        Indexes are built on first access and rebuilt after the tree is
+        changed, see :class:`pyraml.indexes.RamlIndexes`.
+
+        :rtype: pyraml.indexes.RamlIndexes
+        """
+        indexes = self.__dict__.get('_indexes')
+        if indexes is None or not indexes.valid:
+            indexes = self._indexes = RamlIndexes(self)
+        return indexes
+
+    def invalidate_indexes(self):
+        """ Drop lookup indexes, e.g. after in-place changes of
+        ``resources`` or ``methods`` mappings.
+        """
+        self._indexes = None
@@ -1,20 +1,78 @@
 __author__ = 'ad'
 
+import sys
 import six
-import json
 from abc import ABCMeta
+from .provenance import copy_include_source, LazyValue
+from .options import current_options
 try:
     from collections import OrderedDict
 except ImportError:
     # For python 2.6 additional package ordereddict should be installed
     from ordereddict import OrderedDict
 
-try:
-    from lxml.etree import fromstring as parse_xml_string
-    from lxml.etree import _Element as XMLElement
-except ImportError:
-    from xml.etree.ElementTree import fromstring as parse_xml_string
-    from xml.etree.ElementTree import Element as XMLElement
+
+_etree = None
+_xml_element_class = None
+
+
+def xml_etree():
+    """ Return XML library used to decode XML data: ``lxml.etree`` if
+    installed, ``xml.etree.ElementTree`` otherwise.
+
+    The library is imported on first use.
+    """
+    global _etree, _xml_element_class
+    if _etree is None:
+        try:
+            from lxml import etree
+            _xml_element_class = etree._Element
+        except ImportError:
+            from xml.etree import ElementTree as etree
+            _xml_element_class = etree.Element
+        _etree = etree
+    return _etree
+
+
+def xml_element_class():
+    """ Return class of elements produced by :func:`xml_etree` library """
+    xml_etree()
+    return _xml_element_class
+
+
+def parse_xml_string(value, untrusted=False):
+    """
+    Parse XML document
+
+    :param untrusted: document comes from a request: with lxml, entities
+        aren't resolved and nothing is fetched from network
+    :type untrusted: bool
+    """
+    etree = xml_etree()
+    if not hasattr(etree, 'XMLSchema'):
+        return etree.fromstring(value)
+    options = {}
+    if untrusted:
+        options.update(resolve_entities=False, no_network=True)
+    if isinstance(value, six.text_type):
+        # lxml refuses strings with an encoding declaration, e.g. most XML
+        # schemas: parse them encoded, ignoring the declared encoding
+        value = value.encode('utf-8')
+        options['encoding'] = 'utf-8'
+    return etree.fromstring(value, etree.XMLParser(**options))
+
+
+def serialize_xml(element):
+    # Python 2 ElementTree doesn't know encoding='unicode'
+    return xml_etree().tostring(element, encoding='utf-8').decode('utf-8')
+
+
+def is_xml_element(value):
+    """ Check ``value`` is decoded XML data.
+
+    Doesn't import XML library if no XML was decoded so far.
+    """
+    return _etree is not None and isinstance(value, _xml_element_class)
 
 @six.add_metaclass(ABCMeta)
 class BaseField(object):
@@ -24,7 +82,14 @@ class BaseField(object):
         self.field_name = field_name
         self.default = default
 
+    def nested_fields(self):
+        """ Return list of fields this field is composed of """
+        return []
+
     def check_default_value(self, value):
+        if isinstance(value, LazyValue):
+            # Included resource is read only when it's really needed
+            value = value.read()
         if value is None and self.default is not None:
             value = self.default
         return value
@@ -45,6 +110,22 @@ class BaseField(object):
         """
         return value
 
+    def matches(self, value):
+        """
+        Cheap check whether ``value`` is of the type this field converts,
+        used instead of full conversion attempts by :meth:`Or.trusted_to_python`.
+        """
+        return True
+
+    def trusted_to_python(self, value):
+        """
+        Convert trusted JSON representation ``value`` to python
+        representation without validating it.
+
+        Produces the same result as :meth:`to_python` on valid values.
+        """
+        return self.check_default_value(value)
+
     def to_python(self, value):
         """
         Convert JSON representation of an object ``value`` to python
@@ -59,6 +140,9 @@ class BaseField(object):
 class Null(BaseField):
     """ Class represent JSON null """
 
+    def matches(self, value):
+        return value is None
+
     def validate(self, value):
         super(Null, self).validate(value)
         if value is not None:
@@ -75,6 +159,9 @@ class Choice(BaseField):
         super(Choice, self).__init__(**kwargs)
         self._choices = choices or set()
 
+    def matches(self, value):
+        return value in self._choices
+
     def validate(self, value):
         """ Check ``value`` is present in ``self._choices``.
         """
@@ -104,6 +191,9 @@ class String(BaseField):
         super(String, self).__init__(**kwargs)
         self._max_len = max_len
 
+    def matches(self, value):
+        return isinstance(value, six.string_types)
+
     def validate(self, value):
         super(String, self).validate(value)
 
@@ -132,6 +222,9 @@ class Bool(BaseField):
 
      >>> some_field.to_python(True) == True
     """
+    def matches(self, value):
+        return isinstance(value, bool)
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -153,6 +246,9 @@ class Int(BaseField):
      >>> some_field.to_python(1) == 1
 
     """
+    def matches(self, value):
+        return isinstance(value, six.integer_types)
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -174,6 +270,9 @@ class Float(BaseField):
      >>> some_field.to_python(1.0) == 1.0
 
     """
+    def matches(self, value):
+        return isinstance(value, float)
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -219,6 +318,12 @@ class List(BaseField):
         self._max_len = max_len
         self._element_type = element_type
 
+    def nested_fields(self):
+        return [self._element_type]
+
+    def matches(self, value):
+        return isinstance(value, list)
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -260,10 +365,20 @@ class List(BaseField):
         """
         value = self.check_default_value(value)
         if value is not None:
-            value = [self._element_type.to_python(element) for element in value]
+            value = [
+                copy_include_source(value, self._element_type.to_python(element))
+                for element in value]
 
         return super(List, self).to_python(value)
 
+    def trusted_to_python(self, value):
+        value = self.check_default_value(value)
+        if value is None:
+            return None
+        element_type = self._element_type
+        return [copy_include_source(value, element_type.trusted_to_python(element))
+                for element in value]
+
 
 class Map(BaseField):
     """
@@ -296,6 +411,12 @@ class Map(BaseField):
         self._value_type = value_type
         self._key_type = key_type
 
+    def nested_fields(self):
+        return [self._key_type, self._value_type]
+
+    def matches(self, value):
+        return isinstance(value, (dict, list))
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -324,33 +445,66 @@ class Map(BaseField):
         :type value: list or dict
         :return: None
         """
-        from pyraml.parser import ParseContext
         value = self.check_default_value(value)
+        raw_value = value
         if value is not None:
             # At this point we could get list of dict or dict
-            if isinstance(value, ParseContext):
-                value = value.data
+            if not isinstance(value, (dict, list)):
+                from pyraml.parser import ParseContext
+                if isinstance(value, ParseContext):
+                    value = value.data
             if isinstance(value, list):
-                _value = OrderedDict()
-                for item in value:
-                    if not isinstance(item, (dict, OrderedDict)):
-                        raise ValueError("{0!r} expected to be dict or list of "
-                                         "dict".format(value))
-
-                    _value.update(
-                        OrderedDict([
-                            (self._key_type.to_python(key), self._value_type.to_python(val))
-                            for key, val in item.items()])
-                    )
-                value = _value
-            else:
-                _value = OrderedDict()
-                for key, val in value.items():
-                    _value[self._key_type.to_python(key)] = self._value_type.to_python(val)
-                value = _value
+                value = raw_value = merge_sequence_of_maps(value)
+            _value = OrderedDict()
+            for key, val in value.items():
+                _value[self._key_type.to_python(key)] = self._value_type.to_python(val)
+            value = copy_include_source(raw_value, _value)
 
         return super(Map, self).to_python(value)
 
+    def trusted_to_python(self, value):
+        value = self.check_default_value(value)
+        if value is None:
+            return None
+        if isinstance(value, list):
+            value = merge_sequence_of_maps(value)
+        key_type = self._key_type
+        value_type = self._value_type
+        return copy_include_source(value, OrderedDict(
+            (key_type.trusted_to_python(key), value_type.trusted_to_python(val))
+            for key, val in value.items()))
+
+
+def merge_sequence_of_maps(value):
+    """
+    Merge sequence of single-entry maps, the form RAML uses for named
+    sections like ``traits``, ``resourceTypes`` and ``schemas``, into one
+    ordered map in a single pass.
+
+     >>> merge_sequence_of_maps([{'a': 1}, {'b': 2}])
+     OrderedDict([('a', 1), ('b', 2)])
+
+    Maps are returned as is.
+
+    :param value: list of dicts or dict
+
+    :raise ValueError: if an item is not a dict or a name is repeated
+
+    :rtype: dict
+    """
+    if isinstance(value, dict):
+        return value
+    merged = OrderedDict()
+    for item in value:
+        if not isinstance(item, dict):
+            raise ValueError("{0!r} expected to be dict or list of "
+                             "dict".format(value))
+        for key, val in item.items():
+            if key in merged:
+                raise ValueError("Property already used: {0}".format(key))
+            merged[key] = val
+    return copy_include_source(value, merged)
+
 
 class Reference(BaseField):
     """
@@ -388,13 +542,40 @@ class Reference(BaseField):
         If self.ref_class is string like "pyraml.entities.RamlTrait"
         just import the class and assign it to self.ref_class
 
+        References are normally resolved when the model class is created
+        (see :meth:`resolve`), this is a fallback for references to
+        classes defined later.
+
         :return: None
         """
-        if isinstance(self.ref_class, six.string_types):
-            module_path, _, class_name = self.ref_class.rpartition('.')
+        # Read the attribute once: another thread may resolve it meanwhile
+        ref_class = self.ref_class
+        if isinstance(ref_class, six.string_types):
+            module_path, _, class_name = ref_class.rpartition('.')
             mod = __import__(module_path, fromlist=[class_name])
             self.ref_class = getattr(mod, class_name)
 
+    def resolve(self, model_class):
+        """
+        Resolve dotted path in self.ref_class without importing anything:
+        either to ``model_class`` itself or to a class of an already
+        imported module.
+
+        :param model_class: model class being created
+        :type model_class: class of pyraml.model.Model
+        """
+        if not isinstance(self.ref_class, six.string_types):
+            return
+        module_path, _, class_name = self.ref_class.rpartition('.')
+        if (module_path, class_name) == (
+                model_class.__module__, model_class.__name__):
+            self.ref_class = model_class
+            return
+        mod = sys.modules.get(module_path)
+        ref_class = getattr(mod, class_name, None)
+        if ref_class is not None:
+            self.ref_class = ref_class
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -413,6 +594,22 @@ class Reference(BaseField):
             raise ValueError("{0!r} expected to be {1} or dict".format(
                 value, self.ref_class))
 
+    def matches(self, value):
+        return value is None or isinstance(value, (dict, self.ref_class))
+
+    def trusted_to_python(self, value):
+        if isinstance(self.ref_class, six.string_types):
+            self._lazy_import()
+        value = self.check_default_value(value)
+
+        if isinstance(value, self.ref_class):
+            return value
+        if value is None:
+            if hasattr(self.ref_class, 'notNull'):
+                return self.ref_class.from_json({'notNull': True}, trusted=True)
+            return self.ref_class()
+        return self.ref_class.from_json(value, trusted=True)
+
     def to_python(self, value):
         """
         Convert value to python representation
@@ -423,7 +620,8 @@ class Reference(BaseField):
         :return: int or long
         :rtype: int or long
         """
-        self._lazy_import()
+        if isinstance(self.ref_class, six.string_types):
+            self._lazy_import()
         value = self.check_default_value(value)
 
         if hasattr(self.ref_class, 'notNull') and value is None:
@@ -483,6 +681,9 @@ class Or(BaseField):
                 "Required at least 2 variants but got only {0}".format(
                     len(self.variants)))
 
+    def nested_fields(self):
+        return list(self.variants)
+
     def validate(self, value):
         """
         Validate value to match rules
@@ -519,6 +720,28 @@ class Or(BaseField):
         value = self.check_default_value(value)
         return self.validate(value)
 
+    def matches(self, value):
+        return any(field.matches(value) for field in self.variants)
+
+    def trusted_to_python(self, value):
+        """
+        Convert ``value`` with the first variant of matching type. Only
+        variants decoding data (e.g. JSON) are really tried, they may
+        reject a matching value.
+        """
+        value = self.check_default_value(value)
+        if value is None:
+            return None
+        for field in self.variants:
+            if field.matches(value):
+                try:
+                    return field.trusted_to_python(value)
+                except ValueError:
+                    pass
+        raise ValueError(
+            "{0!r} expected to be one of: {1}".format(
+                value, ",".join([type(f).__name__ for f in self.variants])))
+
 
 class EncodedDataBase(BaseField):
     """ Base class for data that may be encoded in some format.
@@ -540,7 +763,7 @@ class EncodedDataBase(BaseField):
         if isinstance(value, self.result_type):
             return value
         try:
-            return self.load_data(value)
+            return copy_include_source(value, self.load_data(value))
         except Exception as ex:
             raise ValueError(str(ex))
 
@@ -548,6 +771,10 @@ class EncodedDataBase(BaseField):
         value = self.check_default_value(value)
         return self.validate(value)
 
+    def trusted_to_python(self, value):
+        # Decoding is conversion, not validation
+        return self.to_python(value)
+
     def load_data(self, value):
         raise NotImplementedError
 
@@ -557,17 +784,56 @@ class JSONData(EncodedDataBase):
     result_type = OrderedDict
 
     def load_data(self, value):
+        import json
         return json.loads(value, object_pairs_hook=OrderedDict)
 
 
 class XMLData(EncodedDataBase):
-    """ Represents a XML encoded data. Uses built-in xml parsing library. """
-    result_type = XMLElement
+    """ Represents a XML encoded data. Uses lxml if installed or built-in
+    xml parsing library otherwise, see :func:`xml_etree`.
+    """
+
+    @property
+    def result_type(self):
+        return xml_element_class()
 
     def load_data(self, value):
         return parse_xml_string(value)
 
 
+class SchemaData(Or):
+    """ Schema of a body: name of a schema declared in root ``schemas``,
+    JSON or XML schema or any other string.
+
+    While a document is parsed, names are resolved to declared schemas
+    and equal schemas are decoded once, see
+    :class:`pyraml.schemas.SchemaRegistry`.
+
+     >>> some_field = SchemaData()
+     >>> some_field.to_python('{"type": "object"}')
+     OrderedDict([('type', 'object')])
+    """
+
+    def __init__(self, **kwargs):
+        super(SchemaData, self).__init__(
+            JSONData(), XMLData(), String(), **kwargs)
+
+    def to_python(self, value):
+        return self._convert(value, super(SchemaData, self).to_python)
+
+    def trusted_to_python(self, value):
+        return self._convert(
+            value, super(SchemaData, self).trusted_to_python)
+
+    def _convert(self, value, decode):
+        value = self.check_default_value(value)
+        options = current_options()
+        if options is None or options.schemas is None or \
+                not isinstance(value, six.string_types):
+            return decode(value)
+        return options.schemas.get(value, decode)
+
+
 class RamlNamedParametersMap(Map):
     """ Map of String to a list or a single instance of
     RamlNamedParameters.
@@ -0,0 +1,140 @@
+__author__ = 'ad'
+
+import sys
+
+from .model import Model
+from .fields import Map, List, Or, JSONData, XMLData, is_xml_element
+from .provenance import include_source
+
+
+__all__ = ["FootprintReport", "memory_footprint"]
+
+
+# Category names of decoded schemas and examples
+JSON_DATA = 'JSONData'
+XML_DATA = 'XMLData'
+
+
+class FootprintReport(object):
+    """ Memory retained by a parsed RAML tree.
+
+    Every object of the tree is accounted once, to the nearest model
+    owning it. Decoded JSON and XML data is accounted separately as
+    ``JSONData`` and ``XMLData``, so sizes of all categories sum up to
+    ``total``.
+
+    :ivar by_entity: entity class name (or ``JSONData``/``XMLData``) to
+        size in bytes
+    :ivar instances: entity class name (or ``JSONData``/``XMLData``) to
+        number of instances
+    :ivar by_include: included resource location to size in bytes; data
+        of the root document itself is accounted under ``None``
+    """
+
+    def __init__(self):
+        self.by_entity = {}
+        self.instances = {}
+        self.by_include = {}
+        self.total = 0
+
+    def _add(self, category, source, size):
+        self.by_entity[category] = self.by_entity.get(category, 0) + size
+        self.by_include[source] = self.by_include.get(source, 0) + size
+        self.total += size
+
+    def _add_instance(self, category):
+        self.instances[category] = self.instances.get(category, 0) + 1
+
+    def __repr__(self):
+        return {
+            'total': self.total,
+            'by_entity': self.by_entity,
+            'by_include': self.by_include,
+        }.__repr__()
+
+
+def memory_footprint(root):
+    """
+    Measure deep size of a parsed RAML tree per entity class and per
+    included resource.
+
+    Size of XML elements is estimated from their Python-visible parts
+    (tag, text, attributes); memory held by lxml internally is not
+    accounted.
+
+    :param root: root of the tree to measure
+    :type root: pyraml.entities.RamlRoot or pyraml.model.Model
+
+    :return: measured sizes
+    :rtype: FootprintReport
+    """
+    report = FootprintReport()
+    seen = set()
+    # (value, field describing the value, owner category, include source)
+    stack = [(root, None, None, None)]
+
+    while stack:
+        value, field, category, source = stack.pop()
+        if value is None or isinstance(value, bool) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        source = include_source(value) or source
+
+        if isinstance(value, Model):
+            category = value.__class__.__name__
+            report._add_instance(category)
+            size = sys.getsizeof(value)
+            if hasattr(value, '__dict__'):
+                size += sys.getsizeof(value.__dict__)
+            report._add(category, source, size)
+            for field_name, field_type in value.__class__._structure.items():
+                stack.append((getattr(value, field_name, None), field_type,
+                              category, source))
+            continue
+
+        decoded = _decoded_category(field, value)
+        if decoded is not None and decoded != category:
+            category = decoded
+            report._add_instance(category)
+
+        if is_xml_element(value):
+            report._add(category, source, _xml_size(value))
+        elif isinstance(value, dict):
+            report._add(category, source, sys.getsizeof(value))
+            value_field = field._value_type if isinstance(field, Map) else None
+            for key, val in value.items():
+                stack.append((key, None, category, source))
+                stack.append((val, value_field, category, source))
+        elif isinstance(value, (list, tuple)):
+            report._add(category, source, sys.getsizeof(value))
+            item_field = field._element_type if isinstance(field, List) else None
+            for item in value:
+                stack.append((item, item_field, category, source))
+        else:
+            report._add(category, source, sys.getsizeof(value))
+
+    return report
+
+
+def _decoded_category(field, value):
+    """ Detect decoded JSON or XML data described by ``field`` """
+    variants = field.variants if isinstance(field, Or) else [field]
+    for variant in variants:
+        if isinstance(variant, JSONData) and \
+                isinstance(value, JSONData.result_type):
+            return JSON_DATA
+        if isinstance(variant, XMLData) and is_xml_element(value):
+            return XML_DATA
+    return None
+
+
+def _xml_size(element):
+    size = 0
+    for el in element.iter():
+        size += sys.getsizeof(el)
+        for part in (el.tag, el.text, el.tail):
+            if part is not None:
+                size += sys.getsizeof(part)
+        for key, val in el.attrib.items():
+            size += sys.getsizeof(key) + sys.getsizeof(val)
+    return size
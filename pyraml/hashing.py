@@ -0,0 +1,277 @@
+__author__ = 'ad'
+
+import hashlib
+import binascii
+
+import six
+
+from .model import Model
+from .entities import RamlNamedParameters, RamlResponse, RamlBody
+from .fields import is_xml_element, serialize_xml
+
+
+__all__ = ["TreeHasher", "content_hash", "SpecDiff", "diff",
+           "canonicalize", "CANONICAL_ENTITIES"]
+
+# Entities which are shared by :func:`canonicalize`
+CANONICAL_ENTITIES = (RamlNamedParameters, RamlResponse, RamlBody)
+
+class TreeHasher(object):
+    """ Computes content hashes of models bottom-up.
+
+    Hash of a subtree depends only on its content: class names, field
+    values and mapping items (mapping order is not significant).
+    ``RamlResource.parentResource`` back references are ignored. Hashes
+    are memoized per object, so every node is hashed once even when it
+    is shared; the hashed tree must not change while the hasher is used.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        # Keep hashed objects alive so their ids are not reused
+        self._objects = []
+
+    def hash(self, value):
+        """
+        Return content hash of ``value``
+
+        Values are hashed after their items, walking the tree with an
+        explicit stack, so depth of the tree is not limited by the
+        recursion limit.
+
+        :param value: model or value of a model field
+        :return: SHA-1 digest
+        :rtype: bytes
+
+        :raise ValueError: if ``value`` contains itself
+        """
+        digest = self._hashes.get(id(value))
+        if digest is not None:
+            return digest
+
+        # ids of values whose items are being hashed
+        pending = set()
+        stack = [(value, False)]
+        while stack:
+            item, items_hashed = stack.pop()
+            key = id(item)
+            if key in self._hashes:
+                continue
+            if items_hashed:
+                pending.discard(key)
+                self._hashes[key] = self._compute(item)
+                self._objects.append(item)
+                continue
+            pending.add(key)
+            stack.append((item, True))
+            for child in _items(item):
+                if id(child) in pending:
+                    raise ValueError("Can't hash a value containing itself")
+                if id(child) not in self._hashes:
+                    stack.append((child, False))
+        return self._hashes[id(value)]
+
+    def _compute(self, value):
+        """ Hash ``value`` whose items are hashed already """
+        hashes = self._hashes
+        h = hashlib.sha1()
+        if isinstance(value, Model):
+            h.update(b'M' + value.__class__.__name__.encode('utf-8'))
+            for field_name in sorted(value.__class__._structure):
+                field_value = getattr(value, field_name, None)
+                if field_value is None or field_name == 'parentResource':
+                    continue
+                h.update(field_name.encode('utf-8') + b'=')
+                h.update(hashes[id(field_value)])
+        elif isinstance(value, dict):
+            h.update(b'D')
+            for item_hash in sorted(
+                    hashes[id(key)] + hashes[id(val)]
+                    for key, val in value.items()):
+                h.update(item_hash)
+        elif isinstance(value, list):
+            h.update(b'L')
+            for item in value:
+                h.update(hashes[id(item)])
+        elif isinstance(value, six.text_type):
+            h.update(b'S' + value.encode('utf-8'))
+        elif is_xml_element(value):
+            h.update(b'X' + serialize_xml(value).encode('utf-8'))
+        else:
+            # numbers, booleans, null
+            h.update(type(value).__name__.encode('utf-8') + b':')
+            h.update(repr(value).encode('utf-8'))
+        return h.digest()
+
+
+def _items(value):
+    """ Return values ``value`` is composed of, which are hashed and
+    canonicalized before it
+    """
+    if isinstance(value, Model):
+        return [getattr(value, field_name, None)
+                for field_name in value.__class__._structure
+                if field_name != 'parentResource' and
+                getattr(value, field_name, None) is not None]
+    if isinstance(value, dict):
+        items = []
+        for key, val in value.items():
+            items.append(key)
+            items.append(val)
+        return items
+    if isinstance(value, list):
+        return value
+    return ()
+
+
+def content_hash(value):
+    """ Return hex content hash of a model or a field value.
+
+    :rtype: str
+    """
+    return binascii.hexlify(TreeHasher().hash(value)).decode('ascii')
+
+
+class SpecDiff(object):
+    """ Result of :func:`diff`.
+
+    Each path is a tuple of field names and mapping keys from the root,
+    e.g. ``('resources', '/users', 'methods', 'get', 'description')``.
+
+    :ivar added: paths present only in the new tree
+    :ivar removed: paths present only in the old tree
+    :ivar changed: paths present in both trees with different values
+    """
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return {
+            'added': self.added,
+            'removed': self.removed,
+            'changed': self.changed,
+        }.__repr__()
+
+
+def diff(old_root, new_root):
+    """
+    Compare two versions of a parsed RAML.
+
+    Both trees are hashed whole, so the comparison takes time linear in
+    their size. Subtrees with equal content hashes are then skipped, so
+    paths are reported only for changed parts of the trees.
+
+    :param old_root: previous version
+    :type old_root: pyraml.entities.RamlRoot
+
+    :param new_root: new version
+    :type new_root: pyraml.entities.RamlRoot
+
+    :rtype: SpecDiff
+    """
+    hasher = TreeHasher()
+    result = SpecDiff()
+    stack = [((), old_root, new_root)]
+
+    while stack:
+        path, old, new = stack.pop()
+        if old is None and new is None:
+            continue
+        if old is None:
+            result.added.append(path)
+        elif new is None:
+            result.removed.append(path)
+        elif hasher.hash(old) == hasher.hash(new):
+            continue
+        elif isinstance(old, Model) and type(old) is type(new):
+            for field_name in sorted(old.__class__._structure, reverse=True):
+                if field_name == 'parentResource':
+                    continue
+                stack.append((path + (field_name,),
+                              getattr(old, field_name, None),
+                              getattr(new, field_name, None)))
+        elif isinstance(old, dict) and isinstance(new, dict):
+            for key in reversed(list(new.keys())):
+                stack.append((path + (key,), old.get(key), new[key]))
+            for key in old:
+                if key not in new:
+                    result.removed.append(path + (key,))
+        else:
+            result.changed.append(path)
+
+    return result
+
+
+def canonicalize(root):
+    """
+    Make structurally equal subtrees of ``root`` share one instance.
+
+    Equal :data:`CANONICAL_ENTITIES` (named parameters, responses and
+    bodies) are replaced by the first instance found in the tree,
+    including placeholders of null bodies and responses (models with
+    only ``notNull``/``isOptional`` set). Instances are never shared
+    between trees.
+
+    The canonicalized tree must be treated as read-only: changing a
+    shared instance changes it everywhere it's used.
+
+    :param root: tree to canonicalize in place
+    :type root: pyraml.entities.RamlRoot
+
+    :return: ``root``
+    """
+    hasher = TreeHasher()
+    pool = {}
+    # id of visited value -> its canonical replacement
+    replacements = {}
+    # Keep visited values alive so their ids are not reused
+    visited = []
+
+    # Items are canonicalized before values containing them, walking the
+    # tree with an explicit stack
+    stack = [(root, False)]
+    while stack:
+        value, items_done = stack.pop()
+        key = id(value)
+        if not items_done:
+            if key in replacements:
+                continue
+            replacements[key] = value
+            visited.append(value)
+            stack.append((value, True))
+            stack.extend(
+                (item, False) for item in reversed(list(_items(value))))
+            continue
+
+        if isinstance(value, Model):
+            for field_name in value.__class__._structure:
+                if field_name == 'parentResource':
+                    continue
+                field_value = getattr(value, field_name, None)
+                if field_value is not None:
+                    new_value = replacements[id(field_value)]
+                    if new_value is not field_value:
+                        setattr(value, field_name, new_value)
+            if isinstance(value, CANONICAL_ENTITIES):
+                # Class name is hashed, so placeholders of different
+                # classes don't collide
+                value = pool.setdefault(hasher.hash(value), value)
+        elif isinstance(value, dict):
+            for item_key, item in list(value.items()):
+                new_item = replacements[id(item)]
+                if new_item is not item:
+                    value[item_key] = new_item
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                value[i] = replacements[id(item)]
+        replacements[key] = value
+
+    return root
+
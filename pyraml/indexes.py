@@ -0,0 +1,179 @@
+__author__ = 'ad'
+
+import six
+try:
+    from collections import OrderedDict
+except ImportError:
+    # For python 2.6 additional package ordereddict should be installed
+    from ordereddict import OrderedDict
+
+
+__all__ = ["RamlIndexes", "IndexedEntity", "absolute_resource_path",
+           "referenced_names"]
+
+
+class IndexState(object):
+    """ Validity flag shared by indexes and all entities they cover """
+    __slots__ = ('valid',)
+
+    def __init__(self):
+        self.valid = True
+
+
+class IndexedEntity(object):
+    """ Entities whose attributes are covered by :class:`RamlIndexes`.
+
+    Assigning a public attribute of such entity invalidates indexes
+    built over it. In-place changes of containers (e.g.
+    ``resource.methods['get'] = ...``) are not tracked, call
+    ``RamlRoot.invalidate_indexes`` after them.
+
+    Assignments are tracked only once the first indexes are built (see
+    :func:`_track_assignments`), so parses of programs which never use
+    indexes don't pay for it.
+    """
+
+
+def _invalidating_setattr(self, name, value):
+    object.__setattr__(self, name, value)
+    if name[0] != '_':
+        index_state = self.__dict__.get('_index_state')
+        if index_state is not None:
+            index_state.valid = False
+
+
+def _track_assignments():
+    """ Make assignments of attributes of :class:`IndexedEntity`
+    invalidate indexes built over them
+    """
+    if '__setattr__' not in IndexedEntity.__dict__:
+        IndexedEntity.__setattr__ = _invalidating_setattr
+
+
+class RamlIndexes(object):
+    """ Lookup indexes over resources tree of a RamlRoot.
+
+    :ivar resources_by_path: absolute resource path (e.g.
+        ``/users/{id}/orders``) to RamlResource
+    :ivar resources_by_display_name: displayName to list of RamlResource
+    :ivar by_trait: trait name to list of RamlResource and RamlMethod
+        which have it in ``is``
+    :ivar by_security_scheme: security scheme name to list of RamlRoot,
+        RamlResource and RamlMethod which have it in ``securedBy``
+    :ivar by_resource_type: resource type name to list of RamlResource
+    :ivar bodies_by_schema: schema name to list of RamlBody of methods
+        and responses referencing it by name. Bodies of parsed documents
+        hold the decoded declared schema (see
+        :class:`pyraml.schemas.SchemaRegistry`) and are indexed by the name
+        they referenced while parsed; bodies which have the name of an
+        unknown schema are indexed by the name. Inline schemas aren't
+        indexed, even if they are equal to a declared one.
+    """
+
+    def __init__(self, root):
+        """
+        Build indexes walking the whole tree of ``root`` once.
+
+        :type root: pyraml.entities.RamlRoot
+        """
+        _track_assignments()
+        self.state = IndexState()
+        self.resources_by_path = OrderedDict()
+        self.resources_by_display_name = {}
+        self.by_trait = {}
+        self.by_security_scheme = {}
+        self.by_resource_type = {}
+        self.bodies_by_schema = {}
+
+        self._watch(root)
+        self._add_usages(self.by_security_scheme, root, root.securedBy)
+
+        # Depth-first walk in document order
+        stack = _nested_resources('', root)
+        while stack:
+            path, resource = stack.pop()
+            self._add_resource(path, resource)
+            stack.extend(_nested_resources(path, resource))
+
+    @property
+    def valid(self):
+        return self.state.valid
+
+    def _watch(self, entity):
+        entity._index_state = self.state
+
+    def _add_resource(self, path, resource):
+        self._watch(resource)
+        self.resources_by_path[path] = resource
+        if resource.displayName is not None:
+            self.resources_by_display_name.setdefault(
+                resource.displayName, []).append(resource)
+        self._add_usages(self.by_trait, resource, resource.is_)
+        self._add_usages(self.by_security_scheme, resource, resource.securedBy)
+        self._add_usages(self.by_resource_type, resource, [resource.type_])
+
+        for method in (resource.methods or {}).values():
+            self._watch(method)
+            self._add_usages(self.by_trait, method, method.is_)
+            self._add_usages(self.by_security_scheme, method, method.securedBy)
+            self._add_bodies(method.body)
+            for response in (method.responses or {}).values():
+                self._watch(response)
+                self._add_bodies(response.body)
+
+    def _add_bodies(self, bodies):
+        for body in (bodies or {}).values():
+            self._watch(body)
+            name = _schema_name(body)
+            if name is not None:
+                self.bodies_by_schema.setdefault(name, []).append(body)
+
+    @staticmethod
+    def _add_usages(index, entity, references):
+        for name in referenced_names(references):
+            index.setdefault(name, []).append(entity)
+
+
+def _schema_name(body):
+    """ Return name of the schema ``body`` references or None """
+    # Recorded by RamlBody.from_json, unless the schema was replaced since
+    reference = getattr(body, '_schema_reference', None)
+    if reference is not None and reference[1] is body.schema:
+        return reference[0]
+    if isinstance(body.schema, six.string_types):
+        return body.schema
+    return None
+
+
+def _nested_resources(parent_path, parent):
+    """ Return (absolute path, resource) of resources nested in ``parent``
+    in reversed order, ready to be pushed to a stack.
+    """
+    return [(absolute_resource_path(parent_path, name), resource)
+            for name, resource in reversed(list(
+                (parent.resources or {}).items()))
+            if resource is not None]
+
+
+def absolute_resource_path(parent_path, name):
+    """ Join path of a parent resource with relative path of a nested one
+
+     >>> absolute_resource_path('/users', '/{id}')
+     '/users/{id}'
+     >>> absolute_resource_path('/', '/users')
+     '/users'
+    """
+    return parent_path.rstrip('/') + name
+
+
+def referenced_names(references):
+    """ Extract names from values of ``is``, ``securedBy`` or ``type``.
+
+    Each item may be a name, a mapping of name to parameters or null.
+    """
+    for reference in references or []:
+        if isinstance(reference, six.string_types):
+            yield reference
+        elif isinstance(reference, dict):
+            for name in reference:
+                yield name
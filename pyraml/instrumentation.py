@@ -0,0 +1,193 @@
+__author__ = 'ad'
+
+import time
+import functools
+import threading
+import contextlib
+from collections import defaultdict
+
+
+__all__ = ["ParseObserver", "ParseStats", "IncludesCollector", "observe",
+           "current_observer", "timed"]
+
+
+# Observers are installed per thread, so concurrent loads in other threads
+# are not reported to (and do not pay for) somebody else's observer.
+_state = threading.local()
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    # Python 2.7
+    _clock = time.time
+
+
+class ParseObserver(object):
+    """ Receives events emitted while a RAML document is loaded and parsed.
+
+    Subclass it and override methods of interest. All times are wall-clock
+    seconds.
+    """
+
+    def on_phase(self, phase, elapsed, details):
+        """ Called when a parser phase is finished.
+
+        :param phase: phase name, one of ``"read"``, ``"header"``,
+            ``"yaml_load"`` (includes are fetched during this phase),
+            ``"parse_resource"``, ``"parse_method"``
+        :type phase: str
+
+        :param elapsed: time spent in the phase, nested phases included,
+            except that ``"parse_resource"`` of a resource excludes its
+            nested resources, which are reported separately
+        :type elapsed: float
+
+        :param details: phase specific information, e.g. resource name
+        :type details: dict
+        """
+
+    def on_fetch(self, path):
+        """ Called before an included resource is fetched.
+
+        :param path: local path or URL of the included resource
+        :type path: str
+        """
+
+    def on_include(self, path, size, elapsed):
+        """ Called when an included resource has been fetched.
+
+        :param path: local path or URL of the included resource
+        :type path: str
+
+        :param size: length of the fetched content
+        :type size: int
+
+        :param elapsed: time spent fetching the resource
+        :type elapsed: float
+        """
+
+    def on_models(self, counts):
+        """ Called once a document is parsed.
+
+        :param counts: number of models in the parsed tree per entity class
+            name, e.g. ``{'RamlMethod': 12}``
+        :type counts: dict
+        """
+
+
+class ParseStats(ParseObserver):
+    """ Observer which accumulates all events of a load.
+
+     >>> stats = ParseStats()
+     >>> with observe(stats):
+     ...     root = pyraml.parser.load('api.raml')
+     >>> stats.phases['yaml_load']
+     [1, 0.0123]
+    """
+
+    def __init__(self):
+        super(ParseStats, self).__init__()
+        # phase name -> [number of calls, total elapsed]
+        self.phases = defaultdict(lambda: [0, 0.0])
+        # list of (path, size, elapsed)
+        self.includes = []
+        self.models = {}
+
+    def on_phase(self, phase, elapsed, details):
+        totals = self.phases[phase]
+        totals[0] += 1
+        totals[1] += elapsed
+
+    def on_include(self, path, size, elapsed):
+        self.includes.append((path, size, elapsed))
+
+    def on_models(self, counts):
+        for class_name, count in counts.items():
+            self.models[class_name] = self.models.get(class_name, 0) + count
+
+
+class IncludesCollector(ParseObserver):
+    """ Observer which collects locations of included resources in the
+    order they were first fetched.
+
+    All events are passed on to ``observer``, e.g. the one installed by
+    the caller, so it still receives them:
+
+     >>> collector = IncludesCollector(current_observer())
+     >>> with observe(collector):
+     ...     root = pyraml.parser.load('api.raml')
+    """
+
+    def __init__(self, observer=None):
+        """
+        :param observer: receiver of all events or None
+        :type observer: ParseObserver
+        """
+        super(IncludesCollector, self).__init__()
+        self.paths = []
+        self.observer = observer
+
+    def on_phase(self, phase, elapsed, details):
+        if self.observer is not None:
+            self.observer.on_phase(phase, elapsed, details)
+
+    def on_fetch(self, path):
+        if self.observer is not None:
+            self.observer.on_fetch(path)
+
+    def on_include(self, path, size, elapsed):
+        if path not in self.paths:
+            self.paths.append(path)
+        if self.observer is not None:
+            self.observer.on_include(path, size, elapsed)
+
+    def on_models(self, counts):
+        if self.observer is not None:
+            self.observer.on_models(counts)
+
+
+def current_observer():
+    """ Return observer installed in the current thread or None """
+    return getattr(_state, 'observer', None)
+
+
+@contextlib.contextmanager
+def observe(observer):
+    """ Report events of loads done in the current thread to ``observer``
+    for the duration of the ``with`` block.
+
+    :param observer: events receiver
+    :type observer: ParseObserver
+    """
+    previous = current_observer()
+    _state.observer = observer
+    try:
+        yield observer
+    finally:
+        _state.observer = previous
+
+
+def timed(phase, describe=None):
+    """ Decorator reporting execution time of the decorated function
+    as ``phase`` to the current observer.
+
+    When no observer is installed the decorated function is called
+    directly.
+
+    :param describe: callable which receives arguments of the decorated
+        function and returns ``details`` dict for the event
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            observer = getattr(_state, 'observer', None)
+            if observer is None:
+                return func(*args, **kwargs)
+            start = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                details = describe(*args, **kwargs) if describe else {}
+                observer.on_phase(phase, _clock() - start, details)
+        return wrapper
+    return decorator
@@ -0,0 +1,194 @@
+__author__ = 'ad'
+
+from . import RamlException
+from .instrumentation import _clock
+from .options import current_options
+
+
+__all__ = ["RamlLimitException", "RamlIncludeCycleException", "ParseLimits",
+           "ResourceGovernor", "current_governor"]
+
+# Number of counted nodes between checks of the wall-clock budget
+_TIME_CHECK_NODES = 4096
+
+
+class RamlLimitException(RamlException):
+    """ Raised when a parse exceeds one of its :class:`ParseLimits` """
+
+    def __init__(self, message, limit=None):
+        """
+        :param limit: name of the exceeded attribute of
+            :class:`ParseLimits`, e.g. ``max_nodes``
+        :type limit: str
+        """
+        super(RamlLimitException, self).__init__(message)
+        self.limit = limit
+
+
+class RamlIncludeCycleException(RamlLimitException):
+    """ Raised when a document includes itself, directly or through other
+    documents. Such chain is infinite, so it's rejected with or without
+    limits.
+    """
+
+    def __init__(self, chain):
+        """
+        :param chain: locations of the included documents, the first one
+            being included again last
+        :type chain: tuple of str
+        """
+        super(RamlIncludeCycleException, self).__init__(
+            "Cyclic include: {0}".format(" -> ".join(chain)),
+            'max_include_depth')
+        self.chain = chain
+
+
+class ParseLimits(object):
+    """ Budgets of a single parse, e.g. of a document uploaded by a third
+    party. Each budget is unlimited if None.
+
+    ``max_nodes`` bounds YAML nodes of all loaded documents, counted with
+    values of YAML aliases expanded, so documents which are small but
+    unfold to huge trees ("billion laughs") are rejected while they are
+    loaded. ``max_bytes`` bounds the total size of the document and its
+    included resources; network resources are never read beyond it.
+
+     >>> limits = ParseLimits(max_nodes=100000, max_include_depth=8,
+     ...                      max_includes=200, max_bytes=10 * 1024 * 1024,
+     ...                      max_seconds=5.0)
+     >>> root = load('uploads/api.raml', limits=limits)
+    """
+
+    def __init__(self, max_nodes=None, max_include_depth=None,
+                 max_includes=None, max_bytes=None, max_seconds=None):
+        """
+        :param max_nodes: maximal number of YAML nodes
+        :type max_nodes: int
+
+        :param max_include_depth: maximal length of include chains,
+            resources included by the parsed document are at depth 1
+        :type max_include_depth: int
+
+        :param max_includes: maximal number of included resources
+        :type max_includes: int
+
+        :param max_bytes: maximal total size of loaded resources in bytes
+        :type max_bytes: int
+
+        :param max_seconds: maximal wall-clock time of the parse
+        :type max_seconds: float
+        """
+        self.max_nodes = max_nodes
+        self.max_include_depth = max_include_depth
+        self.max_includes = max_includes
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+    def check_bytes(self, size, location):
+        """ Check size of a single resource against ``max_bytes`` before
+        it's read
+
+        :raise RamlLimitException: if it's exceeded
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise RamlLimitException(
+                "{0} is larger than {1} bytes".format(
+                    location, self.max_bytes), 'max_bytes')
+
+    def __repr__(self):
+        return "{0}({1})".format(self.__class__.__name__, ", ".join(
+            "{0}={1!r}".format(name, value)
+            for name, value in sorted(self.__dict__.items())
+            if value is not None))
+
+
+class ResourceGovernor(object):
+    """ Usage of :class:`ParseLimits` by a running parse.
+
+    Counters are updated by the YAML loader, the include loader and the
+    resources builder of the parse; the first one exceeding its budget
+    raises :class:`RamlLimitException`. Wall-clock time is checked on
+    every include, every parsed resource and every few thousand nodes.
+    """
+
+    def __init__(self, limits):
+        """
+        :type limits: ParseLimits
+        """
+        self.limits = limits
+        self.nodes = 0
+        self.includes = 0
+        self.bytes = 0
+        self._deadline = None if limits.max_seconds is None else \
+            _clock() + limits.max_seconds
+        self._next_time_check = _TIME_CHECK_NODES
+
+    def count_nodes(self, count):
+        """ Count ``count`` loaded YAML nodes """
+        self.nodes += count
+        max_nodes = self.limits.max_nodes
+        if max_nodes is not None and self.nodes > max_nodes:
+            raise RamlLimitException(
+                "Document has more than {0} nodes".format(max_nodes),
+                'max_nodes')
+        if self.nodes >= self._next_time_check:
+            self._next_time_check = self.nodes + _TIME_CHECK_NODES
+            self.check_time()
+
+    def count_include(self, location, depth):
+        """
+        Count include of ``location``
+
+        :param depth: length of the include chain ending with it
+        :type depth: int
+        """
+        limits = self.limits
+        if limits.max_include_depth is not None and \
+                depth > limits.max_include_depth:
+            raise RamlLimitException(
+                "Include of {0} is nested deeper than {1} levels".format(
+                    location, limits.max_include_depth), 'max_include_depth')
+        self.includes += 1
+        if limits.max_includes is not None and \
+                self.includes > limits.max_includes:
+            raise RamlLimitException(
+                "Document includes more than {0} resources".format(
+                    limits.max_includes), 'max_includes')
+        self.check_time()
+
+    def count_bytes(self, size, location):
+        """ Count ``size`` bytes of resource at ``location`` """
+        self.limits.check_bytes(size, location)
+        self.bytes += size
+        if self.limits.max_bytes is not None and \
+                self.bytes > self.limits.max_bytes:
+            raise RamlLimitException(
+                "Loaded resources are larger than {0} bytes".format(
+                    self.limits.max_bytes), 'max_bytes')
+
+    def remaining_bytes(self):
+        """ Return number of bytes which can still be loaded or None """
+        if self.limits.max_bytes is None:
+            return None
+        return max(self.limits.max_bytes - self.bytes, 0)
+
+    def remaining_seconds(self):
+        """ Return wall-clock time left to the parse or None """
+        if self._deadline is None:
+            return None
+        return max(self._deadline - _clock(), 0.0)
+
+    def check_time(self):
+        """ Check the wall-clock budget """
+        if self._deadline is not None and _clock() > self._deadline:
+            raise RamlLimitException(
+                "Parse takes longer than {0} seconds".format(
+                    self.limits.max_seconds), 'max_seconds')
+
+
+def current_governor():
+    """ Return governor of the parse running in the current thread, or
+    None if it has no limits
+    """
+    options = current_options()
+    return options.governor if options is not None else None
@@ -0,0 +1,217 @@
+__author__ = 'ad'
+
+import json
+
+import six
+from six.moves import http_client
+
+from .routing import RouteTable
+
+
+__all__ = ["MockResponse", "MockServer", "wsgi_app", "asgi_app"]
+
+
+class MockResponse(object):
+    """ Response served by the mock, rendered once when the mock is built.
+
+    :ivar status: HTTP status code
+    :ivar status_line: WSGI status, e.g. ``"200 OK"``
+    :ivar headers: list of (name, value) string pairs
+    :ivar body: response body
+    :type body: bytes
+    """
+    __slots__ = ('status', 'status_line', 'headers', 'body',
+                 'asgi_start', 'asgi_body')
+
+    def __init__(self, status, headers=(), body=b'', send_body=True):
+        """
+        :param send_body: False to send headers of ``body`` only, as
+            response to a HEAD request
+        :type send_body: bool
+        """
+        self.status = status
+        self.status_line = '{0} {1}'.format(
+            status, http_client.responses.get(status, 'Unknown'))
+        self.headers = list(headers) + [('Content-Length', str(len(body)))]
+        self.body = body if send_body else b''
+        # Ready to send ASGI messages
+        self.asgi_start = {
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in self.headers],
+        }
+        self.asgi_body = {'type': 'http.response.body', 'body': self.body}
+
+    def __repr__(self):
+        return "<MockResponse {0}>".format(self.status_line)
+
+
+NOT_FOUND = MockResponse(
+    404, [('Content-Type', 'text/plain')], b'Not Found')
+
+
+class MockServer(object):
+    """ Mock of a RAML API serving examples of declared responses.
+
+    Every method of every resource gets one response rendered up front:
+    the lowest declared 2xx status (or lowest declared status, or 200
+    with no body if there are none), with the example of the body of
+    ``media_type`` (or the first body with an example), and headers
+    whose ``example`` or ``default`` is given. Requests are only
+    matched to a route and answered with ready bytes.
+
+    HEAD requests of resources which don't declare ``head`` are
+    answered as GET without body. Traits and resource types are not
+    applied, only methods declared on resources are served.
+
+    The instance is a WSGI application, :meth:`asgi` returns an ASGI
+    one.
+    """
+
+    def __init__(self, root, prefix=None, media_type=None):
+        """
+        :param root: parsed RAML tree
+        :type root: pyraml.entities.RamlRoot
+
+        :param prefix: path prefix of requests, see
+            :class:`pyraml.routing.RouteTable`
+        :type prefix: str
+
+        :param media_type: preferred media type of examples, defaults to
+            ``root.mediaType``
+        :type media_type: str
+        """
+        self.routes = RouteTable(root, prefix)
+        media_type = media_type or root.mediaType
+        # Route -> {'GET': MockResponse, ...}
+        self.responses = {}
+
+        for route in self.routes.routes:
+            responses = {}
+            for method_name, method in (route.resource.methods or {}).items():
+                responses[method_name.upper()] = render_response(
+                    method, media_type)
+            if 'GET' in responses and 'HEAD' not in responses:
+                responses['HEAD'] = render_response(
+                    route.resource.methods['get'], media_type,
+                    send_body=False)
+            allow = ', '.join(sorted(responses))
+            responses[None] = MockResponse(
+                405, [('Allow', allow), ('Content-Type', 'text/plain')],
+                b'Method Not Allowed')
+            self.responses[route] = responses
+
+    def respond(self, http_method, path, raw=False):
+        """
+        Find response to a request
+
+        :param http_method: request method, upper case
+        :type http_method: str
+
+        :param path: request path
+        :type path: str
+
+        :param raw: ``path`` is percent-encoded, see
+            :meth:`pyraml.routing.RouteTable.match`
+        :type raw: bool
+
+        :rtype: MockResponse
+        """
+        route, _ = self.routes.match(path, raw)
+        if route is None:
+            return NOT_FOUND
+        responses = self.responses[route]
+        return responses.get(http_method) or responses[None]
+
+    def __call__(self, environ, start_response):
+        response = self.respond(
+            environ['REQUEST_METHOD'], environ.get('PATH_INFO') or '/')
+        start_response(response.status_line, list(response.headers))
+        return [response.body]
+
+    def asgi(self):
+        """ Return ASGI application serving this mock (Python 3 only) """
+        from .asgi import MockASGIApp
+        return MockASGIApp(self)
+
+
+def wsgi_app(root, **kwargs):
+    """ Build WSGI mock application of ``root``, see :class:`MockServer` """
+    return MockServer(root, **kwargs)
+
+
+def asgi_app(root, **kwargs):
+    """ Build ASGI mock application of ``root``, see :class:`MockServer` """
+    return MockServer(root, **kwargs).asgi()
+
+
+def render_response(method, media_type=None, send_body=True):
+    """
+    Render mock response of ``method``
+
+    :type method: pyraml.entities.RamlMethod
+
+    :param media_type: preferred media type of the example
+    :type media_type: str
+
+    :param send_body: False to render response to a HEAD request
+    :type send_body: bool
+
+    :rtype: MockResponse
+    """
+    status, response = _pick_response(method.responses)
+    if response is None:
+        return MockResponse(status)
+
+    headers = []
+    for name, header in (response.headers or {}).items():
+        value = header.example if header.example is not None \
+            else header.default
+        if value is not None:
+            headers.append((name, six.text_type(value)))
+
+    body_type, example = _pick_example(response.body, media_type)
+    if body_type is None:
+        return MockResponse(status, headers)
+    headers.insert(0, ('Content-Type', body_type))
+    return MockResponse(status, headers, _render_example(example), send_body)
+
+
+def _pick_response(responses):
+    """ Return (status code, RamlResponse) of the lowest 2xx status, or
+    of the lowest status if there are no 2xx ones.
+    """
+    codes = []
+    for code, response in (responses or {}).items():
+        try:
+            codes.append((int(code), response))
+        except (TypeError, ValueError):
+            continue
+    if not codes:
+        return 200, None
+    codes.sort(key=lambda item: (not 200 <= item[0] < 300, item[0]))
+    return codes[0]
+
+
+def _pick_example(bodies, media_type):
+    """ Return (media type, example) of the preferred body with an
+    example, or (None, None).
+    """
+    bodies = bodies or {}
+    if media_type in bodies and bodies[media_type] is not None and \
+            bodies[media_type].example is not None:
+        return media_type, bodies[media_type].example
+    for body_type, body in bodies.items():
+        if body is not None and body.example is not None:
+            return body_type, body.example
+    return None, None
+
+
+def _render_example(example):
+    if isinstance(example, six.binary_type):
+        return example
+    if isinstance(example, six.string_types):
+        return example.encode('utf-8')
+    return json.dumps(example, separators=(',', ':')).encode('utf-8')
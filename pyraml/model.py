@@ -1,7 +1,9 @@
 __author__ = 'ad'
 
 import six
-from .fields import BaseField
+from .fields import BaseField, Reference
+from .provenance import copy_include_source
+from .options import current_options
 from . import ValidationError
 
 class BaseModel(object):
@@ -23,6 +25,14 @@ class Schema(type):
                 for field_name, field_type in parent._structure.items():
                     if field_name not in _structure:
                         _structure[field_name] = field_type
+            elif not issubclass(parent, BaseModel):
+                # Mixins (e.g. TraitedEntity) declare fields as plain
+                # class attributes
+                for klass in parent.__mro__:
+                    for field_name, field_type in vars(klass).items():
+                        if isinstance(field_type, BaseField) and \
+                                field_name not in _structure:
+                            _structure[field_name] = field_type
 
         # Propagate field name from structure to the field, so we can access
         # RAML field name
@@ -32,7 +42,18 @@ class Schema(type):
 
         attrs['_structure'] = _structure
 
-        return super(Schema, mcs).__new__(mcs, name, bases, attrs)
+        cls = super(Schema, mcs).__new__(mcs, name, bases, attrs)
+
+        # Resolve references given as dotted paths once, so that
+        # converting values never has to import anything
+        stack = list(_structure.values())
+        while stack:
+            field_obj = stack.pop()
+            if isinstance(field_obj, Reference):
+                field_obj.resolve(cls)
+            stack.extend(field_obj.nested_fields())
+
+        return cls
 
 
 @six.add_metaclass(Schema)
@@ -82,24 +103,48 @@ class Model(BaseModel):
             raise ValidationError(errors)
 
     @classmethod
-    def from_json(cls, json_object):
+    def from_json(cls, json_object, trusted=False):
         """
         Initialize a model from JSON object
 
         :param json_object: JSON object to initialize a model
         :type json_object: dict
 
+        :param trusted: ``json_object`` is known to be valid, convert
+            values without validating them
+        :type trusted: bool
+
         :return: instance of BaseModel
         :rtype: instance of BaseModel
         """
         rv = cls()
         errors = {}
 
-        for model_field_name, field_type in cls._structure.items():
+        # Fields left out by projection of the current parse stay None,
+        # values of included fields are converted whole
+        options = current_options()
+        included = ()
+        if options is not None and options.projected:
+            structure = dict(
+                (model_field_name, field_type)
+                for model_field_name, field_type in cls._structure.items()
+                if options.wants(field_type.field_name))
+            included = [field_type for field_type in structure.values()
+                        if options.includes_whole(field_type.field_name)]
+        else:
+            structure = cls._structure
+
+        if trusted:
+            return copy_include_source(
+                json_object,
+                cls._from_trusted_json(json_object, structure, included))
+
+        for model_field_name, field_type in structure.items():
             # Validate and process a field of JSON object
             try:
-                value = field_type.to_python(
-                    json_object.get(model_field_name, None))
+                value = _convert(field_type,
+                                 json_object.get(model_field_name, None),
+                                 False, field_type in included)
                 setattr(rv, model_field_name, value)
             except ValueError as e:
                 errors[model_field_name] = six.text_type(e)
@@ -107,14 +152,76 @@ class Model(BaseModel):
         # Look for aliased attributes
         for field_name, field_value in json_object.items():
             if not field_name in cls._structure:
-                for model_field_name, field_type in cls._structure.items():
+                for model_field_name, field_type in structure.items():
                     if field_type.field_name == field_name:
                         try:
-                            value = field_type.to_python(field_value)
+                            value = _convert(field_type, field_value, False,
+                                             field_type in included)
                             setattr(rv, model_field_name, value)
                         except ValueError as e:
                             errors[model_field_name] = six.text_type(e)
         if errors:
             raise ValidationError(errors)
 
+        return copy_include_source(json_object, rv)
+
+    @classmethod
+    def _from_trusted_json(cls, json_object, structure, included=()):
+        """ Same as :meth:`from_json` without validation of values """
+        rv = cls()
+        for model_field_name, field_type in structure.items():
+            setattr(rv, model_field_name, _convert(
+                field_type, json_object.get(model_field_name, None), True,
+                field_type in included))
+
+        # Look for aliased attributes
+        for field_name, field_value in json_object.items():
+            if not field_name in cls._structure:
+                for model_field_name, field_type in structure.items():
+                    if field_type.field_name == field_name:
+                        setattr(rv, model_field_name, _convert(
+                            field_type, field_value, True,
+                            field_type in included))
         return rv
+
+
+def _convert(field_type, value, trusted, whole):
+    """ Convert ``value`` of a model field, with all its nested fields
+    if ``whole`` (the field is included by projection of the parse)
+    """
+    convert = field_type.trusted_to_python if trusted else \
+        field_type.to_python
+    if not whole:
+        return convert(value)
+    with current_options().included():
+        return convert(value)
+
+
+def iter_models(obj):
+    """
+    Iterate over all models reachable from ``obj`` including ``obj`` itself.
+
+    Every model is yielded once even if it is referenced several times
+    (e.g. ``RamlResource.parentResource``).
+
+    :param obj: model, list or dict of models
+    :type obj: Model or list or dict
+
+    :return: iterator over models
+    :rtype: iterator of Model
+    """
+    seen = set()
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Model):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            yield value
+            stack.extend(getattr(value, field_name, None)
+                         for field_name in value.__class__._structure)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
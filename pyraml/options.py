@@ -0,0 +1,101 @@
+__author__ = 'ad'
+
+import threading
+import contextlib
+
+
+__all__ = ["ParseOptions", "current_options", "using_options"]
+
+
+# Options of the parse running in the current thread. Fields and models
+# are shared between threads, so per-parse settings can't be stored there.
+_state = threading.local()
+
+
+class ParseOptions(object):
+    """ Settings of a single :func:`pyraml.parser.parse` call.
+
+    Field projection: ``include`` and ``exclude`` are collections of RAML
+    field names (e.g. ``description``, ``example``, ``queryParameters``)
+    applied at every level of the document. Values of fields which are
+    not wanted are not converted and left None. Values of included fields
+    are converted whole, except excluded fields nested in them.
+    Resources and methods are always parsed.
+
+    Trusted input: with ``trusted`` values are only converted (models
+    instantiated, JSON and XML decoded), field validation is skipped.
+    """
+
+    def __init__(self, include=None, exclude=None, trusted=False):
+        """
+        :param include: if given, only these fields are converted
+        :type include: collection of str
+
+        :param exclude: fields which are never converted
+        :type exclude: collection of str
+
+        :param trusted: the document is known to be valid
+        :type trusted: bool
+        """
+        self.include = frozenset(include) if include is not None else None
+        self.exclude = frozenset(exclude or ())
+        self.trusted = trusted
+        # Schemas decoded by the parse, pyraml.schemas.SchemaRegistry
+        self.schemas = None
+        # Limits of the parse, pyraml.limits.ResourceGovernor or None
+        self.governor = None
+        # Number of included fields whose values are being converted
+        self._included_depth = 0
+
+    @property
+    def projected(self):
+        return self.include is not None or bool(self.exclude)
+
+    def wants(self, field_name):
+        """ Check whether value of field ``field_name`` should be converted
+
+        :rtype: bool
+        """
+        if field_name in self.exclude:
+            return False
+        return self.include is None or self._included_depth > 0 or \
+            field_name in self.include
+
+    def includes_whole(self, field_name):
+        """ Check whether value of field ``field_name`` is converted whole
+        (see :meth:`included`) because the field is included
+
+        :rtype: bool
+        """
+        return self.include is not None and self._included_depth == 0 and \
+            field_name in self.include and field_name not in self.exclude
+
+    @contextlib.contextmanager
+    def included(self):
+        """ Convert all fields nested in the value converted in the
+        ``with`` block, except excluded ones
+        """
+        self._included_depth += 1
+        try:
+            yield
+        finally:
+            self._included_depth -= 1
+
+
+def current_options():
+    """ Return options of the parse running in the current thread or None """
+    return getattr(_state, 'options', None)
+
+
+@contextlib.contextmanager
+def using_options(options):
+    """ Make ``options`` current for the duration of the ``with`` block
+
+    :type options: ParseOptions or None
+    """
+    previous = current_options()
+    _state.options = options
+    try:
+        yield options
+    finally:
+        _state.options = previous
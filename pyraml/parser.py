@@ -1,12 +1,10 @@
 __author__ = 'ad'
 
-import itertools
 import contextlib
-import mimetypes
+import mmap
 import os.path
-import codecs
-import yaml
-import json
+import errno
+import six
 try:
     from collections import OrderedDict
 except ImportError:
@@ -15,71 +13,181 @@ except ImportError:
 from .constants import RAML_VALID_PROTOCOLS
 
 from six.moves import urllib_parse as urlparse
-from six.moves import urllib_request as urllib2
-from six.moves import reduce
 
-from .raml_elements import ParserRamlInclude
+from . import RamlException, RamlNotFoundException, RamlParseException
+from .raml_elements import (
+    ParserRamlInclude, load_yaml, load_yaml_shallow, resolve_include)
+from .provenance import (
+    mark_included, copy_include_source, LazyValue, LazyIncludedText)
+from .options import ParseOptions, current_options, using_options
+from .archive import RamlArchive, split_archive_uri
+from .schemas import SchemaRegistry
+from .limits import (
+    RamlLimitException, RamlIncludeCycleException, ResourceGovernor,
+    current_governor)
+from .resolvers import (
+    IncludeResolver, ResolverRegistry, _guess_mime_type, _is_mime_type_raml)
+from .instrumentation import current_observer, timed, _clock
+from .model import iter_models
+from .fields import merge_sequence_of_maps
 from .entities import (
     RamlRoot, RamlResource, RamlMethod, RamlResourceType)
 from .constants import (
-    RAML_SUPPORTED_FORMAT_VERSION, RAML_CONTENT_MIME_TYPES,
-    HTTP_METHODS, HTTP_METHODS_OPTIONNAL)
+    RAML_SUPPORTED_FORMAT_VERSION, HTTP_METHODS, HTTP_METHODS_OPTIONNAL,
+    MMAP_THRESHOLD)
 
 
 __all__ = ["RamlException", "RamlNotFoundException", "RamlParseException",
            "ParseContext", "load", "parse"]
 
 
-class RamlException(Exception):
-    pass
-
-
-class RamlNotFoundException(RamlException):
-    pass
-
-
-class RamlParseException(RamlException):
-    pass
+class ParseContext(object):
+    def __init__(self, data, relative_path, resolvers=None, include_chain=()):
+        """
+        :param data: loaded document
+        :param relative_path: location includes are relative to: local
+            directory, URL or location served by one of ``resolvers``
+        :type relative_path: str
 
+        :param resolvers: resolvers of included resources
+        :type resolvers: pyraml.resolvers.ResolverRegistry
 
-class ParseContext(object):
-    def __init__(self, data, relative_path):
+        :param include_chain: locations of included documents the
+            document has been included through, outermost first
+        :type include_chain: tuple of str
+        """
         self.data = data
         self.relative_path = relative_path
+        self.resolvers = resolvers
+        self.include_chain = include_chain
 
     def _handle_load(self, data):
         """ Handle loading of included resources from ``data``.
 
+        Documents loaded by :func:`parse` have their includes resolved
+        already, this is needed only for data which contains
+        :class:`pyraml.raml_elements.ParserRamlInclude` objects.
+
         ``data`` can be of type:
-            ParserRamlInclude:
-                YAML/RAML resource: load its resources recursively
-                Any other type: return value as a string
+            ParserRamlInclude: load included resource
             dict: load values
             list: load items
 
         Otherwise return value as is.
         """
         if isinstance(data, ParserRamlInclude):
-            file_content, file_type = self._load_resource(data.file_name)
-
-            if _is_mime_type_raml(file_type):
-                new_relative_path = _calculate_new_relative_path(
-                    self.relative_path, data.file_name)
-                _included_ctx = ParseContext(
-                    yaml.safe_load(file_content),
-                    new_relative_path)
-                return _included_ctx._handle_load(_included_ctx.data)
-            return file_content
-        if isinstance(data, dict):
-            new_data = OrderedDict(((key, self._handle_load(val)) for key, val in data.items()))
-            return new_data
-        if isinstance(data, list):
-            return [self._handle_load(x) for x in data]
-        return data
+            return self.include(data.file_name)
+
+        # Values shared by many containers are copied for each of them,
+        # so copies are counted as nodes
+        governor = current_governor()
+
+        # Containers are copied with an explicit stack, copies are put in
+        # place first and filled when their entry is popped
+        holder = [data]
+        stack = [(holder, holder, [0])]
+        while stack:
+            source, target, keys = stack.pop()
+            if governor is not None:
+                governor.count_nodes(len(target))
+            for key in keys:
+                value = source[key]
+                if isinstance(value, ParserRamlInclude):
+                    value = self.include(value.file_name)
+                elif isinstance(value, dict):
+                    copy = OrderedDict((k, None) for k in value)
+                    stack.append((value, copy, list(value)))
+                    value = copy
+                elif isinstance(value, list):
+                    copy = [None] * len(value)
+                    stack.append((value, copy, range(len(value))))
+                    value = copy
+                target[key] = value
+        return holder[0]
 
     def preload_included_resources(self):
         self.data = self._handle_load(self.data)
 
+    def include(self, file_name):
+        """ Load resource included as ``file_name`` resolving all its
+        nested includes, see :meth:`load_include`.
+
+        :param file_name: name of file to include
+        :type file_name: str
+        """
+        return resolve_include(self.load_include, file_name)
+
+    def load_include(self, file_name):
+        """ Load resource included as ``file_name``.
+
+        YAML/RAML resource: load it leaving its own includes pending,
+            they are resolved relative to its location
+        Already loaded data (see :class:`pyraml.resolvers.MemoryResolver`):
+            return its copy with includes resolved
+        Any other type: return its content as a string
+
+        :param file_name: name of file to include
+        :type file_name: str
+
+        :return: 2 elements tuple: loaded value and list of
+            :class:`pyraml.raml_elements.PendingInclude` in it
+
+        :raise pyraml.limits.RamlIncludeCycleException: if the resource
+            includes itself
+        :raise pyraml.limits.RamlLimitException: if the parse exceeds its
+            limits
+        """
+        resolver, location = self._find_resolver(file_name)
+        include_chain = self.include_chain + (location,)
+        if location in self.include_chain:
+            raise RamlIncludeCycleException(
+                include_chain[self.include_chain.index(location):])
+        governor = current_governor()
+        if governor is not None:
+            governor.count_include(location, len(include_chain))
+        file_content, file_type = self._load_resource(resolver, location)
+
+        if file_type is None:
+            included_ctx = ParseContext(
+                None, resolver.dirname(location), self.resolvers,
+                include_chain)
+            return mark_included(
+                included_ctx._handle_load(file_content), location), []
+
+        if not _is_mime_type_raml(file_type):
+            return mark_included(file_content, location), []
+
+        included_ctx = ParseContext(
+            None, resolver.dirname(location), self.resolvers, include_chain)
+        try:
+            data, pending = load_yaml_shallow(
+                file_content, included_ctx.load_include, _include_filter(),
+                governor)
+        finally:
+            # Loaded value doesn't refer to the content
+            if isinstance(file_content, mmap.mmap):
+                file_content.close()
+        included_ctx.data = marked = mark_included(data, location)
+        if marked is not data:
+            # Included sequence has been replaced with IncludedList
+            for include in pending:
+                include.relocate(data, marked)
+        return marked, pending
+
+    def _find_resolver(self, file_name):
+        """ Find resolver of resource included as ``file_name``
+
+        :return: 2 elements tuple: resolver and location of the resource
+        """
+        # Filename is a complete location (http://example.com/foo.raml)
+        resolver = _find_resolver(self.resolvers, file_name, None)
+        if resolver is not None:
+            return resolver, file_name
+        # Filename relative to self location
+        resolver = _find_resolver(
+            self.resolvers, self.relative_path, LOCAL_FILES)
+        return resolver, resolver.join(self.relative_path, file_name)
+
     def get(self, property_name):
         """
         Extract property with name `property_name` from context
@@ -95,64 +203,233 @@ class ParseContext(object):
         if self.data is None:
             return None
         property_value = self.data.get(property_name)
+        if isinstance(property_value, LazyValue):
+            property_value = property_value.read()
         return property_value
 
     def __iter__(self):
         return iter(self.data)
 
+    def __contains__(self, property_name):
+        return self.data is not None and property_name in self.data
+
     def get_property_with_schema(self, property_name, property_schema):
+        options = current_options()
+        if not options.wants(property_name):
+            return None
+        if options.includes_whole(property_name):
+            with options.included():
+                return self._convert(property_name, property_schema, options)
+        return self._convert(property_name, property_schema, options)
+
+    def _convert(self, property_name, property_schema, options):
         property_value = self.get(property_name)
+        if options.trusted:
+            return property_schema.trusted_to_python(property_value)
         return property_schema.to_python(property_value)
 
-    def _load_resource(self, file_name):
+    def _load_resource(self, resolver, location):
         """
-        Load RAML include from file_name.
-        :param file_name: name of file to include
-        :type file_name: str
+        Load RAML include from ``location``, count its size to limits of
+        the parse and report it to the current observer, if any.
+
+        :type resolver: pyraml.resolvers.IncludeResolver
+        :type location: str
 
         :return: 2 elements tuple: file content and file type
         :rtype: str,str
         """
-        # Filename is a complete URI (http://example.com/foo.raml)
-        if _is_network_resource(file_name):
-            return _load_network_resource(file_name)
-        # Filename relative to self network path
-        elif _is_network_resource(self.relative_path):
-            url = urlparse.urljoin(self.relative_path, file_name)
-            return _load_network_resource(url)
-        # Filename relative to self filename path
-        else:
-            full_path = os.path.join(self.relative_path, file_name)
-            return _load_local_file(full_path)
+        observer = current_observer()
+        governor = current_governor()
+        if observer is None and governor is None:
+            return resolver.fetch(location)
+
+        if observer is not None:
+            observer.on_fetch(location)
+        start = _clock()
+        file_content, file_type = resolver.fetch(location)
+        try:
+            size = len(file_content) if file_type is not None else 0
+            if governor is not None:
+                governor.count_bytes(size, location)
+            if observer is not None:
+                observer.on_include(location, size, _clock() - start)
+        except BaseException:
+            # Mapping is closed by load_include only if it's returned
+            if isinstance(file_content, mmap.mmap):
+                file_content.close()
+            raise
+        return file_content, file_type
+
+
+class LocalFileResolver(IncludeResolver):
+    """ Resolver of local files, see :func:`_load_local_file` """
+
+    def join(self, base, file_name):
+        # Normalized, so include cycles through ``..`` are detected
+        return os.path.normpath(os.path.join(base, file_name))
+
+    def dirname(self, location):
+        return os.path.dirname(location)
 
+    def fetch(self, location):
+        return _load_local_file(location)
 
-def load(uri):
+
+class NetworkResolver(IncludeResolver):
+    """ Resolver of ``http://`` and ``https://`` URLs """
+
+    def join(self, base, file_name):
+        return urlparse.urljoin(base, file_name)
+
+    def dirname(self, location):
+        return _build_network_relative_path(location)
+
+    def fetch(self, location):
+        return _load_network_resource(location)
+
+
+LOCAL_FILES = LocalFileResolver()
+NETWORK = NetworkResolver()
+
+
+def _find_resolver(resolvers, location, default):
+    """ Return resolver serving ``location``: registered in ``resolvers``,
+    :data:`NETWORK` for URLs or ``default``
+    """
+    if resolvers is not None:
+        resolver = resolvers.find(location)
+        if resolver is not None:
+            return resolver
+    if _is_network_resource(location):
+        return NETWORK
+    return default
+
+
+def load(uri, include=None, exclude=None, trusted=False, resolvers=None,
+         limits=None):
     """
     Load and parse RAML file
 
     :param uri: URL which points to a RAML resource or path to the RAML
-        resource on local file system
+        resource on local file system. RAML resources packed in zip or
+        tar archives are given as ``path/to/archive.zip!/api.raml``,
+        see :class:`pyraml.archive.RamlArchive`
     :type uri: str
 
+    :param include: if given, only fields with these RAML names are
+        parsed, see :func:`parse`
+    :type include: collection of str
+
+    :param exclude: RAML names of fields which are not parsed
+    :type exclude: collection of str
+
+    :param trusted: skip validation of fields, see :func:`parse`
+    :type trusted: bool
+
+    :param resolvers: resolvers of included resources, see :func:`parse`.
+        ``uri`` itself is loaded by one of them if it matches its prefix
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+
+    :param limits: limits of the parse, see :func:`parse`. Local and
+        network documents larger than ``max_bytes`` are not read.
+    :type limits: pyraml.limits.ParseLimits
+
     :return: RamlRoot object
     :rtype: pyraml.entities.RamlRoot
     """
+    resolvers = _resolver_registry(resolvers)
+
+    archive_uri = None if _is_network_resource(uri) else \
+        split_archive_uri(uri)
+    if archive_uri is not None:
+        archive_path, member = archive_uri
+        with RamlArchive(archive_path) as archive:
+            return parse_archive_member(
+                archive, member, include=include, exclude=exclude,
+                trusted=trusted, resolvers=resolvers, limits=limits)
+
+    observer = current_observer()
+    start = _clock() if observer is not None else None
 
+    c, relative_path = _fetch_document(uri, resolvers, limits)
+    if not isinstance(c, (six.binary_type, six.text_type)):
+        raise RamlParseException(
+            "{0} is loaded data, not a RAML document".format(uri))
+
+    if observer is not None:
+        observer.on_phase('read', _clock() - start,
+                          {'path': uri, 'size': len(c)})
+
+    return parse(c, relative_path, include=include, exclude=exclude,
+                 trusted=trusted, resolvers=resolvers, limits=limits)
+
+
+def _fetch_document(uri, resolvers=None, limits=None):
+    """
+    Fetch document ``uri`` (not in an archive) by a resolver of
+    ``resolvers``, from network or from local file system
+
+    :type resolvers: pyraml.resolvers.ResolverRegistry
+
+    :return: 2 elements tuple: document content and location its includes
+        are relative to. Content is str or bytes, or already loaded YAML
+        data (see :class:`pyraml.resolvers.MemoryResolver`).
+    """
+    resolver = _find_resolver(resolvers, uri, None) \
+        if resolvers is not None else None
+    if resolver is not None and resolver is not NETWORK:
+        c, _ = resolver.fetch(uri)
+        if isinstance(c, LazyValue):
+            c = c.read()
+        return c, resolver.dirname(uri)
     if _is_network_resource(uri):
-        relative_path = _build_network_relative_path(uri)
-        c, _ = _load_network_resource(uri)
-    else:
-        relative_path = os.path.dirname(uri)
-        c, _ = _load_local_file(uri)
+        c, _ = _load_network_resource(uri, limits)
+        return c, _build_network_relative_path(uri)
+    return _read_local_file(uri, limits), os.path.dirname(uri)
+
+
+def parse_archive_member(archive, name, include=None, exclude=None,
+                         trusted=False, resolvers=None, limits=None):
+    """
+    Load and parse RAML member ``name`` of ``archive``, see :func:`load`
+
+    :type archive: pyraml.archive.RamlArchive
+
+    :param name: member name
+    :type name: str
+
+    :rtype: pyraml.entities.RamlRoot
+    """
+    observer = current_observer()
+    start = _clock() if observer is not None else None
 
-    return parse(c, relative_path)
+    location = archive.location(name)
+    if limits is not None:
+        limits.check_bytes(archive.size(name), location)
+    c = archive.read(name)
+
+    if observer is not None:
+        observer.on_phase('read', _clock() - start,
+                          {'path': location, 'size': len(c)})
+
+    # Includes of members are resolved inside the archive
+    resolvers = ResolverRegistry(resolvers)
+    resolvers.register(archive.prefix, archive)
+    return parse(c, archive.dirname(location), include=include,
+                 exclude=exclude, trusted=trusted, resolvers=resolvers,
+                 limits=limits)
 
 
 def parse_protocols(ctx, base_uri=None):
     """ Parse ``protocols`` from a root context.
 
-    If protocols are not provided in root, use baseUri protocol.
+    If protocols are not provided in root, use baseUri protocol unless
+    they are left out by projection of the parse.
     """
+    options = current_options()
+    if options is not None and not options.wants('protocols'):
+        return None
     protocols = ctx.get_property_with_schema(
         'protocols', RamlRoot.protocols)
     if protocols is None and base_uri is not None:
@@ -162,21 +439,89 @@ def parse_protocols(ctx, base_uri=None):
     return protocols
 
 
-def parse(c, relative_path):
+def parse(c, relative_path, include=None, exclude=None, trusted=False,
+          resolvers=None, limits=None):
     """
     Parse RAML file
 
+    Parsing can be narrowed to fields of interest with ``include`` or
+    ``exclude``, applied to fields of every entity in the document
+    (e.g. ``exclude=['example', 'schema']``). Fields left out are None
+    and resources included under them are not fetched. Included fields
+    are parsed whole, less excluded fields nested in them. Resources and
+    their methods are always parsed.
+
+    Documents known to be valid (e.g. checked in CI) can be parsed with
+    ``trusted=True``: values are converted without validating them, so
+    invalid documents may give incomplete trees instead of errors.
+
+    Included resources are loaded from local files and ``http(s)://``
+    URLs. Other sources are served by ``resolvers`` selected by location
+    prefix, e.g. ``{'mem://': MemoryResolver({...})}`` (see
+    :mod:`pyraml.resolvers`).
+
+    Documents of untrusted origin should be parsed with ``limits`` on
+    their size, includes and parse time (see
+    :class:`pyraml.limits.ParseLimits`). Include cycles are rejected
+    with or without limits.
+
+    Include chains and nested resources are not limited by the recursion
+    limit, but a single document is: its nodes can be nested a few
+    hundred levels deep only.
+
     :param c: file content
-    :type c: str
+    :type c: str or bytes
+
+    :param include: if given, only fields with these RAML names are parsed
+    :type include: collection of str
+
+    :param exclude: RAML names of fields which are not parsed
+    :type exclude: collection of str
+
+    :param trusted: skip validation of fields
+    :type trusted: bool
+
+    :param resolvers: location prefixes mapped to resolvers of included
+        resources
+    :type resolvers: dict or pyraml.resolvers.ResolverRegistry
+
+    :param limits: limits of the parse
+    :type limits: pyraml.limits.ParseLimits
     :return:
+
+    :raise pyraml.limits.RamlLimitException: if the parse exceeds
+        ``limits``
+    :raise pyraml.RamlParseException: if a document is nested too deeply
     """
+    options = ParseOptions(include=include, exclude=exclude, trusted=trusted)
+    if limits is not None:
+        options.governor = ResourceGovernor(limits)
+    with using_options(options):
+        return _parse(c, relative_path, _resolver_registry(resolvers))
+
+
+def _resolver_registry(resolvers):
+    if resolvers is None or isinstance(resolvers, ResolverRegistry):
+        return resolvers
+    return ResolverRegistry(resolvers)
+
+
+def _parse(c, relative_path, resolvers=None):
 
     # Read RAML header
-    first_line, c = c.split('\n', 1)
+    if isinstance(c, six.binary_type):
+        first_line, c = c.split(b'\n', 1)
+        first_line = first_line.decode('utf-8')
+    else:
+        first_line, c = c.split('\n', 1)
     raml_version = _validate_raml_header(first_line)
 
-    context = ParseContext(yaml.safe_load(c), relative_path)
-    context.preload_included_resources()
+    governor = current_governor()
+    if governor is not None:
+        governor.count_bytes(len(first_line) + len(c) + 1, relative_path)
+
+    context = ParseContext(None, relative_path, resolvers)
+    context.data = _yaml_load(c, context)
 
     root = RamlRoot(raml_version=raml_version)
     root.title = context.get_property_with_schema(
@@ -188,8 +533,11 @@ def parse(c, relative_path):
         'version', RamlRoot.version)
     root.mediaType = context.get_property_with_schema(
         'mediaType', RamlRoot.mediaType)
+    # Schemas of bodies are resolved by name and decoded once
+    schemas = current_options().schemas = SchemaRegistry()
     root.schemas = context.get_property_with_schema(
         'schemas', RamlRoot.schemas)
+    schemas.declare(root.schemas)
     root.baseUriParameters = context.get_property_with_schema(
         "baseUriParameters", RamlRoot.baseUriParameters)
     root.documentation = context.get_property_with_schema(
@@ -211,28 +559,88 @@ def parse(c, relative_path):
     if resources:
         root.resources = resources
 
+    observer = current_observer()
+    if observer is not None:
+        observer.on_models(_count_models(root))
+
     return root
 
 
-def parse_resource_methods(resource_ctx):
-    """ Parse existing HTTP_METHODS and HTTP_METHODS_OPTIONNAL from a resource_ctx. """
-    methods = OrderedDict()
-    for _http_method_key_item in HTTP_METHODS.union(HTTP_METHODS_OPTIONNAL):
+@timed('yaml_load')
+def _yaml_load(c, context):
+    """ Load YAML document resolving its includes relative to ``context`` """
+    return load_yaml(c, context.load_include, _include_filter(),
+                     current_governor())
+
+
+def _include_filter():
+    """ Return predicate telling whether includes under a mapping key are
+    needed by the current parse, or None if all of them are.
+    """
+    options = current_options()
+    if options is None or not options.projected:
+        return None
+
+    def is_wanted(key):
+        if not isinstance(key, six.string_types) or key.startswith('/') \
+                or key in _METHOD_KEYS:
+            # Resources and methods are always parsed
+            return True
+        return options.wants(key)
+    return is_wanted
+
+
+def _count_models(root):
+    """ Count models of the parsed tree per entity class name """
+    counts = {}
+    for model in iter_models(root):
+        class_name = model.__class__.__name__
+        counts[class_name] = counts.get(class_name, 0) + 1
+    return counts
+
+
+# Method key of a resource -> (HTTP method, whether it is optional)
+_METHOD_KEYS = dict(
+    [(key, (key, False)) for key in HTTP_METHODS] +
+    [(key, (key.rstrip('?'), True)) for key in HTTP_METHODS_OPTIONNAL])
+
+
+def _classify_keys(data):
+    """ Sort keys of a resource node in a single pass.
+
+    :return: 2 elements tuple: method keys and nested resource names, in
+        document order
+    """
+    method_keys = []
+    nested_names = []
+    for key in data or ():
+        if key in _METHOD_KEYS:
+            method_keys.append(key)
+        elif isinstance(key, six.string_types) and key.startswith('/'):
+            nested_names.append(key)
+    return method_keys, nested_names
 
-        methodSplit = _http_method_key_item.split("?")
-        _http_method = methodSplit[0]
-        methodIsOptional = False
-        if len(methodSplit) > 1:
-            methodIsOptional = True
 
-        if _http_method_key_item not in resource_ctx:
-            continue
+def parse_resource_methods(resource_ctx, method_keys=None):
+    """ Parse existing HTTP_METHODS and HTTP_METHODS_OPTIONNAL from a resource_ctx.
+
+    :param method_keys: method keys of the resource if they are known
+        already, see :func:`_classify_keys`
+    """
+    if method_keys is None:
+        method_keys, _ = _classify_keys(resource_ctx.data)
+
+    methods = OrderedDict()
+    for _http_method_key_item in method_keys:
+        _http_method, methodIsOptional = _METHOD_KEYS[_http_method_key_item]
         _method = resource_ctx.get(_http_method_key_item)
 
         if _method:
-            _method['isOptional'] = methodIsOptional
-            methods[_http_method] = parse_method(
+            # Raw data is not changed, it may be shared through YAML aliases
+            method = parse_method(
                 ParseContext(_method, resource_ctx.relative_path))
+            method.isOptional = methodIsOptional
+            methods[_http_method] = method
         else:
             methods[_http_method] = RamlMethod(notNull=True, isOptional=methodIsOptional)
 
@@ -247,6 +655,9 @@ def parse_resource(ctx, property_name, parent_object):
     parsing requires additional actions to decide what to parse/not
     parse (when parsing methods).
 
+    Nested resources are parsed depth-first with an explicit stack, so
+    depth of the resources tree is not limited by the recursion limit.
+
     :param ctx:
     :type ctx: ParseContext
 
@@ -259,11 +670,41 @@ def parse_resource(ctx, property_name, parent_object):
     :return: RamlResource  or None
     :rtype: RamlResource
     """
+    holder = {}
+    # (context of parent, resource name, parent, resources of parent)
+    stack = [(ctx, property_name, parent_object, holder)]
+    while stack:
+        parent_ctx, name, parent, resources = stack.pop()
+        resource, resource_ctx, nested_names = _parse_resource_node(
+            parent_ctx, name, parent)
+        resources[name] = resource
+        if nested_names:
+            # Keep document order, values are filled when popped
+            nested = OrderedDict((n, None) for n in nested_names)
+            resource.resources = nested
+            stack.extend((resource_ctx, n, resource, nested)
+                         for n in reversed(nested_names))
+    return holder[property_name]
+
+
+@timed('parse_resource',
+       lambda ctx, property_name, parent_object: {'name': property_name})
+def _parse_resource_node(ctx, property_name, parent_object):
+    """ Parse resource ``property_name`` of ``ctx`` except its nested
+    resources.
+
+    :return: 3 elements tuple: RamlResource or None, its ParseContext
+        and names of its nested resources
+    """
     property_value = ctx.get(property_name)
     if not property_value:
-        return None
+        return None, None, []
 
-    resource = RamlResource()
+    governor = current_governor()
+    if governor is not None:
+        governor.check_time()
+
+    resource = copy_include_source(property_value, RamlResource())
     resource_ctx = ParseContext(property_value, ctx.relative_path)
     resource.description = resource_ctx.get_property_with_schema(
         "description", RamlResource.description)
@@ -280,23 +721,17 @@ def parse_resource(ctx, property_name, parent_object):
     resource.securedBy = resource_ctx.get_property_with_schema(
         'securedBy', RamlResource.securedBy)
 
+    # Keys are looked at once to find methods and nested resources
+    method_keys, nested_names = _classify_keys(property_value)
+
     # Parse methods
-    methods = parse_resource_methods(resource_ctx)
+    methods = parse_resource_methods(resource_ctx, method_keys)
     if methods:
         resource.methods = methods
 
-    # Parse resources
-    resources = OrderedDict()
-    for property_name in resource_ctx.__iter__():
-        if property_name.startswith("/"):
-            resources[property_name] = parse_resource(
-                resource_ctx, property_name, resource)
-
-    if resources:
-        resource.resources = resources
     if isinstance(parent_object, RamlResource):
         resource.parentResource = parent_object
-    return resource
+    return resource, resource_ctx, nested_names
 
 
 def parse_resource_types(ctx):
@@ -313,25 +748,28 @@ def parse_resource_types(ctx):
     :rtype: RamlResource
     """
 
+    options = current_options()
+    if options is not None and not options.wants('resourceTypes'):
+        return None
+
     resource_types = ctx.get('resourceTypes')
     if not resource_types:
         return None
 
     if isinstance(resource_types, ParseContext):
         resource_types = resource_types.data
-    resource_types = reduce(
-        lambda x, y: dict(itertools.chain(x.items(), y.items())),
-        resource_types)
+    resource_types = merge_sequence_of_maps(resource_types)
 
     resource_types_context = ParseContext(resource_types, ctx.relative_path)
-    resource_types = {}
+    resource_types = OrderedDict()
 
     for rtype_name in resource_types_context:
         rtype_ctx = ParseContext(
             resource_types_context.get(rtype_name),
             resource_types_context.relative_path)
 
-        rtype_obj = RamlResourceType()
+        rtype_obj = copy_include_source(
+            rtype_ctx.data, RamlResourceType())
         rtype_obj.description = rtype_ctx.get_property_with_schema(
             "description", RamlResourceType.description)
         rtype_obj.usage = rtype_ctx.get_property_with_schema(
@@ -372,6 +810,7 @@ def parse_method_responses(ctx):
         return responses
 
 
+@timed('parse_method')
 def parse_method(ctx):
     """ Parse RAML resource method.
 
@@ -388,7 +827,7 @@ def parse_method(ctx):
     :rtype: RamlMethod
     """
 
-    method = RamlMethod()
+    method = copy_include_source(ctx.data, RamlMethod())
     method.description = ctx.get_property_with_schema(
         "description", RamlMethod.description)
     method.body = ctx.get_property_with_schema("body", RamlMethod.body)
@@ -415,6 +854,7 @@ def parse_method(ctx):
     return method
 
 
+@timed('header')
 def _validate_raml_header(line):
     """
     Parse header of RAML file and ensure than we can work with it
@@ -449,10 +889,6 @@ def _validate_raml_header(line):
         raise RamlParseException("Invalid RAML format version", header_tuple[1])
 
 
-def _is_mime_type_raml(mime_type):
-    return mime_type.lower() in RAML_CONTENT_MIME_TYPES
-
-
 def _is_mime_type_json(mime_type):
     return mime_type.lower() == "application/json"
 
@@ -475,31 +911,97 @@ def _build_network_relative_path(url):
     return urlparse.urlunparse(parse_result)
 
 
-def _calculate_new_relative_path(base, uri):
-    if _is_network_resource(base):
-        return _build_network_relative_path(urlparse.urljoin(base, uri))
-    else:
-        return os.path.dirname(os.path.join(base, uri))
+def _load_local_file(full_path):
+    """
+    Load included file from local file system.
 
+    RAML/YAML files are returned as bytes (memory-mapped if large, to be
+    closed by the caller) which can be handed to the YAML loader directly.
+    Any other file is returned as
+    :class:`pyraml.provenance.LazyIncludedText` handle read on first
+    access.
 
-def _load_local_file(full_path):
-    # include locates at local file system
-    if not os.path.exists(full_path):
-        raise RamlNotFoundException("No such file {0} found".format(full_path))
+    :return: 2 elements tuple: file content and file type
+    :rtype: tuple
+    """
+    size = _local_file_size(full_path)
 
     # Detect file type... we should able to parse raml, yaml, json, xml and read
     # all other content types as plain files
-    mime_type = mimetypes.guess_type(full_path)[0]
-    if mime_type is None:
-        mime_type = "text/plain"
-
-    with contextlib.closing(codecs.open(full_path, 'r', 'utf-8')) as f:
+    mime_type = _guess_mime_type(full_path)
+    if not _is_mime_type_raml(mime_type):
+        return LazyIncludedText(full_path, size), mime_type
+
+    with open(full_path, 'rb') as f:
+        if size and size >= MMAP_THRESHOLD:
+            # PyYAML reads file-like objects by chunks, so the file
+            # is never copied into memory as a whole
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), mime_type
         return f.read(), mime_type
 
 
-def _load_network_resource(url):
-    with contextlib.closing(urllib2.urlopen(url, timeout=60.0)) as f:
+def _read_local_file(full_path, limits=None):
+    """ Read a whole local file as bytes, if it's within ``limits`` """
+    size = _local_file_size(full_path)
+    if limits is not None:
+        limits.check_bytes(size, full_path)
+    with open(full_path, 'rb') as f:
+        return f.read()
+
+
+def _local_file_size(full_path):
+    try:
+        return os.stat(full_path).st_size
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise RamlNotFoundException(
+                "No such file {0} found".format(full_path))
+        raise
+
+
+def _load_network_resource(url, limits=None):
+    """
+    Load resource at ``url``. Size and download time are bounded by
+    ``limits`` or, if not given, by limits of the current parse.
+
+    :type limits: pyraml.limits.ParseLimits
+    """
+    from six.moves import urllib_request as urllib2
+    max_bytes, timeout = _network_budget(limits)
+    with contextlib.closing(urllib2.urlopen(url, timeout=timeout)) as f:
         # We fully rely of mime type to remote server b/c according
         # of specs it MUST support RAML mime
         mime_type = f.headers.get('Content-Type')
-        return f.read(), mime_type
+        if max_bytes is None:
+            return f.read(), mime_type
+        content_length = f.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and \
+                int(content_length) > max_bytes:
+            content = None
+        else:
+            # Never read more than one byte beyond the budget
+            content = f.read(max_bytes + 1)
+        if content is None or len(content) > max_bytes:
+            raise RamlLimitException(
+                "{0} is larger than {1} bytes left to load".format(
+                    url, max_bytes), 'max_bytes')
+        return content, mime_type
+
+
+def _network_budget(limits):
+    """ Return 2 elements tuple: maximal size of a network resource or
+    None, and timeout of its download
+    """
+    timeout = 60.0
+    if limits is not None:
+        if limits.max_seconds is not None:
+            timeout = min(timeout, limits.max_seconds)
+        return limits.max_bytes, timeout
+    governor = current_governor()
+    if governor is None:
+        return None, timeout
+    remaining = governor.remaining_seconds()
+    if remaining is not None:
+        # urlopen treats zero timeout as non-blocking
+        timeout = max(min(timeout, remaining), 0.001)
+    return governor.remaining_bytes(), timeout
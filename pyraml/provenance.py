@@ -0,0 +1,153 @@
+__author__ = 'ad'
+
+import six
+
+
+__all__ = ["IncludedText", "IncludedList", "LazyValue", "DeferredInclude",
+           "LazyIncludedText", "mark_included", "include_source",
+           "copy_include_source"]
+
+
+class IncludedText(six.text_type):
+    """ Content of an included non-RAML resource.
+
+    Behaves like a regular string but remembers the location it was
+    loaded from in ``_include_source``.
+    """
+    _include_source = None
+
+
+class IncludedList(list):
+    """ Sequence loaded from an included RAML resource. """
+    _include_source = None
+
+
+def mark_included(value, source):
+    """ Remember that ``value`` was loaded from an included resource
+    located at ``source``.
+
+    Strings and lists are replaced with :class:`IncludedText` and
+    :class:`IncludedList`, mappings are marked in place. Values which
+    can't hold the mark (numbers, booleans, null) are returned as is.
+
+    :param value: loaded value
+    :param source: path or URL of included resource
+    :type source: str
+
+    :return: marked value
+    """
+    if isinstance(value, six.binary_type):
+        value = value.decode('utf-8')
+    if isinstance(value, six.text_type):
+        value = IncludedText(value)
+    elif isinstance(value, list):
+        value = IncludedList(value)
+    elif not isinstance(value, dict):
+        return value
+    value._include_source = source
+    return value
+
+
+def include_source(value):
+    """ Return location of included resource ``value`` was loaded from
+    or None if ``value`` comes from the document itself.
+    """
+    return getattr(value, '_include_source', None)
+
+
+def copy_include_source(raw_value, value):
+    """ Propagate include location of ``raw_value`` to its converted
+    representation ``value``, if ``value`` is able to hold it and has
+    no include location on its own.
+
+    :return: ``value``
+    """
+    source = getattr(raw_value, '_include_source', None)
+    if source is not None and include_source(value) is None:
+        try:
+            value._include_source = source
+        except AttributeError:
+            # Converted to type which has no instance attributes,
+            # e.g. XML element
+            pass
+    return value
+
+
+class LazyValue(object):
+    """ Base class of placeholders for values loaded on first access.
+
+    Placeholders are realized by :meth:`read` when a field converts the
+    value (see :meth:`pyraml.fields.BaseField.check_default_value`) or
+    when the parser gets it from a ParseContext.
+    """
+    __slots__ = ()
+
+    def read(self):
+        raise NotImplementedError
+
+
+class DeferredInclude(LazyValue):
+    """ ``!include`` which is resolved only if its value is used, e.g.
+    include under a field excluded from parsing.
+    """
+    __slots__ = ('include_handler', 'file_name', '_value', '_loaded')
+
+    def __init__(self, include_handler, file_name):
+        """
+        :param include_handler: callable resolving ``file_name``
+        :param file_name: name of included file
+        :type file_name: str
+        """
+        self.include_handler = include_handler
+        self.file_name = file_name
+        self._value = None
+        self._loaded = False
+
+    def read(self):
+        if not self._loaded:
+            self._value = self.include_handler(self.file_name)
+            self._loaded = True
+        return self._value
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.file_name)
+
+
+@six.python_2_unicode_compatible
+class LazyIncludedText(LazyValue):
+    """ Handle of an included non-RAML local file.
+
+    The file is read only when a field actually consumes the value
+    (see :meth:`pyraml.fields.BaseField.check_default_value`), so large
+    examples and schemas which are never converted are never copied into
+    memory.
+    """
+    __slots__ = ('path', 'size', '_text')
+
+    def __init__(self, path, size):
+        """
+        :param path: path to the included file
+        :type path: str
+
+        :param size: size of the file in bytes
+        :type size: int
+        """
+        self.path = path
+        self.size = size
+        self._text = None
+
+    def read(self):
+        """ Read and return content of the file as :class:`IncludedText` """
+        if self._text is None:
+            with open(self.path, 'rb') as f:
+                self._text = mark_included(f.read(), self.path)
+        return self._text
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return self.read()
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.path)
@@ -1,7 +1,10 @@
 __author__ = 'ad'
 
+import functools
+
 import yaml
-from . import ValidationError
+from . import ValidationError, RamlParseException
+from .provenance import DeferredInclude
 
 try:
     from collections import OrderedDict
@@ -9,9 +12,15 @@ except ImportError:
     # For python 2.6 additional package ordereddict should be installed
     from ordereddict import OrderedDict
 
+try:
+    RecursionError
+except NameError:
+    # Python 2 raises RuntimeError on exceeding the recursion limit
+    RecursionError = RuntimeError
+
 
-class ParserRamlInclude(yaml.YAMLObject):
-    """Teach PyYAML about the `!include` tag
+class ParserRamlInclude(object):
+    """Value of an `!include` tag
 
     Usage in .yaml:
         test: !include foo.yml
@@ -21,13 +30,12 @@ class ParserRamlInclude(yaml.YAMLObject):
     If the contents of the foo.yml file are:
         foo: bar
 
-    This class will be found by PyYAML with inspection magic, because it
-    extends the yaml.YAMLObject class.
+    The tag is known to :class:`RamlLoader` only: PyYAML loaders, e.g.
+    ``yaml.SafeLoader``, are shared by the whole process and are not
+    changed by pyraml.
     """
 
     yaml_tag = u'!include'
-    # we're using SafeLoader, this class needs to be explicitly allowed
-    yaml_loader = yaml.SafeLoader
 
     def __init__(self, file_name):
         self.file_name = file_name
@@ -51,15 +59,14 @@ class UniqueOrderedDict(OrderedDict):
             raise ValidationError("Property already used: {0}".format(key))
         super(UniqueOrderedDict, self).__setitem__(key, value)
 
-class ParserRamlDict(yaml.YAMLObject, UniqueOrderedDict):
-    """Teach PyYAML to preserve dict (map) key order
+class ParserRamlDict(UniqueOrderedDict):
+    """Ordered dict (map) with unique key values
 
-    Uses OrderedDict with unique key values to preserve order.
+    Mappings are loaded as :class:`UniqueOrderedDict` by
+    :class:`RamlLoader`, this class is kept for compatibility.
     """
 
     yaml_tag = yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG
-    # we're using SafeLoader, this class needs to be explicitly allowed
-    yaml_loader = yaml.SafeLoader
 
     @classmethod
     def from_yaml(cls, loader, node):
@@ -69,3 +76,233 @@ class ParserRamlDict(yaml.YAMLObject, UniqueOrderedDict):
     @classmethod
     def to_yaml(cls, dumper, data):
         return dumper.represent_dict(data.iteritems())
+
+
+class PendingInclude(object):
+    """ ``!include`` tag of a loaded document which is not resolved yet.
+
+    Remembers every place the tag's value has to be put to: the tag may
+    be referenced by YAML aliases.
+    """
+    __slots__ = ('file_name', 'include_handler', 'locations')
+
+    def __init__(self, file_name, include_handler):
+        self.file_name = file_name
+        self.include_handler = include_handler
+        # list of (container, key or index)
+        self.locations = []
+
+    def resolve(self, value):
+        """ Put ``value`` to all places of the tag """
+        for container, key in self.locations:
+            if isinstance(container, OrderedDict):
+                # Bypass duplicated keys check of UniqueOrderedDict
+                OrderedDict.__setitem__(container, key, value)
+            else:
+                container[key] = value
+
+    def relocate(self, old_container, new_container):
+        """ Update places after ``old_container`` has been replaced """
+        self.locations = [
+            (new_container if container is old_container else container, key)
+            for container, key in self.locations]
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.file_name)
+
+
+class RamlLoader(yaml.SafeLoader):
+    """ SafeLoader used to load RAML documents.
+
+    Preserves order of mappings and rejects duplicated keys. When
+    ``include_handler`` is given, ``!include`` tags are loaded as
+    :class:`PendingInclude` collected in ``pending`` in document order,
+    to be resolved by :func:`resolve_includes`. Values of YAML aliases
+    are shared with their anchors, not copied.
+
+    Includes which are values of mapping keys rejected by ``is_wanted``
+    are not resolved with the others, they are loaded as
+    :class:`pyraml.provenance.DeferredInclude`.
+
+    When ``governor`` (:class:`pyraml.limits.ResourceGovernor`) is given,
+    nodes are counted to it while the document is composed, before any
+    object is constructed. Aliases count as many nodes as their anchors.
+
+    Constructors are registered once, when the module is imported, and
+    state of a load is kept by the loader instance only, so documents
+    can be loaded from many threads at once.
+    """
+
+    def __init__(self, stream, include_handler=None, is_wanted=None,
+                 governor=None):
+        yaml.SafeLoader.__init__(self, stream)
+        self.include_handler = include_handler
+        self.is_wanted = is_wanted
+        self.governor = governor
+        self.pending = []
+        # id of anchored node -> number of nodes of its tree
+        self._anchored_sizes = {}
+
+    def compose_node(self, parent, index):
+        governor = self.governor
+        if governor is None:
+            return yaml.SafeLoader.compose_node(self, parent, index)
+        event = self.peek_event()
+        if event.__class__ is yaml.AliasEvent:
+            node = yaml.SafeLoader.compose_node(self, parent, index)
+            # Alias of an anchor being composed (recursive structure)
+            # has no size yet
+            governor.count_nodes(self._anchored_sizes.get(id(node), 1))
+            return node
+        anchor = event.anchor
+        start = governor.nodes
+        governor.count_nodes(1)
+        node = yaml.SafeLoader.compose_node(self, parent, index)
+        if anchor is not None:
+            self._anchored_sizes[id(node)] = governor.nodes - start
+        return node
+
+    def construct_include(self, node):
+        file_name = self.construct_scalar(node)
+        if self.include_handler is None:
+            return ParserRamlInclude(file_name)
+        include = PendingInclude(file_name, self.include_handler)
+        self.pending.append(include)
+        return include
+
+    def construct_ordered_mapping(self, node):
+        if self.is_wanted is None or self.include_handler is None:
+            mapping = UniqueOrderedDict(self.construct_pairs(node))
+        else:
+            pairs = []
+            for key_node, value_node in node.value:
+                key = self.construct_object(key_node)
+                if value_node.tag == ParserRamlInclude.yaml_tag and \
+                        not self.is_wanted(key):
+                    value = DeferredInclude(
+                        functools.partial(
+                            resolve_include, self.include_handler),
+                        self.construct_scalar(value_node))
+                else:
+                    value = self.construct_object(value_node)
+                pairs.append((key, value))
+            mapping = UniqueOrderedDict(pairs)
+        if self.include_handler is not None:
+            self._track_includes(mapping, mapping.items())
+        return mapping
+
+    def construct_tracked_sequence(self, node):
+        sequence = self.construct_sequence(node)
+        if self.include_handler is not None:
+            self._track_includes(sequence, enumerate(sequence))
+        return sequence
+
+    @staticmethod
+    def _track_includes(container, items):
+        for key, value in items:
+            if isinstance(value, PendingInclude):
+                value.locations.append((container, key))
+
+
+RamlLoader.add_constructor(
+    ParserRamlInclude.yaml_tag, RamlLoader.construct_include)
+RamlLoader.add_constructor(
+    yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
+    RamlLoader.construct_ordered_mapping)
+RamlLoader.add_constructor(
+    yaml.resolver.BaseResolver.DEFAULT_SEQUENCE_TAG,
+    RamlLoader.construct_tracked_sequence)
+
+
+def load_yaml(stream, include_handler=None, is_wanted=None, governor=None):
+    """
+    Load a RAML/YAML document resolving its includes.
+
+    :param stream: document content
+    :type stream: str or bytes or file-like object
+
+    :param include_handler: callable which receives file name of
+        ``!include`` tag and returns a 2 elements tuple: value to put in
+        place of the tag and list of :class:`PendingInclude` left in the
+        value, e.g. as returned by :func:`load_yaml_shallow`. If not
+        given, the tags are loaded as :class:`ParserRamlInclude`.
+    :type include_handler: callable
+
+    :param is_wanted: callable which receives a mapping key and returns
+        False if includes under the key should be deferred
+    :type is_wanted: callable
+
+    :param governor: limits nodes of the document
+    :type governor: pyraml.limits.ResourceGovernor
+
+    :return: loaded document
+    """
+    return resolve_includes(
+        *load_yaml_shallow(stream, include_handler, is_wanted, governor))
+
+
+def load_yaml_shallow(stream, include_handler=None, is_wanted=None,
+                      governor=None):
+    """
+    Load a RAML/YAML document leaving its includes unresolved, see
+    :func:`load_yaml` for parameters.
+
+    PyYAML composes and constructs a document recursively, so nodes of
+    one document can be nested a few hundred levels deep only. Deeper
+    specs should split their nesting across included documents, which
+    are resolved without recursion (see :func:`resolve_includes`).
+
+    :return: 2 elements tuple: loaded document and list of
+        :class:`PendingInclude` in it, in document order
+
+    :raise pyraml.RamlParseException: if the document is nested deeper
+        than the recursion limit allows
+    """
+    loader = RamlLoader(stream, include_handler, is_wanted, governor)
+    try:
+        return loader.get_single_data(), loader.pending
+    except RecursionError:
+        raise RamlParseException(
+            "Document is nested too deeply, split it into included "
+            "documents")
+    finally:
+        loader.dispose()
+
+
+def resolve_includes(data, pending):
+    """
+    Resolve ``pending`` includes of ``data`` and includes of included
+    documents, depth-first in document order.
+
+    Included documents are processed with an explicit stack, so length
+    of include chains is not limited by the recursion limit.
+
+    :param data: document loaded by :func:`load_yaml_shallow`
+    :param pending: its pending includes
+
+    :return: ``data`` with includes replaced by their values
+    """
+    holder = [data]
+    if isinstance(data, PendingInclude):
+        data.locations.append((holder, 0))
+
+    stack = list(reversed(pending))
+    while stack:
+        include = stack.pop()
+        value, nested = include.include_handler(include.file_name)
+        if isinstance(value, PendingInclude):
+            # Included document consists of another include only
+            value.locations.extend(include.locations)
+            if value not in nested:
+                nested = [value] + list(nested)
+        else:
+            include.resolve(value)
+        stack.extend(reversed(nested))
+    return holder[0]
+
+
+def resolve_include(include_handler, file_name):
+    """ Load included ``file_name`` with ``include_handler`` and resolve
+    its includes, see :func:`resolve_includes`
+    """
+    return resolve_includes(*include_handler(file_name))
@@ -0,0 +1,310 @@
+__author__ = 'ad'
+
+import os
+import threading
+try:
+    from collections import OrderedDict
+except ImportError:
+    # For python 2.6 additional package ordereddict should be installed
+    from ordereddict import OrderedDict
+
+from . import RamlException
+from .parser import load
+from .instrumentation import (
+    IncludesCollector, observe, current_observer, _clock)
+
+
+__all__ = ["SpecRegistry", "RegistryStats"]
+
+
+class RegistryStats(object):
+    """ Counters of a :class:`SpecRegistry`.
+
+    :ivar hits: lookups served from the registry
+    :ivar misses: lookups which loaded the spec
+    :ivar coalesced: lookups which waited for a load started by another
+        thread instead of loading the spec again
+    :ivar evictions: entries dropped to fit into the budget
+    :ivar expirations: entries dropped because of TTL or changed sources
+    :ivar errors: loads which raised an exception
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'errors': self.errors,
+        }.__repr__()
+
+
+class _Entry(object):
+    __slots__ = ('root', 'size', 'loaded_at', 'mtimes')
+
+    def __init__(self, root, size, loaded_at, mtimes):
+        self.root = root
+        self.size = size
+        self.loaded_at = loaded_at
+        # local source path -> modification time at load
+        self.mtimes = mtimes
+
+
+class _PendingLoad(object):
+    """ Load in progress, other threads asking for the same spec wait
+    for its result.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.root = None
+        self.error = None
+        # Set by SpecRegistry.invalidate, the result isn't cached then
+        self.invalidated = False
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.root
+
+
+class SpecRegistry(object):
+    """ Thread-safe cache of parsed RAML specs keyed by URI.
+
+    Concurrent lookups of a spec which is not cached trigger a single
+    load, the other threads wait for its result. Failed loads are not
+    cached, every waiting thread gets the exception (or
+    :class:`pyraml.RamlException` if the load was interrupted, e.g. by
+    ``KeyboardInterrupt``).
+
+    Least recently used specs are evicted when the registry holds more
+    than ``max_entries`` specs or their total size exceeds ``max_bytes``
+    (measured with :func:`pyraml.footprint.memory_footprint`). The most
+    recently loaded spec is kept even if it doesn't fit into the budget
+    alone.
+
+     >>> registry = SpecRegistry(max_entries=100, ttl=300)
+     >>> root = registry.get('/srv/apis/billing.raml')
+
+    Returned trees are shared between all users of the registry and must
+    not be modified.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None,
+                 check_mtime=False, loader=None, clock=None):
+        """
+        :param max_entries: maximal number of cached specs
+        :type max_entries: int
+
+        :param max_bytes: maximal total memory footprint of cached specs
+        :type max_bytes: int
+
+        :param ttl: seconds after which a cached spec is loaded again
+        :type ttl: float
+
+        :param check_mtime: load a spec again when modification time of
+            its local file or any local included file has changed
+        :type check_mtime: bool
+
+        :param loader: callable loading a spec from URI, defaults to
+            :func:`pyraml.parser.load`
+
+        :param clock: callable returning current time in seconds, used
+            for TTL
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.check_mtime = check_mtime
+        self.stats = RegistryStats()
+        self._loader = loader or load
+        self._clock = clock or _clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._total_size = 0
+
+    def get(self, uri):
+        """
+        Return parsed spec of ``uri``, loading it if it isn't cached or
+        is out of date.
+
+        :param uri: URL or local path of the RAML file
+        :type uri: str
+
+        :rtype: pyraml.entities.RamlRoot
+        """
+        key = _registry_key(uri)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Mark as recently used
+                self._entries[key] = self._entries.pop(key)
+
+        if entry is not None and self._is_fresh(entry):
+            with self._lock:
+                self.stats.hits += 1
+            return entry.root
+
+        with self._lock:
+            if entry is not None and self._entries.get(key) is entry:
+                self._remove(key)
+                self.stats.expirations += 1
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _PendingLoad()
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not owner:
+            return pending.result()
+
+        loaded = False
+        try:
+            entry = self._load(key)
+            loaded = True
+        except Exception as e:
+            pending.error = e
+            raise
+        else:
+            pending.root = entry.root
+            with self._lock:
+                if not pending.invalidated:
+                    self._store(key, entry)
+            return entry.root
+        finally:
+            if not loaded and pending.error is None:
+                # Interrupted, e.g. by KeyboardInterrupt or SystemExit
+                pending.error = RamlException(
+                    "Load of {0} was interrupted".format(key))
+            with self._lock:
+                if not loaded:
+                    self.stats.errors += 1
+                del self._pending[key]
+            pending.done.set()
+
+    def invalidate(self, uri=None):
+        """ Drop cached spec of ``uri``, or all specs if ``uri`` is None.
+        Loads in progress are completed but not cached.
+        """
+        with self._lock:
+            if uri is None:
+                self._entries.clear()
+                self._total_size = 0
+                for pending in self._pending.values():
+                    pending.invalidated = True
+            else:
+                key = _registry_key(uri)
+                if key in self._entries:
+                    self._remove(key)
+                pending = self._pending.get(key)
+                if pending is not None:
+                    pending.invalidated = True
+
+    def __contains__(self, uri):
+        with self._lock:
+            return _registry_key(uri) in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_size(self):
+        """ Total memory footprint of cached specs, known only when
+        ``max_bytes`` is set.
+        """
+        return self._total_size
+
+    def _load(self, key):
+        # Loads are still reported to the observer of the caller
+        collector = _SourcesCollector(self.check_mtime, current_observer())
+        loaded_at = self._clock()
+        # Sources are stat'ed before they are read, so a source changed
+        # during the load is found out of date
+        collector.stat(key)
+        with observe(collector):
+            root = self._loader(key)
+
+        size = 0
+        if self.max_bytes is not None:
+            from .footprint import memory_footprint
+            size = memory_footprint(root).total
+        return _Entry(root, size, loaded_at, collector.mtimes)
+
+    def _is_fresh(self, entry):
+        if self.ttl is not None and \
+                self._clock() - entry.loaded_at >= self.ttl:
+            return False
+        for path, mtime in entry.mtimes.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _store(self, key, entry):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._total_size += entry.size
+
+        while len(self._entries) > 1 and self._over_budget():
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def _over_budget(self):
+        if self.max_entries is not None and \
+                len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and \
+            self._total_size > self.max_bytes
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._total_size -= entry.size
+
+
+class _SourcesCollector(IncludesCollector):
+    """ Collector of modification times of local sources, taken before
+    they are read
+    """
+
+    def __init__(self, check_mtime, observer=None):
+        super(_SourcesCollector, self).__init__(observer)
+        self.check_mtime = check_mtime
+        # local source path -> modification time before it was read
+        self.mtimes = {}
+
+    def stat(self, path):
+        if self.check_mtime and path not in self.mtimes:
+            try:
+                self.mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                # Not a local file
+                pass
+
+    def on_fetch(self, path):
+        self.stat(path)
+        super(_SourcesCollector, self).on_fetch(path)
+
+
+def _registry_key(uri):
+    # Only local paths are normalized, not URLs nor locations served by
+    # custom loaders (e.g. mem://api.raml)
+    if '://' in uri:
+        return uri
+    return os.path.abspath(uri)
@@ -0,0 +1,201 @@
+__author__ = 'ad'
+
+import os.path
+import posixpath
+import threading
+
+import six
+
+from . import RamlException, RamlNotFoundException
+from .constants import FILE_EXTENSION_MIME_TYPES, RAML_CONTENT_MIME_TYPES
+
+
+__all__ = ["IncludeResolver", "MemoryResolver", "ResolverRegistry"]
+
+
+class IncludeResolver(object):
+    """ Base class of loaders of included resources.
+
+    A resolver serves locations starting with the prefix it's registered
+    with in a :class:`ResolverRegistry`, e.g. ``mem://``. Includes of a
+    document fetched by a resolver are resolved relative to it by the
+    same resolver, unless they start with a prefix of another resolver.
+    """
+
+    def join(self, base, file_name):
+        """
+        Return location of resource included as ``file_name`` by a
+        document whose includes are relative to ``base``
+
+        :param base: location returned by :meth:`dirname`
+        :type base: str
+
+        :type file_name: str
+        :rtype: str
+        """
+        return _normalize_location(posixpath.join(base, file_name))
+
+    def dirname(self, location):
+        """ Return location includes of document at ``location`` are
+        relative to
+
+        :rtype: str
+        """
+        scheme, separator, path = location.rpartition('://')
+        return scheme + separator + posixpath.dirname(path)
+
+    def fetch(self, location):
+        """
+        Load resource at ``location``
+
+        :param location: location returned by :meth:`join` or given to
+            :func:`pyraml.parser.load`
+        :type location: str
+
+        :return: 2 elements tuple: content and its MIME type. Content is
+            str or bytes, or already loaded YAML data (dicts, lists and
+            scalars) if MIME type is None.
+
+        :raise pyraml.RamlNotFoundException: if there is no resource at
+            ``location``
+        """
+        raise NotImplementedError
+
+
+class MemoryResolver(IncludeResolver):
+    """ Resolver of documents held in memory, e.g. generated fragments.
+
+    Documents are strings or bytes, loaded by their MIME type guessed
+    from extension like files, or already loaded YAML data (dicts, lists
+    and scalars) which is used as is, without serializing and loading it
+    again. Loaded data is copied by the parser, so it's never changed.
+
+     >>> resolver = MemoryResolver({
+     ...     'mem://api.raml': '#%RAML 0.8\\ntitle: !include title.txt\\n'
+     ...                       'traits: [!include traits.yaml]',
+     ...     'mem://title.txt': 'Generated API',
+     ...     'mem://traits.yaml': {'paged': {'queryParameters': {}}},
+     ... })
+     >>> root = load('mem://api.raml', resolvers={'mem://': resolver})
+    """
+
+    def __init__(self, files=None):
+        """
+        :param files: document locations, including prefix, mapped to
+            documents
+        :type files: dict
+        """
+        self._lock = threading.Lock()
+        self._files = dict(
+            (_normalize_location(location), value)
+            for location, value in (files or {}).items())
+
+    def add(self, location, value):
+        """ Add or replace document at ``location`` """
+        with self._lock:
+            self._files[_normalize_location(location)] = value
+
+    def fetch(self, location):
+        try:
+            value = self._files[location]
+        except KeyError:
+            raise RamlNotFoundException(
+                "No such file {0} found".format(location))
+        if isinstance(value, (six.binary_type, six.text_type)):
+            return value, _guess_mime_type(location)
+        return value, None
+
+
+class ResolverRegistry(object):
+    """ Resolvers of included resources selected by location prefix.
+
+    The resolver with the longest prefix matching a location serves it.
+    Locations no resolver is registered for are loaded from local files
+    or, for ``http://`` and ``https://`` URLs, from network.
+    """
+
+    def __init__(self, resolvers=None):
+        """
+        :param resolvers: location prefixes mapped to resolvers, or
+            another registry to copy
+        :type resolvers: dict or ResolverRegistry
+        """
+        # list of (prefix, resolver), longest prefix first
+        self._resolvers = []
+        if isinstance(resolvers, ResolverRegistry):
+            resolvers = resolvers._resolvers
+        elif isinstance(resolvers, dict):
+            resolvers = resolvers.items()
+        for prefix, resolver in resolvers or ():
+            self.register(prefix, resolver)
+
+    def register(self, prefix, resolver):
+        """
+        Serve locations starting with ``prefix`` with ``resolver``
+
+        :type prefix: str
+        :type resolver: IncludeResolver
+        """
+        if not prefix:
+            raise RamlException("Resolver prefix can't be empty")
+        resolvers = [(p, r) for p, r in self._resolvers if p != prefix]
+        resolvers.append((prefix, resolver))
+        resolvers.sort(key=lambda item: -len(item[0]))
+        self._resolvers = resolvers
+
+    def find(self, location):
+        """ Return resolver serving ``location`` or None """
+        for prefix, resolver in self._resolvers:
+            if location.startswith(prefix):
+                return resolver
+        return None
+
+    def __len__(self):
+        return len(self._resolvers)
+
+
+def _normalize_location(location):
+    """ Collapse ``.`` and ``..`` segments of ``location`` keeping its
+    ``scheme://`` part
+    """
+    scheme, separator, path = location.rpartition('://')
+    if not path:
+        return location
+    normalized = posixpath.normpath(path)
+    if normalized == '.':
+        normalized = ''
+    elif path.endswith('/') and not normalized.endswith('/'):
+        normalized += '/'
+    return scheme + separator + normalized
+
+
+_mime_types = None
+_mime_types_lock = threading.Lock()
+
+
+def _mime_types_db():
+    """ Return private ``mimetypes.MimeTypes`` database, created on first
+    use. Filling the global ``mimetypes`` database isn't thread-safe, so
+    it's done once, under a lock, and never changed afterwards.
+    """
+    global _mime_types
+    if _mime_types is None:
+        with _mime_types_lock:
+            if _mime_types is None:
+                # mimetypes reads system MIME databases, so it's
+                # imported only for files of unknown types
+                import mimetypes
+                _mime_types = mimetypes.MimeTypes()
+    return _mime_types
+
+
+def _guess_mime_type(path):
+    extension = os.path.splitext(path)[1].lower()
+    mime_type = FILE_EXTENSION_MIME_TYPES.get(extension)
+    if mime_type is None:
+        mime_type = _mime_types_db().guess_type(path)[0] or "text/plain"
+    return mime_type
+
+
+def _is_mime_type_raml(mime_type):
+    return mime_type.lower() in RAML_CONTENT_MIME_TYPES
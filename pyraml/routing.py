@@ -0,0 +1,148 @@
+__author__ = 'ad'
+
+import re
+
+from six.moves import urllib_parse as urlparse
+
+
+__all__ = ["Route", "RouteTable", "base_path"]
+
+
+_URI_PARAMETER = re.compile(r'\{([^}/]+)\}')
+
+
+class Route(object):
+    """ Resource of a RAML tree reachable by HTTP requests.
+
+    :ivar template: absolute resource path, e.g. ``/users/{userId}``
+    :ivar resource: the resource
+    :type resource: pyraml.entities.RamlResource
+    :ivar parameters: names of URI parameters in the template
+    """
+    __slots__ = ('template', 'resource', 'parameters', 'pattern')
+
+    def __init__(self, template, resource):
+        self.template = template
+        self.resource = resource
+        self.parameters = tuple(_URI_PARAMETER.findall(template))
+        self.pattern = None
+        if self.parameters:
+            self.pattern = re.compile(_template_regex(template) + '$')
+
+    def __repr__(self):
+        return "<Route {0}>".format(self.template)
+
+
+class RouteTable(object):
+    """ Matches request paths against resources of a RAML tree.
+
+    Routes are compiled once: paths without URI parameters are found by
+    a single dict lookup, templated ones are tried only among routes
+    with the same number of segments. Static paths win over templated
+    ones.
+    """
+
+    def __init__(self, root, prefix=None):
+        """
+        :param root: parsed RAML tree
+        :type root: pyraml.entities.RamlRoot
+
+        :param prefix: path all request paths start with, defaults to
+            path of ``root.baseUri`` (see :func:`base_path`). May contain
+            URI parameters, e.g. ``/{path}``
+        :type prefix: str
+        """
+        if prefix is None:
+            prefix = base_path(root)
+        self.prefix = prefix.rstrip('/')
+        self._prefix_pattern = None
+        if _URI_PARAMETER.search(self.prefix):
+            self._prefix_pattern = re.compile(_template_regex(self.prefix))
+        self.routes = []
+        self._static = {}
+        # number of segments -> list of templated routes
+        self._templated = {}
+
+        for template, resource in root.indexes.resources_by_path.items():
+            route = Route(_normalize(template), resource)
+            self.routes.append(route)
+            if route.pattern is None:
+                self._static.setdefault(route.template, route)
+            else:
+                self._templated.setdefault(
+                    route.template.count('/'), []).append(route)
+
+    def match(self, path, raw=False):
+        """
+        Find route of request ``path``.
+
+        :param path: request path without query string
+        :type path: str
+
+        :param raw: ``path`` is percent-encoded, as ASGI ``raw_path``, and
+            URI parameter values are decoded. WSGI ``PATH_INFO`` is decoded
+            by the server already, so values are taken as they are.
+        :type raw: bool
+
+        :return: 2 elements tuple: Route and dict of URI parameter values,
+            or (None, None) if no resource matches
+        """
+        if self._prefix_pattern is not None:
+            match = self._prefix_pattern.match(path)
+            if match is None:
+                return None, None
+            path = path[match.end():]
+        elif self.prefix:
+            if not path.startswith(self.prefix):
+                return None, None
+            path = path[len(self.prefix):]
+        if path and path[0] != '/':
+            # Prefix matched a part of a segment
+            return None, None
+        path = _normalize(path)
+
+        route = self._static.get(path)
+        if route is not None:
+            return route, {}
+
+        for route in self._templated.get(path.count('/'), ()):
+            match = route.pattern.match(path)
+            if match is not None:
+                values = match.groups()
+                if raw:
+                    values = [urlparse.unquote(value) for value in values]
+                return route, dict(zip(route.parameters, values))
+        return None, None
+
+
+def base_path(root):
+    """ Path component of ``root.baseUri`` with ``{version}`` substituted
+
+     >>> base_path(RamlRoot(baseUri='https://api.example.com/{version}',
+     ...                    version='v1'))
+     '/v1'
+    """
+    if not root.baseUri:
+        return ''
+    base_uri = root.baseUri
+    if root.version is not None:
+        base_uri = base_uri.replace('{version}', str(root.version))
+    return urlparse.urlparse(base_uri).path.rstrip('/')
+
+
+def _template_regex(template):
+    """ Regular expression matching ``template`` with each URI parameter
+    captured as a group
+    """
+    regex = ''
+    position = 0
+    for match in _URI_PARAMETER.finditer(template):
+        regex += re.escape(template[position:match.start()])
+        regex += '([^/]+)'
+        position = match.end()
+    return regex + re.escape(template[position:])
+
+
+def _normalize(path):
+    path = path.rstrip('/')
+    return path or '/'
@@ -0,0 +1,235 @@
+__author__ = 'ad'
+
+import threading
+try:
+    from collections import OrderedDict
+except ImportError:
+    # For python 2.6 additional package ordereddict should be installed
+    from ordereddict import OrderedDict
+
+import six
+
+from . import RamlException
+from .provenance import include_source
+
+
+__all__ = ["RamlSchemaException", "SchemaRegistry", "XMLSchemaValidator",
+           "XMLSchemaCache", "xsd_supported"]
+
+
+# Options of lxml parsers of documents received from clients
+_UNTRUSTED_PARSER_OPTIONS = {'resolve_entities': False, 'no_network': True}
+
+
+class RamlSchemaException(RamlException):
+    pass
+
+
+class SchemaRegistry(object):
+    """ Schemas decoded by a single parse.
+
+    Schemas are referenced by bodies either by name of a schema declared
+    in ``RamlRoot.schemas`` or inline. A name is resolved to the decoded
+    declared schema, inline schemas are decoded once per content (and
+    include location) and the decoded instance is shared by all bodies
+    with the same schema.
+
+    Decoded schemas are shared: changing the schema of one body changes
+    it for all bodies referencing it.
+    """
+
+    def __init__(self):
+        # schema name -> decoded schema
+        self.named = {}
+        # (include location, schema text) -> decoded schema, text keys are
+        # looked up by their hash
+        self._decoded = {}
+
+    def declare(self, schemas):
+        """ Make ``schemas`` (``RamlRoot.schemas``) available by name
+
+        :type schemas: dict
+        """
+        self.named = dict(schemas or {})
+
+    def get(self, text, decode):
+        """
+        Return schema of a body given as ``text``
+
+        :param text: schema name or schema
+        :type text: str
+
+        :param decode: callable decoding ``text`` if it's not a name of a
+            declared schema and wasn't decoded yet
+
+        :return: decoded schema
+        """
+        schema = self.named.get(text)
+        if schema is not None:
+            return schema
+        key = (include_source(text), text)
+        schema = self._decoded.get(key)
+        if schema is None:
+            schema = self._decoded[key] = decode(text)
+        return schema
+
+    def __len__(self):
+        return len(self._decoded)
+
+
+class XMLSchemaValidator(object):
+    """ Validator of XML documents against an XSD schema, compiled on
+    first use. Requires ``lxml``.
+    """
+    __slots__ = ('schema', '_compiled', '_error', '_lock')
+
+    def __init__(self, schema):
+        """
+        :param schema: decoded XSD schema, e.g. ``RamlBody.schema``
+        :type schema: lxml.etree._Element
+        """
+        self.schema = schema
+        self._compiled = None
+        # Message of compilation failure, which isn't retried
+        self._error = None
+        self._lock = threading.Lock()
+
+    @property
+    def compiled(self):
+        """ True if the schema has been compiled already """
+        return self._compiled is not None
+
+    def compile(self):
+        """
+        Compile the schema, if it's not compiled yet
+
+        :rtype: lxml.etree.XMLSchema
+
+        :raise RamlSchemaException: if lxml isn't installed or the schema
+            isn't a valid XSD
+        """
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None and self._error is None:
+                    self._compiled, self._error = _compile_xsd(self.schema)
+            if self._error is not None:
+                raise RamlSchemaException(self._error)
+        return self._compiled
+
+    def validate(self, payload):
+        """
+        Validate XML document ``payload``. Documents are validated while
+        they are parsed; file-like payloads are read by chunks and parsed
+        elements are dropped, so large documents are never held whole.
+        Documents are untrusted: entities aren't resolved and nothing is
+        fetched from network.
+
+        :param payload: XML document
+        :type payload: bytes or str or file-like object
+
+        :return: list of errors, empty if the document is valid
+        :rtype: list of str
+        """
+        compiled = self.compile()
+        etree = _lxml()
+        if isinstance(payload, six.text_type):
+            payload = payload.encode('utf-8')
+        try:
+            if isinstance(payload, six.binary_type):
+                etree.fromstring(payload, etree.XMLParser(
+                    schema=compiled, **_UNTRUSTED_PARSER_OPTIONS))
+            else:
+                for _, element in etree.iterparse(
+                        payload, events=('end',), schema=compiled,
+                        **_UNTRUSTED_PARSER_OPTIONS):
+                    element.clear()
+                    parent = element.getparent()
+                    # The root may follow top-level comments and PIs
+                    if parent is not None:
+                        while element.getprevious() is not None:
+                            del parent[0]
+        except etree.XMLSyntaxError as e:
+            return [six.text_type(e)]
+        return []
+
+    def __repr__(self):
+        return "<{0} {1}>".format(
+            self.__class__.__name__,
+            'compiled' if self.compiled else 'not compiled')
+
+
+class XMLSchemaCache(object):
+    """ Bounded cache of :class:`XMLSchemaValidator` of decoded XSD
+    schemas, e.g. of bodies of a parsed RAML tree.
+
+    Schemas are compiled when a document is validated against them for
+    the first time. When the cache is full, validators of least recently
+    used schemas are dropped and compiled again if they are needed.
+    Schemas are identified by object: bodies referencing the same schema
+    (see :class:`SchemaRegistry`) share a validator.
+    """
+
+    def __init__(self, max_entries=64):
+        """
+        :param max_entries: maximal number of validators kept
+        :type max_entries: int
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # id of schema -> validator, holding the schema alive
+        self._validators = OrderedDict()
+
+    def validator(self, schema):
+        """ Return validator of decoded XSD ``schema``
+
+        :rtype: XMLSchemaValidator
+        """
+        key = id(schema)
+        with self._lock:
+            validator = self._validators.pop(key, None)
+            if validator is None:
+                validator = XMLSchemaValidator(schema)
+                while len(self._validators) >= self.max_entries:
+                    self._validators.popitem(last=False)
+            self._validators[key] = validator
+        return validator
+
+    def validate(self, schema, payload):
+        """
+        Validate XML document ``payload`` against ``schema``, see
+        :meth:`XMLSchemaValidator.validate`
+
+        :return: list of errors, empty if the document is valid
+        """
+        return self.validator(schema).validate(payload)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._validators)
+
+
+def _compile_xsd(schema):
+    """ Return 2 elements tuple: compiled schema and None, or None and
+    error message
+    """
+    etree = _lxml()
+    if etree is None:
+        return None, "lxml is required to compile XML schemas"
+    try:
+        return etree.XMLSchema(schema), None
+    except (etree.XMLSchemaParseError, TypeError) as e:
+        return None, "Invalid XML schema: {0}".format(e)
+
+
+def xsd_supported():
+    """ Check whether XML schemas can be compiled, i.e. lxml is installed """
+    return _lxml() is not None
+
+
+def _lxml():
+    """ Return ``lxml.etree`` module if it's installed, or None """
+    try:
+        from lxml import etree
+    except ImportError:
+        return None
+    return etree
@@ -0,0 +1,147 @@
+__author__ = 'ad'
+
+import six
+try:
+    from collections import OrderedDict
+except ImportError:
+    # For python 2.6 additional package ordereddict should be installed
+    from ordereddict import OrderedDict
+
+from . import entities
+from .model import Model
+from .fields import parse_xml_string, serialize_xml, is_xml_element
+from .provenance import include_source
+
+
+__all__ = ["to_data", "from_data"]
+
+
+def to_data(value):
+    """
+    Encode a parsed RAML tree into plain data made of lists, dicts,
+    strings, numbers, booleans and None, suitable for JSON or Python
+    literals.
+
+    Every dict of the result is a tagged node:
+
+        * ``{"map": [[key, value], ...]}`` for mappings, keys keep their
+          type and order
+        * ``{"model": "RamlMethod", "fields": {...}}`` for models, fields
+          with None value are omitted
+        * ``{"xml": "<...>"}`` for decoded XML data
+
+    ``RamlResource.parentResource`` back references are not encoded,
+    :func:`from_data` restores them.
+
+    :param value: model or any value of a model field
+    :type value: pyraml.model.Model
+
+    :return: encoded data
+    """
+    # Encoded containers are created with placeholders, filled when
+    # their (value, container, key) entry is popped, so depth of the tree
+    # is not limited by the recursion limit
+    holder = [None]
+    stack = [(value, holder, 0)]
+    while stack:
+        value, target, key = stack.pop()
+        target[key] = _encode(value, stack)
+    return holder[0]
+
+
+def _encode(value, stack):
+    """ Encode ``value`` pushing its items to ``stack`` """
+    if isinstance(value, Model):
+        fields = {}
+        for field_name in value.__class__._structure:
+            if field_name == 'parentResource':
+                continue
+            field_value = getattr(value, field_name, None)
+            if field_value is not None:
+                fields[field_name] = None
+                stack.append((field_value, fields, field_name))
+        rv = {'model': value.__class__.__name__, 'fields': fields}
+        source = include_source(value)
+        if source is not None:
+            rv['source'] = source
+        return rv
+    if isinstance(value, dict):
+        pairs = []
+        for key, val in value.items():
+            pair = [None, None]
+            pairs.append(pair)
+            stack.append((key, pair, 0))
+            stack.append((val, pair, 1))
+        return {'map': pairs}
+    if isinstance(value, list):
+        items = [None] * len(value)
+        stack.extend((item, items, i) for i, item in enumerate(value))
+        return items
+    if is_xml_element(value):
+        return {'xml': serialize_xml(value)}
+    if isinstance(value, six.text_type):
+        # Drop subclasses like IncludedText
+        return six.text_type(value)
+    return value
+
+
+def from_data(data):
+    """
+    Decode a RAML tree encoded by :func:`to_data`.
+
+    Models are instantiated directly, without validation of field values.
+
+    :param data: encoded data
+    :return: decoded value
+    :rtype: pyraml.model.Model or any value of a model field
+    """
+    holder = [None]
+    stack = [(data, holder, 0)]
+    while stack:
+        data, target, key = stack.pop()
+        if data is _FINISH_MODEL:
+            _finish_model(target, key)
+        else:
+            target[key] = _decode(data, stack)
+    return holder[0]
+
+
+# Marker of a stack entry popped after all fields of a model are decoded
+_FINISH_MODEL = object()
+
+
+def _decode(data, stack):
+    """ Decode ``data`` pushing its items to ``stack`` """
+    if isinstance(data, list):
+        items = [None] * len(data)
+        stack.extend((item, items, i) for i, item in enumerate(data))
+        return items
+    if not isinstance(data, dict):
+        return data
+    if 'map' in data:
+        # Keys are scalars, values are filled in place keeping order
+        mapping = OrderedDict((key, None) for key, _ in data['map'])
+        stack.extend((val, mapping, key) for key, val in data['map'])
+        return mapping
+    if 'xml' in data:
+        return parse_xml_string(data['xml'])
+
+    model_class = getattr(entities, data['model'], None)
+    if not (isinstance(model_class, type) and issubclass(model_class, Model)):
+        raise ValueError("Unknown model {0!r}".format(data['model']))
+    model = model_class()
+    if 'source' in data:
+        model._include_source = data['source']
+    values = OrderedDict((field_name, None) for field_name in data['fields'])
+    stack.append((_FINISH_MODEL, model, values))
+    stack.extend((field_data, values, field_name)
+                 for field_name, field_data in data['fields'].items())
+    return model
+
+
+def _finish_model(model, values):
+    for field_name, value in values.items():
+        setattr(model, field_name, value)
+    if isinstance(model, entities.RamlResource) and model.resources:
+        for child in model.resources.values():
+            child.parentResource = model
@@ -0,0 +1,546 @@
+__author__ = 'ad'
+
+import os
+import mmap
+import struct
+import codecs
+
+import six
+from six.moves.collections_abc import Mapping, Sequence
+
+from . import RamlException
+from . import entities
+from .serialization import to_data, from_data
+
+
+__all__ = ["RamlSharedSpecException", "SharedSpec", "ModelView", "MapView",
+           "ListView", "encode", "write_shared_file", "open_shared_file",
+           "create_shared_memory", "attach_shared_memory"]
+
+
+MAGIC = b'PYRAMLS1'
+
+# magic, root node offset, number of strings, offset of strings index
+_HEADER = struct.Struct('<8sIII')
+_UINT = struct.Struct('<I')
+_PAIR = struct.Struct('<II')
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+
+# Node tags. Every node starts with a one byte tag followed by:
+_NONE = 0
+_TRUE = 1
+_FALSE = 2
+_INTEGER = 3     # int64
+_FLOAT_NUM = 4   # float64
+_STRING = 5      # uint32 string index
+_BIG_INTEGER = 6  # uint32 string index of decimal representation
+_LIST = 7        # uint32 count, count * uint32 item node offset
+_MAP = 8         # uint32 count, count * (uint32 key, uint32 value offset)
+_MODEL = 9       # uint32 class name string index, uint32 count,
+                 # count * (uint32 field name string index, uint32 offset)
+_XML = 10        # uint32 string index of serialized XML
+
+_INT_MIN = -(1 << 63)
+_INT_MAX = (1 << 63) - 1
+
+
+class RamlSharedSpecException(RamlException):
+    pass
+
+
+def encode(root):
+    """
+    Encode a parsed RAML tree into the compact read-only representation
+    used by :class:`SharedSpec`.
+
+    Equal strings are stored once. Include provenance of models is not
+    encoded.
+
+    :param root: parsed RAML tree
+    :type root: pyraml.entities.RamlRoot
+
+    :return: encoded tree
+    :rtype: bytes
+    """
+    return _Encoder().encode(to_data(root))
+
+
+def write_shared_file(root, path):
+    """
+    Encode ``root`` (see :func:`encode`) into file ``path``, which can be
+    memory-mapped by every worker with :func:`open_shared_file`.
+    """
+    with open(path, 'wb') as f:
+        f.write(encode(root))
+
+
+def open_shared_file(path):
+    """
+    Memory-map a file written by :func:`write_shared_file`.
+
+    Pages of the file are shared by all processes which map it.
+
+    :rtype: SharedSpec
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SharedSpec(mapped, closer=mapped.close)
+
+
+def create_shared_memory(root, name=None):
+    """
+    Encode ``root`` (see :func:`encode`) into a new block of
+    ``multiprocessing.shared_memory`` (Python 3.8+).
+
+    The caller owns the block and must ``close()`` and ``unlink()`` it
+    once workers are done with it.
+
+    :param name: name of the block, generated if not given
+    :type name: str
+
+    :rtype: multiprocessing.shared_memory.SharedMemory
+    """
+    from multiprocessing import shared_memory
+
+    data = encode(root)
+    block = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    block.buf[:len(data)] = data
+    return block
+
+
+def attach_shared_memory(name):
+    """
+    Attach to a block created by :func:`create_shared_memory` in another
+    process.
+
+    :param name: name of the block
+    :type name: str
+
+    :rtype: SharedSpec
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        # Attached block must not be unlinked when this process exits
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers every block with the resource tracker,
+        # which would unlink it when this process exits
+        block = shared_memory.SharedMemory(name=name)
+        if os.name != 'nt':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(block._name, 'shared_memory')
+    return SharedSpec(block.buf, closer=block.close)
+
+
+class _Encoder(object):
+    def __init__(self):
+        self.nodes = bytearray()
+        self.strings = {}
+
+    def encode(self, data):
+        root_offset = self.write(data)
+
+        strings = sorted(self.strings.items(), key=lambda item: item[1])
+        index_offset = _HEADER.size + len(self.nodes)
+        data_offset = index_offset + _PAIR.size * len(strings)
+        index = bytearray()
+        string_data = bytearray()
+        for string, _ in strings:
+            encoded = string.encode('utf-8')
+            index += _PAIR.pack(data_offset + len(string_data), len(encoded))
+            string_data += encoded
+
+        header = _HEADER.pack(MAGIC, root_offset, len(strings), index_offset)
+        return bytes(header + self.nodes + index + string_data)
+
+    def string(self, value):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def write(self, data):
+        """ Write nodes of encoded ``data``, children before their
+        parents, return offset of its node.
+
+        Nodes are written in post-order with an explicit stack, so depth
+        of the tree is not limited by the recursion limit.
+        """
+        # Offsets of written nodes whose parents aren't written yet
+        offsets = []
+        stack = [(data, None)]
+        while stack:
+            data, children = stack.pop()
+            if children is not None:
+                # Children are written, their offsets are the last ones
+                count = len(children)
+                child_offsets = offsets[len(offsets) - count:]
+                del offsets[len(offsets) - count:]
+                offsets.append(self.container(data, child_offsets))
+                continue
+            children = _children(data)
+            if children is None:
+                offsets.append(self.scalar(data))
+            else:
+                stack.append((data, children))
+                stack.extend((child, None) for child in reversed(children))
+        return offsets[0]
+
+    def container(self, data, child_offsets):
+        """ Write node of list, mapping or model ``data`` whose children
+        are written at ``child_offsets``, see :func:`_children`
+        """
+        if isinstance(data, list):
+            body = b''.join(_UINT.pack(offset) for offset in child_offsets)
+            return self.node(_LIST, _UINT.pack(len(data)) + body)
+        if 'map' in data:
+            body = b''.join(
+                _PAIR.pack(child_offsets[i], child_offsets[i + 1])
+                for i in range(0, len(child_offsets), 2))
+            return self.node(_MAP, _UINT.pack(len(data['map'])) + body)
+        fields = data['fields']
+        body = b''.join(
+            _PAIR.pack(self.string(name), offset)
+            for name, offset in zip(sorted(fields), child_offsets))
+        return self.node(_MODEL, _PAIR.pack(
+            self.string(data['model']), len(fields)) + body)
+
+    def scalar(self, data):
+        """ Write node of scalar or XML ``data`` """
+        if isinstance(data, dict):
+            return self.node(_XML, _UINT.pack(self.string(data['xml'])))
+        if data is None:
+            return self.node(_NONE)
+        if data is True:
+            return self.node(_TRUE)
+        if data is False:
+            return self.node(_FALSE)
+        if isinstance(data, six.integer_types):
+            if _INT_MIN <= data <= _INT_MAX:
+                return self.node(_INTEGER, _INT.pack(data))
+            return self.node(_BIG_INTEGER, _UINT.pack(self.string(str(data))))
+        if isinstance(data, float):
+            return self.node(_FLOAT_NUM, _FLOAT.pack(data))
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        if isinstance(data, six.text_type):
+            return self.node(_STRING, _UINT.pack(self.string(data)))
+        raise RamlSharedSpecException(
+            "Can't encode value of type {0}".format(type(data).__name__))
+
+    def node(self, tag, body=b''):
+        offset = _HEADER.size + len(self.nodes)
+        self.nodes.append(tag)
+        self.nodes += body
+        return offset
+
+
+def _children(data):
+    """ Return values encoded as children of ``data`` node in order:
+    items of lists, keys and values of mappings, fields of models sorted
+    by name. None for scalars and XML.
+    """
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict) or 'xml' in data:
+        return None
+    if 'map' in data:
+        children = []
+        for key, val in data['map']:
+            children.append(key)
+            children.append(val)
+        return children
+    fields = data['fields']
+    return [fields[name] for name in sorted(fields)]
+
+
+class SharedSpec(object):
+    """ Parsed RAML tree stored in a read-only buffer, e.g. memory-mapped
+    file or shared memory block.
+
+    Values are decoded from the buffer on access through views which
+    mimic parsed entities: ``spec.root.resources['/users'].methods['get']``.
+    Nothing is decoded in advance, so the tree itself is never copied
+    into memory of the process.
+    """
+
+    def __init__(self, buffer, closer=None):
+        """
+        :param buffer: encoded tree, see :func:`encode`
+        :type buffer: bytes, mmap or memoryview
+
+        :param closer: callable releasing the buffer, called by
+            :meth:`close`
+        """
+        if six.PY2:
+            # Python 2 memoryview doesn't support mmap, buffers are read
+            # directly
+            self._buffer = buffer
+        else:
+            self._buffer = memoryview(buffer)
+        self._closer = closer
+        self._names = {}
+        # offset of mapping node -> {key: offset of value node}
+        self._map_indexes = {}
+
+        magic, self._root_offset, self._strings_count, self._index_offset = \
+            _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise RamlSharedSpecException("Not an encoded RAML tree")
+
+    @property
+    def root(self):
+        """ View of the root entity
+
+        :rtype: ModelView
+        """
+        return self._value(self._root_offset)
+
+    def close(self):
+        """ Release the buffer. Views must not be used afterwards. """
+        if self._buffer is not None:
+            if not six.PY2:
+                self._buffer.release()
+            self._buffer = None
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, index):
+        offset, length = _PAIR.unpack_from(
+            self._buffer, self._index_offset + _PAIR.size * index)
+        return codecs.utf_8_decode(self._buffer[offset:offset + length])[0]
+
+    def _name(self, index):
+        """ Decode model class or field name, these are few and cached """
+        name = self._names.get(index)
+        if name is None:
+            name = self._names[index] = self._string(index)
+        return name
+
+    def _map_index(self, offset):
+        """ Return index of keys of mapping node at ``offset``, decoded
+        on first lookup in the mapping and shared by all its views
+
+        :return: keys mapped to offsets of their value nodes
+        :rtype: dict
+        """
+        index = self._map_indexes.get(offset)
+        if index is None:
+            buf = self._buffer
+            index = {}
+            for i in range(_UINT.unpack_from(buf, offset + 1)[0]):
+                key_offset, value_offset = _PAIR.unpack_from(
+                    buf, offset + 5 + _PAIR.size * i)
+                index.setdefault(self._value(key_offset), value_offset)
+            self._map_indexes[offset] = index
+        return index
+
+    def _value(self, offset, parent=None):
+        """ Decode node at ``offset``: scalars are returned as is,
+        containers and models as views.
+        """
+        buf = self._buffer
+        tag = six.indexbytes(buf, offset)
+        offset += 1
+        if tag == _STRING:
+            return self._string(_UINT.unpack_from(buf, offset)[0])
+        if tag == _MODEL:
+            return ModelView(self, offset - 1, parent)
+        if tag == _MAP:
+            return MapView(self, offset - 1, parent)
+        if tag == _LIST:
+            return ListView(self, offset - 1, parent)
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INTEGER:
+            return _INT.unpack_from(buf, offset)[0]
+        if tag == _FLOAT_NUM:
+            return _FLOAT.unpack_from(buf, offset)[0]
+        if tag == _BIG_INTEGER:
+            return int(self._string(_UINT.unpack_from(buf, offset)[0]))
+        if tag == _XML:
+            from .fields import parse_xml_string
+            return parse_xml_string(
+                self._string(_UINT.unpack_from(buf, offset)[0]))
+        raise RamlSharedSpecException(
+            "Unknown node tag {0} at {1}".format(tag, offset - 1))
+
+    def _data(self, offset):
+        """ Decode node at ``offset`` into :func:`pyraml.serialization.to_data`
+        representation.
+        """
+        # Containers are created with placeholders, filled when their
+        # (node offset, container, key) entry is popped
+        holder = [None]
+        stack = [(offset, holder, 0)]
+        while stack:
+            offset, target, key = stack.pop()
+            target[key] = self._data_node(offset, stack)
+        return holder[0]
+
+    def _data_node(self, offset, stack):
+        """ Decode node at ``offset`` pushing its children to ``stack`` """
+        buf = self._buffer
+        tag = six.indexbytes(buf, offset)
+        if tag == _MODEL:
+            class_name, count = _PAIR.unpack_from(buf, offset + 1)
+            fields = {}
+            for i in range(count):
+                name, value_offset = _PAIR.unpack_from(
+                    buf, offset + 1 + _PAIR.size * (i + 1))
+                name = self._name(name)
+                fields[name] = None
+                stack.append((value_offset, fields, name))
+            return {'model': self._name(class_name), 'fields': fields}
+        if tag == _MAP:
+            count = _UINT.unpack_from(buf, offset + 1)[0]
+            pairs = []
+            for i in range(count):
+                pair = [None, None]
+                pairs.append(pair)
+                key, val = _PAIR.unpack_from(
+                    buf, offset + 5 + _PAIR.size * i)
+                stack.append((key, pair, 0))
+                stack.append((val, pair, 1))
+            return {'map': pairs}
+        if tag == _LIST:
+            count = _UINT.unpack_from(buf, offset + 1)[0]
+            items = [None] * count
+            stack.extend(
+                (_UINT.unpack_from(buf, offset + 5 + 4 * i)[0], items, i)
+                for i in range(count))
+            return items
+        if tag == _XML:
+            return {'xml': self._string(_UINT.unpack_from(buf, offset + 1)[0])}
+        return self._value(offset)
+
+
+class _View(object):
+    __slots__ = ('_spec', '_offset', '_parent')
+
+    def __init__(self, spec, offset, parent=None):
+        self._spec = spec
+        self._offset = offset
+        self._parent = parent
+
+    def materialize(self):
+        """ Decode the viewed value into regular entities
+
+        :rtype: pyraml.model.Model, OrderedDict or list
+        """
+        return from_data(self._spec._data(self._offset))
+
+
+class ModelView(_View):
+    """ Read-only view of an encoded entity.
+
+    Fields are available as attributes, same as on the entity. Field
+    values which are entities, mappings or lists are views too.
+    """
+    __slots__ = ()
+
+    @property
+    def model_class(self):
+        """ Class of the viewed entity """
+        spec = self._spec
+        class_name = _UINT.unpack_from(spec._buffer, self._offset + 1)[0]
+        return getattr(entities, spec._name(class_name))
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        model_class = self.model_class
+        if name not in model_class._structure:
+            raise AttributeError(
+                "{0!r} object has no attribute {1!r}".format(
+                    model_class.__name__, name))
+        if name == 'parentResource':
+            return self._parent
+
+        spec = self._spec
+        buf = spec._buffer
+        count = _UINT.unpack_from(buf, self._offset + 5)[0]
+        for i in range(count):
+            field_name, value_offset = _PAIR.unpack_from(
+                buf, self._offset + 1 + _PAIR.size * (i + 1))
+            if spec._name(field_name) == name:
+                parent = self if name == 'resources' and \
+                    model_class is entities.RamlResource else None
+                return spec._value(value_offset, parent)
+        return None
+
+    def __repr__(self):
+        return "<{0} of {1}>".format(
+            self.__class__.__name__, self.model_class.__name__)
+
+
+class MapView(_View, Mapping):
+    """ Read-only view of an encoded mapping, keys keep document order.
+
+    Keys are decoded on the first lookup in the mapping and indexed, see
+    :meth:`SharedSpec._map_index`.
+    """
+    __slots__ = ()
+
+    def _pairs(self):
+        buf = self._spec._buffer
+        count = _UINT.unpack_from(buf, self._offset + 1)[0]
+        for i in range(count):
+            yield _PAIR.unpack_from(buf, self._offset + 5 + _PAIR.size * i)
+
+    def __getitem__(self, key):
+        spec = self._spec
+        try:
+            value_offset = spec._map_index(self._offset)[key]
+        except TypeError:
+            # Unhashable key
+            raise KeyError(key)
+        return spec._value(value_offset, self._parent)
+
+    def __iter__(self):
+        spec = self._spec
+        for key_offset, _ in self._pairs():
+            yield spec._value(key_offset)
+
+    def __len__(self):
+        return _UINT.unpack_from(self._spec._buffer, self._offset + 1)[0]
+
+    def __repr__(self):
+        return "<{0} of {1} items>".format(self.__class__.__name__, len(self))
+
+
+class ListView(_View, Sequence):
+    """ Read-only view of an encoded list """
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError(index)
+        offset = _UINT.unpack_from(
+            self._spec._buffer, self._offset + 5 + 4 * index)[0]
+        return self._spec._value(offset, self._parent)
+
+    def __len__(self):
+        return _UINT.unpack_from(self._spec._buffer, self._offset + 1)[0]
+
+    def __repr__(self):
+        return "<{0} of {1} items>".format(self.__class__.__name__, len(self))
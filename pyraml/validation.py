@@ -0,0 +1,425 @@
+__author__ = 'ad'
+
+import re
+import json
+
+import six
+from six.moves import urllib_parse as urlparse
+
+from .routing import RouteTable
+from .fields import parse_xml_string, is_xml_element
+from .schemas import RamlSchemaException, XMLSchemaCache, xsd_supported
+
+
+__all__ = ["ParameterCheck", "RoutePlan", "ValidationPlans", "LatencyCounter"]
+
+
+_NUMBER_TYPES = six.integer_types + (float,)
+
+
+def _to_integer(value):
+    return int(value)
+
+
+def _to_number(value):
+    return float(value)
+
+
+def _to_boolean(value):
+    if value not in ('true', 'false'):
+        raise ValueError(value)
+    return value == 'true'
+
+
+def _to_string(value):
+    return value
+
+
+# Converters of raw parameter values per named parameter type, dates and
+# files are not checked beyond presence
+_CONVERTERS = {
+    'string': _to_string,
+    'integer': _to_integer,
+    'number': _to_number,
+    'boolean': _to_boolean,
+    'date': _to_string,
+    'file': _to_string,
+}
+
+
+class ParameterCheck(object):
+    """ Validation of values of a named parameter compiled from one or
+    more alternative RamlNamedParameters declarations.
+    """
+    __slots__ = ('name', 'required', 'repeat', 'alternatives')
+
+    def __init__(self, name, declaration, required_by_default=False):
+        """
+        :param name: parameter name
+        :type name: str
+
+        :param declaration: declaration or list of alternatives
+        :type declaration: pyraml.entities.RamlNamedParameters or list
+
+        :param required_by_default: whether the parameter is required
+            if declaration doesn't tell, e.g. URI parameters
+        :type required_by_default: bool
+        """
+        if not isinstance(declaration, list):
+            declaration = [declaration]
+        declaration = [d for d in declaration if d is not None]
+        self.name = name
+        self.required = any(
+            d.required if d.required is not None else required_by_default
+            for d in declaration) if declaration else required_by_default
+        self.repeat = any(d.repeat for d in declaration)
+        self.alternatives = [_compile_alternative(d) for d in declaration]
+
+    def check(self, values):
+        """
+        Validate values of the parameter in a request
+
+        :param values: values given in the request, may be empty
+        :type values: list of str
+
+        :return: error message or None
+        """
+        if not values:
+            if self.required:
+                return "{0}: required".format(self.name)
+            return None
+        if len(values) > 1 and not self.repeat:
+            return "{0}: can't be repeated".format(self.name)
+        if not self.alternatives:
+            return None
+        for value in values:
+            error = None
+            for alternative in self.alternatives:
+                error = _check_alternative(alternative, value)
+                if error is None:
+                    break
+            if error is not None:
+                return "{0}: {1}".format(self.name, error)
+        return None
+
+
+def _compile_alternative(declaration):
+    return (
+        _CONVERTERS.get(declaration.type or 'string', _to_string),
+        declaration.type or 'string',
+        frozenset(six.text_type(v) for v in declaration.enum)
+        if declaration.enum else None,
+        re.compile(declaration.pattern) if declaration.pattern else None,
+        declaration.minLength,
+        declaration.maxLength,
+        declaration.minimum,
+        declaration.maximum,
+    )
+
+
+def _check_alternative(alternative, value):
+    convert, type_name, enum, pattern, min_length, max_length, \
+        minimum, maximum = alternative
+    try:
+        converted = convert(value)
+    except ValueError:
+        return "{0!r} is not {1}".format(value, type_name)
+    if enum is not None and value not in enum and \
+            six.text_type(converted) not in enum:
+        return "{0!r} is not one of {1}".format(value, sorted(enum))
+    if pattern is not None and pattern.search(value) is None:
+        return "{0!r} doesn't match {1}".format(value, pattern.pattern)
+    if min_length is not None and len(value) < min_length:
+        return "{0!r} is shorter than {1}".format(value, min_length)
+    if max_length is not None and len(value) > max_length:
+        return "{0!r} is longer than {1}".format(value, max_length)
+    if isinstance(converted, _NUMBER_TYPES) and \
+            not isinstance(converted, bool):
+        if minimum is not None and converted < minimum:
+            return "{0!r} is less than {1}".format(value, minimum)
+        if maximum is not None and converted > maximum:
+            return "{0!r} is greater than {1}".format(value, maximum)
+    return None
+
+
+class RoutePlan(object):
+    """ Everything needed to validate traffic of one method of a
+    resource, compiled once.
+
+    :ivar name: e.g. ``"GET /users/{userId}"``
+    :ivar query: list of ParameterCheck of query parameters
+    :ivar headers: list of ParameterCheck of headers, names lower case
+    :ivar uri: list of ParameterCheck of URI parameters
+    :ivar bodies: media type to body validator (callable returning an
+        error or None), None if request body isn't described
+    :ivar needs_body: whether request body has to be read to validate it
+    :ivar statuses: declared response status codes, None if there are none
+    """
+    __slots__ = ('name', 'query', 'headers', 'uri', 'bodies', 'needs_body',
+                 'statuses')
+
+    def __init__(self, name, method, uri_parameters, schemas=None,
+                 xml_schemas=None):
+        """
+        :param name: route name
+        :type name: str
+
+        :type method: pyraml.entities.RamlMethod
+
+        :param uri_parameters: URI parameters declared by the resource
+            and its parents
+        :type uri_parameters: dict
+
+        :param schemas: named schemas of the API
+        :type schemas: dict
+
+        :param xml_schemas: cache of compiled XML schemas, bodies of XML
+            media types aren't validated against their schemas if it's
+            not given or lxml isn't installed
+        :type xml_schemas: pyraml.schemas.XMLSchemaCache
+        """
+        self.name = name
+        self.query = [ParameterCheck(n, d) for n, d in
+                      (method.queryParameters or {}).items()]
+        self.headers = [ParameterCheck(n.lower(), d) for n, d in
+                        (method.headers or {}).items()]
+        self.uri = [ParameterCheck(n, d, required_by_default=True)
+                    for n, d in uri_parameters.items()]
+        self.bodies = None
+        if method.body:
+            self.bodies = dict(
+                (media_type, _body_validator(
+                    media_type, body, schemas, xml_schemas))
+                for media_type, body in method.body.items())
+        self.needs_body = self.bodies is not None and any(
+            validator is not None for validator in self.bodies.values())
+        # None if no status can be checked
+        self.statuses = _status_codes(method.responses) or None
+
+    def validate_request(self, uri_values, query_string, headers, body=None,
+                         content_type=None):
+        """
+        Validate a request
+
+        :param uri_values: URI parameter values of the matched route
+        :type uri_values: dict
+
+        :param query_string: raw query string
+        :type query_string: str
+
+        :param headers: callable returning list of values of a header
+            given its lower case name
+
+        :param body: request body, checked only if :attr:`needs_body`.
+            None if it hasn't been read.
+        :type body: bytes
+
+        :param content_type: media type of the body, without parameters
+        :type content_type: str
+
+        :return: list of errors, empty if the request is valid
+        :rtype: list of str
+        """
+        errors = []
+        for check in self.uri:
+            value = uri_values.get(check.name)
+            error = check.check([value] if value is not None else [])
+            if error is not None:
+                errors.append(error)
+
+        if self.query:
+            query = urlparse.parse_qs(query_string, keep_blank_values=True) \
+                if query_string else {}
+            for check in self.query:
+                error = check.check(query.get(check.name))
+                if error is not None:
+                    errors.append(error)
+
+        for check in self.headers:
+            error = check.check(headers(check.name))
+            if error is not None:
+                errors.append(error)
+
+        if self.bodies is not None:
+            if content_type is None:
+                if body:
+                    errors.append("body: missing media type")
+            elif content_type not in self.bodies:
+                errors.append("body: unexpected media type {0}".format(
+                    content_type))
+            else:
+                validator = self.bodies[content_type]
+                error = validator(body) \
+                    if validator is not None and body is not None else None
+                if error is not None:
+                    errors.append("body: {0}".format(error))
+        return errors
+
+    def validate_status(self, status):
+        """ Return error if response ``status`` isn't declared, or None """
+        if self.statuses is None or status in self.statuses:
+            return None
+        return "response: undeclared status {0}".format(status)
+
+
+class ValidationPlans(object):
+    """ Validation plans of all methods of all resources of a RAML tree """
+
+    def __init__(self, root, prefix=None):
+        """
+        :param root: parsed RAML tree
+        :type root: pyraml.entities.RamlRoot
+
+        :param prefix: path prefix of requests, see
+            :class:`pyraml.routing.RouteTable`
+        :type prefix: str
+        """
+        self.routes = RouteTable(root, prefix)
+        self.plans = {}
+        # XML schemas are compiled when a body is validated against them
+        self.xml_schemas = XMLSchemaCache()
+        schemas = root.schemas or {}
+        for route in self.routes.routes:
+            uri_parameters = _uri_parameters(route.resource)
+            self.plans[route] = dict(
+                (method_name.upper(), RoutePlan(
+                    '{0} {1}'.format(method_name.upper(), route.template),
+                    method, uri_parameters, schemas, self.xml_schemas))
+                for method_name, method in
+                (route.resource.methods or {}).items()
+                if method is not None)
+
+    def match(self, http_method, path, raw=False):
+        """
+        Find plan of a request
+
+        :param raw: ``path`` is percent-encoded, see
+            :meth:`pyraml.routing.RouteTable.match`
+        :type raw: bool
+
+        :return: 2 elements tuple: RoutePlan and URI parameter values, or
+            (None, None) if the request isn't described
+        """
+        route, uri_values = self.routes.match(path, raw)
+        if route is None:
+            return None, None
+        plan = self.plans[route].get(http_method)
+        if plan is None:
+            return None, None
+        return plan, uri_values
+
+
+class LatencyCounter(object):
+    """ Number, total and maximal duration of validations of a route """
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return {'count': self.count, 'total': self.total,
+                'max': self.max}.__repr__()
+
+
+def _uri_parameters(resource):
+    """ URI parameters declared by ``resource`` and its parents, nearest
+    declaration wins
+    """
+    parameters = {}
+    while resource is not None:
+        for name, declaration in (resource.uriParameters or {}).items():
+            parameters.setdefault(name, declaration)
+        resource = resource.parentResource
+    return parameters
+
+
+def _status_codes(responses):
+    """ Return frozenset of integer status codes of ``responses``,
+    keys which aren't integers are skipped
+    """
+    codes = set()
+    for code in responses or ():
+        try:
+            codes.add(int(code))
+        except (TypeError, ValueError):
+            continue
+    return frozenset(codes)
+
+
+def _body_validator(media_type, body, schemas, xml_schemas=None):
+    """ Return callable validating request body of ``media_type`` or None
+    if there is nothing to validate
+    """
+    schema = body.schema if body is not None else None
+    if isinstance(schema, six.string_types) and schema in schemas:
+        schema = schemas[schema]
+
+    if 'json' in media_type:
+        jsonschema = _jsonschema()
+        validator = None
+        if isinstance(schema, dict) and jsonschema is not None:
+            validator_class = jsonschema.validators.validator_for(schema)
+            try:
+                validator_class.check_schema(schema)
+            except jsonschema.exceptions.SchemaError:
+                # Invalid schema, check the document is well-formed
+                pass
+            else:
+                validator = validator_class(schema)
+        return lambda data: _validate_json(data, validator)
+    if 'xml' in media_type:
+        if xml_schemas is not None and is_xml_element(schema) and \
+                xsd_supported():
+            return lambda data: _validate_xml_schema(data, schema, xml_schemas)
+        return _validate_xml
+    return None
+
+
+def _validate_json(data, validator):
+    try:
+        document = json.loads(data.decode('utf-8'))
+    except ValueError as e:
+        return "invalid JSON: {0}".format(e)
+    if validator is not None:
+        error = next(iter(validator.iter_errors(document)), None)
+        if error is not None:
+            return error.message
+    return None
+
+
+def _validate_xml(data):
+    try:
+        parse_xml_string(data, untrusted=True)
+    except Exception as e:
+        return "invalid XML: {0}".format(e)
+    return None
+
+
+def _validate_xml_schema(data, schema, xml_schemas):
+    try:
+        errors = xml_schemas.validate(schema, data)
+    except RamlSchemaException:
+        # Schema can't be compiled, check the document is well-formed
+        return _validate_xml(data)
+    return "invalid XML: {0}".format(errors[0]) if errors else None
+
+
+def _jsonschema():
+    """ Return ``jsonschema`` module if it's installed, or None """
+    try:
+        import jsonschema
+    except ImportError:
+        return None
+    return jsonschema
@@ -0,0 +1,36 @@
+# ASGI test helpers. Python 3.5+ syntax: import only when ``ASGI`` of
+# tests/base.py is true.
+import asyncio
+
+
+def call_asgi(app, scope, body=b''):
+    """ Run ASGI ``app`` on a request with ``body`` and return messages
+    it sent
+    """
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {'type': 'http.request', 'body': body}
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(app(scope, receive, send))
+    finally:
+        loop.close()
+    return sent
+
+
+def recording_app(bodies, status):
+    """ Return ASGI app appending request bodies to ``bodies`` and
+    answering with empty ``status`` responses
+    """
+    async def app(scope, receive, send):
+        message = await receive()
+        bodies.append(message['body'])
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+    return app
@@ -1,9 +1,14 @@
 import os
+import sys
 from unittest import TestCase
 
 from pyraml import parser
 
 
+# ASGI applications and tests/asgi_client.py require Python 3.5+
+ASGI = sys.version_info >= (3, 5)
+
+
 class SampleParseTestCase(TestCase):
     samples_dir = os.path.join(
         os.path.dirname(__file__), 'samples')
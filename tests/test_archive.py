@@ -0,0 +1,96 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+import mock
+import six
+
+from pyraml import parser, RamlNotFoundException
+from pyraml import archive as archive_module
+from pyraml.archive import RamlArchive, RamlArchiveException
+from pyraml.hashing import content_hash
+from pyraml.provenance import include_source
+
+from .base import SampleParseTestCase
+
+
+TWICE_INCLUDED = b"""#%RAML 0.8
+title: !include include/include-non-yaml-single-line.txt
+baseUri: http://localhost
+/first:
+  description: !include include/include-non-yaml-single-line.txt
+/second:
+  description: !include include/include-non-yaml-single-line.txt
+"""
+
+
+class ArchiveLoadTestCase(SampleParseTestCase):
+    """ Test loading of specs packed in archives. """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        samples = self.sample_path()
+        self.zip_path = os.path.join(self.tmpdir, 'specs.zip')
+        with zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_DEFLATED) as f:
+            for name in self._sample_files(samples):
+                f.write(os.path.join(samples, name), name)
+            f.writestr('twice.raml', TWICE_INCLUDED)
+        self.tar_path = os.path.join(self.tmpdir, 'specs.tar.gz')
+        with tarfile.open(self.tar_path, 'w:gz') as f:
+            for name in self._sample_files(samples):
+                f.add(os.path.join(samples, name), './' + name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @staticmethod
+    def _sample_files(samples):
+        for dir_path, _, file_names in os.walk(samples):
+            for file_name in file_names:
+                yield os.path.relpath(
+                    os.path.join(dir_path, file_name), samples).replace(
+                    os.sep, '/')
+
+    def test_load_zip_member(self):
+        data = parser.load(self.zip_path + '!/multi-level-inclusion.yaml')
+        expected = self.load('multi-level-inclusion.yaml')
+        self.assertEqual(content_hash(data), content_hash(expected))
+        self.assertEqual(
+            include_source(data.documentation[0].content),
+            self.zip_path + '!/include/include-non-yaml-single-line.txt')
+
+    def test_load_tar_member(self):
+        with RamlArchive(self.tar_path) as archive:
+            self.assertIn('include/get.yaml', archive.names())
+            data = archive.load('root-elements-includes.yaml', trusted=True)
+        expected = self.load('root-elements-includes.yaml')
+        self.assertEqual(content_hash(data), content_hash(expected))
+        self.assertEqual(data.title, expected.title)
+
+    def test_member_decompressed_once(self):
+        with mock.patch.object(archive_module, '_read_member',
+                               wraps=archive_module._read_member) as read:
+            data = parser.load(self.zip_path + '!/twice.raml')
+        read_names = [call[0][1].filename for call in read.call_args_list]
+        self.assertEqual(sorted(read_names), [
+            'include/include-non-yaml-single-line.txt', 'twice.raml'])
+        self.assertEqual(data.resources['/first'].description, data.title)
+
+    def test_non_ascii_member_text(self):
+        with zipfile.ZipFile(self.zip_path, 'a') as f:
+            f.writestr('title.txt', u'caf\xe9'.encode('utf-8'))
+        with RamlArchive(self.zip_path) as archive:
+            content, _ = archive.fetch(archive.location('title.txt'))
+            self.assertEqual(six.text_type(content), u'caf\xe9')
+            self.assertEqual(str(content),
+                             u'caf\xe9' if six.PY3 else b'caf\xc3\xa9')
+
+    def test_missing_member(self):
+        self.assertRaises(RamlNotFoundException, parser.load,
+                          self.zip_path + '!/no-such.raml')
+
+    def test_not_an_archive(self):
+        self.assertRaises(RamlArchiveException, RamlArchive,
+                          self.sample_path('full-config.yaml'))
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+
+from .base import SampleParseTestCase
+from pyraml.bundle import (
+    bundle, write_bundle, load_bundle, RamlBundleException)
+from pyraml.serialization import to_data
+
+
+class BundleTestCase(SampleParseTestCase):
+    """ Test writing and loading of single file bundles. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bundle_path = os.path.join(self.tmp_dir, 'api.bundle')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_bundle_round_trip(self):
+        data = self.load('full-config.yaml')
+        write_bundle(data, self.bundle_path)
+        loaded = load_bundle(self.bundle_path)
+        self.assertEqual(to_data(loaded), to_data(data))
+        self.assertEqual(list(loaded.resources.keys()),
+                         ['/', '/media', '/tags'])
+        self.assertIn(200, loaded.resources['/media'].methods['get'].responses)
+        media_id = loaded.resources['/media'].resources['/{mediaId}']
+        self.assertIs(media_id.parentResource, loaded.resources['/media'])
+
+    def test_bundle_resolves_includes(self):
+        bundle(self.sample_path('include', 'include-action.yaml'),
+               self.bundle_path)
+        loaded = load_bundle(self.bundle_path)
+        self.assertEqual(
+            loaded.resources['/simple'].methods['get'].description,
+            'get something')
+        self.assertEqual(
+            loaded.baseUriParameters['host'].description.strip(),
+            'included title')
+
+    def test_corrupted_bundle(self):
+        bundle(self.sample_path('null-elements.yaml'), self.bundle_path)
+        with open(self.bundle_path, 'rb') as f:
+            content = f.read()
+        with open(self.bundle_path, 'wb') as f:
+            f.write(content.replace(b'title', b'Title'))
+        self.assertRaises(
+            RamlBundleException, load_bundle, self.bundle_path)
@@ -0,0 +1,97 @@
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import importlib
+
+from .base import SampleParseTestCase
+from pyraml.codegen import compile_spec, is_stale
+from pyraml.resolvers import MemoryResolver
+from pyraml.serialization import to_data
+
+
+class CodegenTestCase(SampleParseTestCase):
+    """ Test compiling RAML files to Python modules. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        sys.path.insert(0, self.tmp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp_dir)
+        sys.modules.pop('generated_api', None)
+        shutil.rmtree(self.tmp_dir)
+
+    def compile(self, *parts):
+        path = os.path.join(self.tmp_dir, 'generated_api.py')
+        compile_spec(self.sample_path(*parts), path)
+        return importlib.import_module('generated_api')
+
+    def test_generated_module_builds_tree(self):
+        module = self.compile('full-config.yaml')
+        self.assertEqual(to_data(module.root),
+                         to_data(self.load('full-config.yaml')))
+        self.assertFalse(is_stale(module))
+
+    def test_stale_module_detected(self):
+        spec_dir = os.path.join(self.tmp_dir, 'include')
+        shutil.copytree(self.sample_path('include'), spec_dir)
+        path = os.path.join(self.tmp_dir, 'generated_api.py')
+        compile_spec(os.path.join(spec_dir, 'include-action.yaml'), path)
+        module = importlib.import_module('generated_api')
+        self.assertEqual(
+            module.root.resources['/simple'].methods['get'].description,
+            'get something')
+        self.assertEqual(len(module.SOURCES), 3)
+        self.assertFalse(is_stale(module))
+
+        with open(os.path.join(spec_dir, 'get.yaml'), 'a') as f:
+            f.write('\n# changed\n')
+        self.assertTrue(is_stale(module))
+
+    def test_archive_member(self):
+        archive_path = os.path.join(self.tmp_dir, 'specs.zip')
+
+        def write_archive(get_yaml):
+            with zipfile.ZipFile(archive_path, 'w') as f:
+                for name in ('include-action.yaml',
+                             'include-non-yaml-single-line.txt'):
+                    f.write(self.sample_path('include', name), name)
+                f.writestr('get.yaml', get_yaml)
+
+        write_archive('description: get something\n')
+        path = os.path.join(self.tmp_dir, 'generated_api.py')
+        compile_spec(archive_path + '!/include-action.yaml', path)
+        module = importlib.import_module('generated_api')
+        self.assertEqual(
+            module.root.resources['/simple'].methods['get'].description,
+            'get something')
+        self.assertEqual(module.SOURCE, archive_path + '!/include-action.yaml')
+        self.assertEqual(len(module.SOURCES), 3)
+        self.assertIn(archive_path + '!/get.yaml', module.SOURCES)
+        self.assertFalse(is_stale(module))
+
+        write_archive('description: changed\n')
+        self.assertTrue(is_stale(module))
+
+    def test_resolver_sources(self):
+        resolver = MemoryResolver({
+            'mem://api.raml': '#%RAML 0.8\ntitle: !include title.txt\n'
+                              'baseUri: http://localhost\n'
+                              'traits: [!include traits.yaml]\n',
+            'mem://title.txt': 'Generated API',
+            'mem://traits.yaml': {'paged': {'description': 'Paged'}},
+        })
+        resolvers = {'mem://': resolver}
+        path = os.path.join(self.tmp_dir, 'generated_api.py')
+        compile_spec('mem://api.raml', path, resolvers=resolvers)
+        module = importlib.import_module('generated_api')
+        self.assertEqual(module.root.title, 'Generated API')
+        self.assertEqual(module.SOURCES, [
+            'mem://api.raml', 'mem://title.txt', 'mem://traits.yaml'])
+        self.assertFalse(is_stale(module, resolvers))
+
+        resolver.add('mem://traits.yaml', {'paged': {'description': 'x'}})
+        self.assertTrue(is_stale(module, resolvers))
+        self.assertTrue(is_stale(module))
@@ -0,0 +1,41 @@
+from .base import SampleParseTestCase
+from pyraml.footprint import memory_footprint
+from pyraml.provenance import include_source
+
+
+class FootprintTestCase(SampleParseTestCase):
+    """ Test memory footprint reports of parsed trees. """
+
+    def test_sizes_by_entity(self):
+        data = self.load('full-config.yaml')
+        report = memory_footprint(data)
+        self.assertEqual(report.instances['RamlRoot'], 1)
+        self.assertEqual(report.instances['RamlResource'], 5)
+        self.assertIn('JSONData', report.by_entity)
+        self.assertIn('XMLData', report.by_entity)
+        self.assertEqual(sum(report.by_entity.values()), report.total)
+        self.assertEqual(sum(report.by_include.values()), report.total)
+        self.assertEqual(list(report.by_include.keys()), [None])
+
+    def test_sizes_by_include(self):
+        data = self.load('include', 'include-action.yaml')
+        report = memory_footprint(data)
+        get_path = self.sample_path('include', 'get.yaml')
+        txt_path = self.sample_path(
+            'include', 'include-non-yaml-single-line.txt')
+        self.assertEqual(
+            set(report.by_include.keys()), set([None, get_path, txt_path]))
+        self.assertGreater(report.by_include[get_path], 0)
+        self.assertEqual(
+            include_source(data.resources['/simple'].methods['get']),
+            get_path)
+        self.assertEqual(
+            include_source(data.baseUriParameters['host'].description),
+            txt_path)
+
+    def test_decoded_json_include_attributed(self):
+        data = self.load('include-body-example-json.yaml')
+        report = memory_footprint(data)
+        json_path = self.sample_path('include', 'include-example.json')
+        self.assertEqual(report.by_include[json_path],
+                         report.by_entity['JSONData'])
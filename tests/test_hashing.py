@@ -0,0 +1,87 @@
+from .base import SampleParseTestCase
+from pyraml import entities
+from pyraml.hashing import content_hash, diff, canonicalize, TreeHasher
+from pyraml.footprint import memory_footprint
+
+
+class HashingTestCase(SampleParseTestCase):
+    """ Test content hashes and structural diff of parsed trees. """
+
+    def test_equal_trees_equal_hashes(self):
+        old = self.load('full-config.yaml')
+        new = self.load('full-config.yaml')
+        self.assertEqual(content_hash(old), content_hash(new))
+        self.assertFalse(diff(old, new))
+
+    def test_subtree_hashes(self):
+        data = self.load('full-config.yaml')
+        hasher = TreeHasher()
+        media = data.resources['/media']
+        self.assertEqual(
+            hasher.hash(media),
+            TreeHasher().hash(self.load('full-config.yaml').resources['/media']))
+        self.assertNotEqual(hasher.hash(media),
+                            hasher.hash(data.resources['/tags']))
+
+    def test_diff_paths(self):
+        old = self.load('full-config.yaml')
+        new = self.load('full-config.yaml')
+        get = new.resources['/media'].methods['get']
+        get.description = 'changed'
+        get.responses[201] = entities.RamlResponse(description='created')
+        del new.resources['/tags']
+        result = diff(old, new)
+        self.assertEqual(result.changed, [
+            ('resources', '/media', 'methods', 'get', 'description')])
+        self.assertEqual(result.added, [
+            ('resources', '/media', 'methods', 'get', 'responses', 201)])
+        self.assertEqual(result.removed, [('resources', '/tags')])
+
+    def test_diff_field_added_and_removed(self):
+        old = self.load('full-config.yaml')
+        new = self.load('full-config.yaml')
+        old.mediaType = None
+        new.resources['/'].displayName = None
+        result = diff(old, new)
+        self.assertEqual(result.added, [('mediaType',)])
+        self.assertEqual(result.removed, [('resources', '/', 'displayName')])
+
+
+class CanonicalizeTestCase(SampleParseTestCase):
+    """ Test sharing of structurally equal subtrees. """
+
+    def test_equal_subtrees_shared(self):
+        data = canonicalize(self.load('duplicated-subtrees.yaml'))
+        users_get = data.resources['/users'].methods['get']
+        user_get = data.resources['/users'].resources['/{id}'].methods['get']
+        orders_get = data.resources['/orders'].methods['get']
+        self.assertIs(users_get.queryParameters['page'],
+                      orders_get.queryParameters['page'])
+        self.assertIs(users_get.responses[200], user_get.responses[200])
+        self.assertIs(users_get.responses[404], orders_get.responses[404])
+
+    def test_null_placeholders_shared_per_tree(self):
+        first = canonicalize(self.load('duplicated-subtrees.yaml'))
+        second = canonicalize(self.load('duplicated-subtrees.yaml'))
+        placeholder = first.resources['/users'].methods['get'].responses[404]
+        self.assertTrue(placeholder.notNull)
+        self.assertIsNot(
+            second.resources['/users'].methods['get'].responses[404],
+            placeholder)
+        data = canonicalize(self.load('null-elements.yaml'))
+        body = data.resources['/leagues'].methods['get'].responses[200].body
+        self.assertIs(body['application/json'], body['text/xml'])
+
+    def test_content_preserved(self):
+        data = self.load('duplicated-subtrees.yaml')
+        before = content_hash(data)
+        self.assertEqual(content_hash(canonicalize(data)), before)
+
+    def test_memory_reduced(self):
+        data = self.load('duplicated-subtrees.yaml')
+        before = memory_footprint(data)
+        after = memory_footprint(canonicalize(data))
+        self.assertEqual(before.instances['RamlNamedParameters'], 6)
+        self.assertEqual(after.instances['RamlNamedParameters'], 2)
+        self.assertEqual(after.instances['RamlResponse'], 2)
+        self.assertLess(after.total, before.total * 0.75)
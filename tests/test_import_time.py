@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+from unittest import TestCase
+
+
+# Wall-clock import time budgets are checked by
+# benchmarks/bench_import_time.py
+HEAVY_MODULES = ['yaml', 'json', 'lxml', 'mimetypes', 'urllib.request',
+                 'xml.etree.ElementTree']
+
+
+def run_python(code):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, '-c', code], cwd=cwd, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    assert process.returncode == 0, stderr
+    return stdout.decode('utf-8')
+
+
+class ImportTimeTestCase(TestCase):
+    """ Keep import of pyraml cheap. """
+
+    def test_entities_import_no_heavy_modules(self):
+        stdout = run_python(
+            'import sys, pyraml, pyraml.entities, pyraml.serialization; '
+            'print(",".join(m for m in {0!r} if m in sys.modules))'.format(
+                HEAVY_MODULES))
+        self.assertEqual(stdout.strip(), '')
+
+    def test_mimetypes_registry_untouched(self):
+        stdout = run_python(
+            'import mimetypes, pyraml.parser; '
+            'print(mimetypes.guess_type("api.raml")[0])')
+        self.assertNotIn('yaml', stdout)
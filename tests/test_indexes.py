@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+
+from pyraml import parser
+
+from .base import SampleParseTestCase
+
+
+class IndexesTestCase(SampleParseTestCase):
+    """ Test lookup indexes of RamlRoot. """
+
+    def test_resources_by_path(self):
+        data = self.load('full-config.yaml')
+        by_path = data.indexes.resources_by_path
+        self.assertListEqual(list(by_path.keys()), [
+            '/', '/media', '/media/{mediaId}', '/tags', '/tags/{tagId}'])
+        self.assertIs(by_path['/media/{mediaId}'],
+                      data.resources['/media'].resources['/{mediaId}'])
+
+    def test_resources_by_display_name(self):
+        data = self.load('full-config.yaml')
+        self.assertEqual(
+            data.indexes.resources_by_display_name['Media item'],
+            [data.resources['/media'].resources['/{mediaId}']])
+
+    def test_usages(self):
+        data = self.load('full-config.yaml')
+        indexes = data.indexes
+        head = data.resources['/'].methods['head']
+        self.assertEqual(indexes.by_trait['knotty'], [head])
+        self.assertIn(data.resources['/media'], indexes.by_trait['simple'])
+        self.assertIn(head, indexes.by_security_scheme['oauth_2_0'])
+        self.assertIn(data, indexes.by_security_scheme['oauth_2_0'])
+        self.assertEqual(indexes.by_resource_type['complex'],
+                         [data.resources['/media']])
+        bodies = indexes.bodies_by_schema['league-json']
+        self.assertIn(
+            data.resources['/'].methods['post'].body['application/json'],
+            bodies)
+
+    def test_bodies_indexed_by_referenced_name(self):
+        data = parser.parse(
+            '#%RAML 0.8\n'
+            'title: Schemas\n'
+            'baseUri: http://localhost\n'
+            'schemas:\n'
+            '  - user: \'{"type": "object"}\'\n'
+            '  - account: \'{"type": "object"}\'\n'
+            '/users:\n'
+            '  post:\n'
+            '    body:\n'
+            '      application/json:\n'
+            '        schema: user\n'
+            '      text/json:\n'
+            '        schema: \'{"type": "object"}\'\n'
+            '  put:\n'
+            '    body:\n'
+            '      application/json:\n'
+            '        schema: account\n', '.')
+        methods = data.resources['/users'].methods
+        by_schema = data.indexes.bodies_by_schema
+        # Inline schema equal to the declared ones isn't indexed
+        self.assertEqual(by_schema['user'],
+                         [methods['post'].body['application/json']])
+        self.assertEqual(by_schema['account'],
+                         [methods['put'].body['application/json']])
+
+        body = methods['post'].body['application/json']
+        body.schema = 'other'
+        self.assertNotIn('user', data.indexes.bodies_by_schema)
+        self.assertEqual(data.indexes.bodies_by_schema['other'], [body])
+
+    def test_indexes_cached_and_invalidated(self):
+        data = self.load('full-config.yaml')
+        indexes = data.indexes
+        self.assertIs(data.indexes, indexes)
+
+        data.resources['/media'].resources['/{mediaId}'].displayName = 'Item'
+        self.assertIsNot(data.indexes, indexes)
+        self.assertIn('Item', data.indexes.resources_by_display_name)
+
+        indexes = data.indexes
+        del data.resources['/tags']
+        data.invalidate_indexes()
+        self.assertNotIn('/tags', data.indexes.resources_by_path)
+
+    def test_assignments_tracked_once_indexed(self):
+        # Checked in a new interpreter, other tests build indexes
+        code = (
+            'from pyraml import parser, indexes\n'
+            'tracked = lambda: "__setattr__" in vars(indexes.IndexedEntity)\n'
+            'data = parser.load({0!r})\n'
+            'print(tracked())\n'
+            'data.indexes\n'
+            'print(tracked())\n').format(self.sample_path('full-config.yaml'))
+        output = subprocess.check_output(
+            [sys.executable, '-c', code], cwd=os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.split(), [b'False', b'True'])
@@ -0,0 +1,52 @@
+from .base import SampleParseTestCase
+from pyraml.instrumentation import ParseStats, ParseObserver, observe
+
+
+class InstrumentationTestCase(SampleParseTestCase):
+    """ Test reporting of parser phases to observers. """
+
+    def test_phases_reported(self):
+        stats = ParseStats()
+        with observe(stats):
+            self.load('full-config.yaml')
+        for phase in ('read', 'header', 'yaml_load'):
+            self.assertEqual(stats.phases[phase][0], 1)
+        # '/', '/media', '/media/{mediaId}', '/tags', '/tags/{tagId}'
+        self.assertEqual(stats.phases['parse_resource'][0], 5)
+        self.assertGreater(stats.phases['parse_method'][0], 0)
+
+    def test_includes_reported(self):
+        stats = ParseStats()
+        with observe(stats):
+            self.load('include', 'include-action.yaml')
+        paths = sorted(path for path, _, _ in stats.includes)
+        self.assertEqual(paths, [
+            self.sample_path('include', 'get.yaml'),
+            self.sample_path('include', 'include-non-yaml-single-line.txt'),
+        ])
+        for _, size, elapsed in stats.includes:
+            self.assertGreater(size, 0)
+            self.assertGreaterEqual(elapsed, 0)
+
+    def test_models_counted(self):
+        stats = ParseStats()
+        with observe(stats):
+            data = self.load('full-config.yaml')
+        self.assertEqual(stats.models['RamlRoot'], 1)
+        self.assertEqual(stats.models['RamlResource'], 5)
+        self.assertEqual(stats.models['RamlResourceType'],
+                         len(data.resourceTypes))
+
+    def test_observer_uninstalled(self):
+        events = []
+
+        class Observer(ParseObserver):
+            def on_phase(self, phase, elapsed, details):
+                events.append(phase)
+
+        with observe(Observer()):
+            self.load('null-elements.yaml')
+        count = len(events)
+        self.assertGreater(count, 0)
+        self.load('null-elements.yaml')
+        self.assertEqual(len(events), count)
@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+
+import mock
+
+from pyraml import parser, RamlException
+from pyraml.hashing import content_hash
+from pyraml.limits import (
+    RamlLimitException, RamlIncludeCycleException, ParseLimits)
+from pyraml.resolvers import MemoryResolver
+
+from .base import SampleParseTestCase
+
+
+# Expands to 10 ** 9 nodes through aliases
+BILLION_LAUGHS = """#%RAML 0.8
+title: Laughs
+baseUri: http://localhost
+a: &a [lol, lol, lol, lol, lol, lol, lol, lol, lol, lol]
+b: &b [*a, *a, *a, *a, *a, *a, *a, *a, *a, *a]
+c: &c [*b, *b, *b, *b, *b, *b, *b, *b, *b, *b]
+d: &d [*c, *c, *c, *c, *c, *c, *c, *c, *c, *c]
+e: &e [*d, *d, *d, *d, *d, *d, *d, *d, *d, *d]
+f: &f [*e, *e, *e, *e, *e, *e, *e, *e, *e, *e]
+g: &g [*f, *f, *f, *f, *f, *f, *f, *f, *f, *f]
+h: &h [*g, *g, *g, *g, *g, *g, *g, *g, *g, *g]
+i: [*h, *h, *h, *h, *h, *h, *h, *h, *h, *h]
+"""
+
+API = """#%RAML 0.8
+title: API
+baseUri: http://localhost
+/a: !include a.yaml
+"""
+
+
+class ParseLimitsTestCase(SampleParseTestCase):
+    """ Test limits of parses of untrusted documents. """
+
+    def assertLimitExceeded(self, limit, *args, **kwargs):
+        with self.assertRaises(RamlLimitException) as cm:
+            parser.load(*args, **kwargs)
+        self.assertEqual(cm.exception.limit, limit)
+        return cm.exception
+
+    @staticmethod
+    def memory(files):
+        files.setdefault('api.raml', API)
+        return {'mem://': MemoryResolver(dict(
+            ('mem://' + name, content) for name, content in files.items()))}
+
+    def test_within_limits(self):
+        limits = ParseLimits(max_nodes=10000, max_include_depth=3,
+                             max_includes=10, max_bytes=100000,
+                             max_seconds=60.0)
+        data = parser.load(self.sample_path('multi-level-inclusion.yaml'),
+                           limits=limits)
+        self.assertEqual(content_hash(data),
+                         content_hash(self.load('multi-level-inclusion.yaml')))
+
+    def test_alias_expansion(self):
+        exception = self.assertLimitExceeded(
+            'max_nodes', 'mem://api.raml',
+            resolvers=self.memory({'api.raml': BILLION_LAUGHS}),
+            limits=ParseLimits(max_nodes=100000))
+        self.assertIsInstance(exception, RamlException)
+        # Small documents with aliases are still parsed
+        data = parser.parse(
+            BILLION_LAUGHS.split('\nc:')[0], '.',
+            limits=ParseLimits(max_nodes=200))
+        self.assertEqual(data.title, 'Laughs')
+
+    def test_shared_loaded_data(self):
+        trait = {'description': 'x'}
+        resolvers = self.memory({
+            'api.raml': API.replace('/a: !include a.yaml',
+                                    'traits: !include traits.yaml'),
+            'traits.yaml': [dict(
+                ('t{0}'.format(i), trait) for i in range(50))]})
+        parser.load('mem://api.raml', resolvers=resolvers,
+                    limits=ParseLimits(max_nodes=200))
+        self.assertLimitExceeded(
+            'max_nodes', 'mem://api.raml', resolvers=resolvers,
+            limits=ParseLimits(max_nodes=100))
+
+    def test_include_cycle(self):
+        resolvers = self.memory({
+            'a.yaml': '/b: !include sub/b.yaml',
+            'sub/b.yaml': '/c: !include ../a.yaml'})
+        with self.assertRaises(RamlIncludeCycleException) as cm:
+            parser.load('mem://api.raml', resolvers=resolvers)
+        self.assertEqual(cm.exception.chain, (
+            'mem://a.yaml', 'mem://sub/b.yaml', 'mem://a.yaml'))
+
+    def test_local_include_cycle(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        os.mkdir(os.path.join(tmpdir, 'sub'))
+        for name, content in [('api.raml', API),
+                              ('a.yaml', 'b: !include sub/b.yaml'),
+                              ('sub/b.yaml', 'a: !include ../a.yaml')]:
+            with open(os.path.join(tmpdir, name), 'w') as f:
+                f.write(content)
+        self.assertRaises(RamlIncludeCycleException, parser.load,
+                          os.path.join(tmpdir, 'api.raml'))
+
+    def test_includes(self):
+        path = self.sample_path('multi-level-inclusion.yaml')
+        self.assertLimitExceeded('max_include_depth', path,
+                                 limits=ParseLimits(max_include_depth=1))
+        self.assertLimitExceeded('max_includes', path,
+                                 limits=ParseLimits(max_includes=1))
+
+    def test_bytes(self):
+        path = self.sample_path('multi-level-inclusion.yaml')
+        size = os.path.getsize(path)
+        # The document itself isn't read
+        with mock.patch('pyraml.parser.open', create=True) as open_:
+            self.assertLimitExceeded('max_bytes', path,
+                                     limits=ParseLimits(max_bytes=size - 1))
+        self.assertFalse(open_.called)
+        # Included resources exceed the budget
+        self.assertLimitExceeded('max_bytes', path,
+                                 limits=ParseLimits(max_bytes=size + 1))
+
+    def test_network_include(self):
+        response = mock.Mock()
+        response.headers = {'Content-Type': 'text/plain'}
+        response.read.return_value = b'x' * 1000
+        raml = API.replace('!include a.yaml',
+                           '{description: !include http://x/a.txt}')
+        with mock.patch('six.moves.urllib.request.urlopen',
+                        return_value=response):
+            with self.assertRaises(RamlLimitException):
+                parser.parse(raml, '.', limits=ParseLimits(
+                    max_bytes=len(raml) + 100))
+        response.read.assert_called_once_with(101)
+
+    def test_time(self):
+        clock = iter(range(100))
+        with mock.patch('pyraml.limits._clock', lambda: next(clock)):
+            self.assertLimitExceeded(
+                'max_seconds', self.sample_path('full-config.yaml'),
+                limits=ParseLimits(max_seconds=2))
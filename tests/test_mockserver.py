@@ -0,0 +1,124 @@
+import json
+import unittest
+
+from pyraml import parser
+from pyraml.mockserver import MockServer
+from pyraml.routing import RouteTable
+
+from mock import patch
+
+from .base import SampleParseTestCase, ASGI
+
+if ASGI:
+    from .asgi_client import call_asgi
+
+
+class RouteTableTestCase(SampleParseTestCase):
+    """ Test matching of request paths to resources. """
+
+    def setUp(self):
+        self.routes = RouteTable(self.load('full-config.yaml'), prefix='/v1')
+
+    def test_static_route(self):
+        route, params = self.routes.match('/v1/media/')
+        self.assertEqual(route.template, '/media')
+        self.assertEqual(params, {})
+
+    def test_templated_route(self):
+        route, params = self.routes.match('/v1/media/a%20b', raw=True)
+        self.assertEqual(route.template, '/media/{mediaId}')
+        self.assertEqual(params, {'mediaId': 'a b'})
+
+    def test_decoded_path_not_unquoted(self):
+        route, params = self.routes.match('/v1/media/a%2541')
+        self.assertEqual(route.template, '/media/{mediaId}')
+        self.assertEqual(params, {'mediaId': 'a%2541'})
+        _, params = self.routes.match('/v1/media/a%2541', raw=True)
+        self.assertEqual(params, {'mediaId': 'a%41'})
+
+    def test_no_match(self):
+        self.assertEqual(self.routes.match('/v1/media/1/2'), (None, None))
+        self.assertEqual(self.routes.match('/v10/media'), (None, None))
+        self.assertEqual(self.routes.match('/media'), (None, None))
+
+    def test_templated_prefix(self):
+        routes = RouteTable(self.load('full-config.yaml'))
+        self.assertEqual(routes.prefix, '/{path}')
+        route, params = routes.match('/one/tags/42')
+        self.assertEqual(route.template, '/tags/{tagId}')
+        self.assertEqual(params, {'tagId': '42'})
+
+
+class MockServerTestCase(SampleParseTestCase):
+    """ Test mock of a RAML API. """
+
+    def setUp(self):
+        self.mock = MockServer(self.load('full-config.yaml'), prefix='')
+
+    def request(self, method, path):
+        started = []
+
+        def start_response(status, headers):
+            started.append((status, dict(headers)))
+
+        body = b''.join(self.mock({'REQUEST_METHOD': method,
+                                   'PATH_INFO': path}, start_response))
+        return started[0][0], started[0][1], body
+
+    def test_example_served(self):
+        status, headers, body = self.request('GET', '/media')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(json.loads(body.decode('utf-8')), {'key': 'value'})
+
+    def test_wsgi_path_decoded_once(self):
+        # PATH_INFO of /media/a%252541 is decoded by the WSGI server
+        matches = []
+        match = self.mock.routes.match
+
+        def record(path, raw=False):
+            matches.append(match(path, raw))
+            return matches[-1]
+
+        with patch.object(self.mock.routes, 'match', record):
+            status, _, _ = self.request('GET', '/media/a%2541')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(matches[0][1], {'mediaId': 'a%2541'})
+
+    def test_response_precomputed(self):
+        first = self.mock.respond('GET', '/media/1')
+        self.assertIs(self.mock.respond('GET', '/media/2'), first)
+
+    def test_head_without_body(self):
+        self.mock = MockServer(parser.parse(
+            '#%RAML 0.8\n'
+            'title: Sample API\n'
+            'baseUri: https://example.com\n'
+            '/items:\n'
+            '  get:\n'
+            '    responses:\n'
+            '      200:\n'
+            '        body:\n'
+            '          text/plain:\n'
+            '            example: items\n', '.'))
+        status, headers, body = self.request('HEAD', '/items')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b'')
+        self.assertEqual(headers['Content-Length'], '5')
+
+    def test_errors(self):
+        status, _, _ = self.request('GET', '/missing')
+        self.assertEqual(status, '404 Not Found')
+        status, headers, _ = self.request('DELETE', '/media')
+        self.assertEqual(status, '405 Method Not Allowed')
+        self.assertEqual(headers['Allow'], 'GET, HEAD')
+
+    @unittest.skipUnless(ASGI, 'ASGI requires Python 3.5+')
+    def test_asgi(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/media'}
+        sent = call_asgi(self.mock.asgi(), scope)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'application/json'),
+                      sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'{"key":"value"}')
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from pyraml.entities import RamlMethod, RamlResource, RamlRoot
+from pyraml.serialization import to_data, from_data
+
+
+class MixinFieldsTestCase(TestCase):
+    """ Test fields declared by SecuredEntity, TraitedEntity and
+    ResourceTypedEntity mixins.
+    """
+
+    def test_part_of_structure(self):
+        self.assertIn('securedBy', RamlRoot._structure)
+        self.assertIn('is_', RamlMethod._structure)
+        self.assertIn('securedBy', RamlMethod._structure)
+        self.assertEqual(RamlResource._structure['is_'].field_name, 'is')
+        self.assertEqual(RamlResource._structure['type_'].field_name, 'type')
+
+    def test_default_to_none(self):
+        method = RamlMethod()
+        self.assertIsNone(method.is_)
+        self.assertIsNone(method.securedBy)
+        self.assertIsNone(RamlResource().type_)
+
+    def test_converted_from_json(self):
+        resource = RamlResource.from_json({
+            'is': ['paged', {'searchable': {'key': 'q'}}],
+            'type': 'collection',
+            'securedBy': [None, 'oauth_2_0'],
+        })
+        self.assertEqual(resource.is_,
+                         ['paged', {'searchable': {'key': 'q'}}])
+        self.assertEqual(resource.type_, 'collection')
+        self.assertEqual(resource.securedBy, [None, 'oauth_2_0'])
+
+    def test_type_alias(self):
+        resource = RamlResource()
+        resource.type = 'collection'
+        self.assertEqual(resource.type_, 'collection')
+        self.assertEqual(resource.type, 'collection')
+
+    def test_serialized(self):
+        resource = RamlResource.from_json({
+            'is': ['paged'], 'type': 'collection', 'securedBy': [None]})
+        copy = from_data(to_data(resource))
+        self.assertEqual(copy.is_, ['paged'])
+        self.assertEqual(copy.type_, 'collection')
+        self.assertEqual(copy.securedBy, [None])
@@ -1,5 +1,19 @@
+import os
+import mmap
+import shutil
+import tempfile
+
+import six
+
 from .base import SampleParseTestCase
-from pyraml import entities
+from pyraml import entities, parser, RamlParseException
+from pyraml.constants import MMAP_THRESHOLD
+from pyraml.limits import ParseLimits, RamlLimitException
+from pyraml.provenance import LazyIncludedText
+from pyraml.raml_elements import load_yaml
+from pyraml.hashing import content_hash, canonicalize
+from pyraml.serialization import to_data, from_data
+from pyraml.shared import SharedSpec, encode
 
 from mock import patch
 
@@ -351,7 +365,8 @@ class ResourceParseTestCase(SampleParseTestCase):
     def test_method_body_named_schema_parsed(self):
         data = self.load('full-config.yaml')
         body = data.resources['/'].methods['post'].body
-        self.assertEqual(body['application/json'].schema, 'league-json')
+        self.assertIs(body['application/json'].schema,
+                      data.schemas['league-json'])
 
     def test_method_body_multipart_parsed(self):
         data = self.load('full-config.yaml')
@@ -395,9 +410,9 @@ class ResourceParseTestCase(SampleParseTestCase):
         self.assertEqual(
             responses[200].body['application/json'].example,
             OrderedDict([(u'key', u'value')]))
-        self.assertEqual(
+        self.assertIs(
             responses[200].body['application/json'].schema,
-            'league-json')
+            data.schemas['league-json'])
         self.assertEqual(
             responses[400].body['text/xml'].example,
             '<root>none</root>')
@@ -647,3 +662,282 @@ class SecuritySchemesParseTestCase(SampleParseTestCase):
         self.assertIsNone(oauth1.describedBy.responses)
         self.assertIsNone(oauth1.describedBy.baseUriParameters)
         self.assertIsNone(oauth1.describedBy.protocols)
+
+
+class LocalFileLoadingTestCase(SampleParseTestCase):
+    """ Test loading of included local files. """
+
+    def test_non_yaml_include_is_lazy(self):
+        path = self.sample_path('include', 'include-non-yaml-single-line.txt')
+        content, mime_type = parser._load_local_file(path)
+        self.assertEqual(mime_type, 'text/plain')
+        self.assertIsInstance(content, LazyIncludedText)
+        self.assertEqual(len(content), os.path.getsize(path))
+        self.assertEqual(content.read().strip(), 'included title')
+        self.assertIs(content.read(), content.read())
+
+    def test_yaml_include_read_as_bytes(self):
+        path = self.sample_path('include', 'get.yaml')
+        content, mime_type = parser._load_local_file(path)
+        self.assertEqual(mime_type, 'application/raml+yaml')
+        self.assertIsInstance(content, bytes)
+
+    @patch('pyraml.parser.MMAP_THRESHOLD', 1)
+    def test_yaml_include_memory_mapped(self):
+        path = self.sample_path('include', 'get.yaml')
+        content, _ = parser._load_local_file(path)
+        self.assertIsInstance(content, mmap.mmap)
+        content.close()
+        mapped = []
+
+        def load_local_file(full_path):
+            content, mime_type = _load_local_file(full_path)
+            if isinstance(content, mmap.mmap):
+                mapped.append(content)
+            return content, mime_type
+
+        _load_local_file = parser._load_local_file
+        with patch('pyraml.parser._load_local_file', load_local_file):
+            data = self.load('include', 'include-action.yaml')
+        self.assertEqual(
+            data.resources['/simple'].methods['get'].description,
+            'get something')
+        # Mappings are closed once included documents are loaded
+        self.assertTrue(mapped)
+        for content in mapped:
+            self.assertRaises(ValueError, content.read, 1)
+
+    def test_memory_mapped_include_over_limits(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with open(os.path.join(tmpdir, 'api.raml'), 'w') as f:
+            f.write('#%RAML 0.8\ntitle: API\nbaseUri: http://localhost\n'
+                    '/a: !include big.yaml\n')
+        with open(os.path.join(tmpdir, 'big.yaml'), 'w') as f:
+            f.write('description: x\n' + '#' * MMAP_THRESHOLD + '\n')
+        mapped = []
+
+        def load_local_file(full_path):
+            content, mime_type = _load_local_file(full_path)
+            mapped.append(content)
+            return content, mime_type
+
+        _load_local_file = parser._load_local_file
+        with patch('pyraml.parser._load_local_file', load_local_file):
+            self.assertRaises(
+                RamlLimitException, parser.load,
+                os.path.join(tmpdir, 'api.raml'),
+                limits=ParseLimits(max_bytes=MMAP_THRESHOLD))
+        self.assertEqual(len(mapped), 1)
+        self.assertIsInstance(mapped[0], mmap.mmap)
+        self.assertRaises(ValueError, mapped[0].read, 1)
+
+    def test_non_ascii_lazy_include(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'title.txt')
+        with open(path, 'wb') as f:
+            f.write(u'caf\xe9'.encode('utf-8'))
+        content, _ = parser._load_local_file(path)
+        self.assertEqual(six.text_type(content), u'caf\xe9')
+        self.assertEqual(str(content),
+                         u'caf\xe9' if six.PY3 else b'caf\xc3\xa9')
+
+    def test_missing_include(self):
+        self.assertRaises(
+            parser.RamlNotFoundException, parser._load_local_file,
+            self.sample_path('include', 'missing.txt'))
+
+
+class YamlLoadingTestCase(SampleParseTestCase):
+    """ Test construction of RAML documents. """
+
+    def test_aliases_shared(self):
+        data = load_yaml('a: &x {b: 1}\nc: *x\n')
+        self.assertIs(data['a'], data['c'])
+
+    def test_include_resolved_once_per_anchor(self):
+        ctx = parser.ParseContext(None, self.sample_path('include'))
+        with patch.object(ctx, '_load_resource',
+                          wraps=ctx._load_resource) as load_resource:
+            data = load_yaml(
+                'a: &x !include get.yaml\nb: *x\n', ctx.load_include)
+        self.assertEqual(load_resource.call_count, 1)
+        self.assertIs(data['a'], data['b'])
+        self.assertEqual(data['a']['description'], 'get something')
+
+    def test_aliased_method_parsed(self):
+        data = parser.parse(
+            '#%RAML 0.8\n'
+            'title: Aliases\n'
+            'baseUri: http://localhost\n'
+            '/a:\n'
+            '    get: &get {description: shared}\n'
+            '/b:\n'
+            '    get?: *get\n', '')
+        self.assertFalse(data.resources['/a'].methods['get'].isOptional)
+        self.assertTrue(data.resources['/b'].methods['get'].isOptional)
+        self.assertEqual(
+            data.resources['/b'].methods['get'].description, 'shared')
+
+
+class NamedSectionsTestCase(SampleParseTestCase):
+    """ Test sequence-of-maps form of traits, resourceTypes and schemas. """
+
+    def parse(self, sections):
+        return parser.parse(
+            '#%RAML 0.8\n'
+            'title: Sections\n'
+            'baseUri: http://localhost\n' + sections, '')
+
+    def test_order_kept(self):
+        names = ['t{0}'.format(i) for i in range(20, 0, -1)]
+        data = self.parse(
+            'traits:\n' +
+            ''.join('  - {0}: {{usage: u}}\n'.format(n) for n in names) +
+            'resourceTypes:\n' +
+            ''.join('  - {0}: {{usage: u}}\n'.format(n) for n in names))
+        self.assertEqual(list(data.traits), names)
+        self.assertEqual(list(data.resourceTypes), names)
+
+    def test_mapping_form(self):
+        data = self.parse('resourceTypes:\n'
+                          '  b: {usage: b}\n'
+                          '  a: {usage: a}\n')
+        self.assertEqual(list(data.resourceTypes), ['b', 'a'])
+
+    def test_duplicated_names(self):
+        self.assertRaisesRegexp(
+            ValueError, 'Property already used: simple', self.parse,
+            'traits:\n'
+            '  - simple: {usage: one}\n'
+            '  - simple: {usage: two}\n')
+        self.assertRaisesRegexp(
+            ValueError, 'Property already used: collection', self.parse,
+            'resourceTypes:\n'
+            '  - collection: {usage: one}\n'
+            '  - collection: {usage: two}\n')
+
+
+class ResourceKeysTestCase(SampleParseTestCase):
+    """ Test classification of keys of resource nodes. """
+
+    def test_methods_and_resources_in_document_order(self):
+        data = parser.parse(
+            '#%RAML 0.8\n'
+            'title: Keys\n'
+            'baseUri: http://localhost\n'
+            '/a:\n'
+            '    post: {description: create}\n'
+            '    /b: {displayName: B}\n'
+            '    description: A\n'
+            '    get?: !!null\n'
+            '    /c: {displayName: C}\n', '')
+        resource = data.resources['/a']
+        self.assertEqual(list(resource.methods), ['post', 'get'])
+        self.assertTrue(resource.methods['get'].isOptional)
+        self.assertEqual(list(resource.resources), ['/b', '/c'])
+        self.assertEqual(resource.description, 'A')
+
+    def test_context_contains(self):
+        ctx = parser.ParseContext({'get': None}, '')
+        self.assertIn('get', ctx)
+        self.assertNotIn('post', ctx)
+        self.assertNotIn('get', parser.ParseContext(None, ''))
+
+
+class DeepSpecTestCase(SampleParseTestCase):
+    """ Test specs nested deeper than the recursion limit. """
+
+    depth = 3000
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def write(self, name, content):
+        with open(os.path.join(self.tmp_dir, name), 'w') as f:
+            f.write(content)
+
+    def test_deep_include_chain(self):
+        self.write('api.raml', '#%RAML 0.8\n'
+                               'title: Deep\n'
+                               'baseUri: http://localhost\n'
+                               'documentation: !include level0.yaml\n')
+        for i in range(self.depth):
+            self.write('level{0}.yaml'.format(i),
+                       '!include level{0}.yaml\n'.format(i + 1))
+        self.write('level{0}.yaml'.format(self.depth),
+                   '- title: Bottom\n  content: !include content.txt\n')
+        self.write('content.txt', 'deep content')
+
+        data = parser.load(os.path.join(self.tmp_dir, 'api.raml'))
+        self.assertEqual(data.documentation[0].content, 'deep content')
+
+    def nested_document(self, depth):
+        """ Single document with resources nested ``depth`` levels deep """
+        lines = ['#%RAML 0.8', 'title: Deep', 'baseUri: http://localhost']
+        for i in range(depth):
+            lines.append('{0}/r{1}:'.format('  ' * i, i))
+        lines.append('{0}displayName: Bottom'.format('  ' * depth))
+        return '\n'.join(lines) + '\n'
+
+    def test_nested_document(self):
+        data = parser.parse(self.nested_document(100), self.tmp_dir)
+        resource = data.resources['/r0']
+        for i in range(1, 100):
+            resource = resource.resources['/r{0}'.format(i)]
+        self.assertEqual(resource.displayName, 'Bottom')
+
+    def test_document_nested_too_deeply(self):
+        # Nesting of a single document is limited by PyYAML recursion
+        self.assertRaises(RamlParseException, parser.parse,
+                          self.nested_document(self.depth), self.tmp_dir)
+
+    def load_deep_resources(self):
+        """ Load spec with resources nested ``depth`` levels deep """
+        self.write('api.raml', '#%RAML 0.8\n'
+                               'title: Deep\n'
+                               'baseUri: http://localhost\n'
+                               '/r0: !include r0.yaml\n')
+        for i in range(self.depth):
+            self.write('r{0}.yaml'.format(i),
+                       'get: {{description: level {0}}}\n'
+                       '/r{1}: !include r{1}.yaml\n'.format(i, i + 1))
+        self.write('r{0}.yaml'.format(self.depth), 'displayName: Bottom\n')
+        return parser.load(os.path.join(self.tmp_dir, 'api.raml'))
+
+    def assertDeepResources(self, data):
+        resource = data.resources['/r0']
+        for i in range(self.depth):
+            self.assertEqual(resource.methods['get'].description,
+                             'level {0}'.format(i))
+            child = resource.resources['/r{0}'.format(i + 1)]
+            self.assertIs(child.parentResource, resource)
+            resource = child
+        self.assertEqual(resource.displayName, 'Bottom')
+
+    def test_deep_resources(self):
+        data = self.load_deep_resources()
+        self.assertDeepResources(data)
+        self.assertEqual(len(data.indexes.resources_by_path), self.depth + 1)
+
+    def test_deep_serialization(self):
+        data = from_data(to_data(self.load_deep_resources()))
+        self.assertDeepResources(data)
+
+    def test_deep_content_hash(self):
+        data = self.load_deep_resources()
+        before = content_hash(data)
+        data.resources['/r0'].resources['/r1'].displayName = 'changed'
+        self.assertNotEqual(content_hash(data), before)
+
+    def test_deep_shared_spec(self):
+        spec = SharedSpec(encode(self.load_deep_resources()))
+        self.addCleanup(spec.close)
+        self.assertDeepResources(spec.root.materialize())
+
+    def test_deep_canonicalize(self):
+        data = self.load_deep_resources()
+        before = content_hash(data)
+        self.assertEqual(content_hash(canonicalize(data)), before)
@@ -0,0 +1,58 @@
+from pyraml import parser
+from pyraml.instrumentation import ParseStats, observe
+from pyraml.options import current_options
+
+from .base import SampleParseTestCase
+
+
+class FieldProjectionTestCase(SampleParseTestCase):
+    """ Test parsing of selected fields only. """
+
+    def test_excluded_fields_not_parsed(self):
+        path = self.sample_path('full-config.yaml')
+        data = parser.load(path, exclude=['description', 'queryParameters'])
+        media = data.resources['/media']
+        self.assertIsNone(media.description)
+        self.assertIsNone(media.methods['get'].description)
+        self.assertIsNone(media.methods['get'].queryParameters)
+        self.assertEqual(media.displayName, 'Media collection')
+        self.assertIsNone(data.securitySchemes['oauth_2_0'].description)
+        self.assertIsNone(current_options())
+
+    def test_excluded_include_not_fetched(self):
+        path = self.sample_path('include-body-example-json.yaml')
+        stats = ParseStats()
+        with observe(stats):
+            data = parser.load(path, exclude=['example'])
+        self.assertEqual(stats.includes, [])
+        body = data.resources['/me'].methods['get'].responses[200].body
+        self.assertIsNone(body['application/json'].example)
+
+    def test_included_fields_only(self):
+        path = self.sample_path('full-config.yaml')
+        data = parser.load(path, include=['title', 'uriParameters'])
+        self.assertEqual(data.title, 'Sample API')
+        self.assertIsNone(data.version)
+        self.assertIsNone(data.traits)
+        self.assertIsNone(data.resourceTypes)
+        resource = data.resources['/media'].resources['/{mediaId}']
+        self.assertIsNone(resource.displayName)
+        self.assertIn('mediaId', resource.uriParameters)
+        # Included fields are parsed whole
+        self.assertEqual(resource.uriParameters['mediaId'].type, 'string')
+        self.assertEqual(resource.uriParameters['mediaId'].maxLength, 10)
+        self.assertIn('get', resource.methods)
+        self.assertIsNone(data.protocols)
+        # ... except excluded fields nested in them
+        data = parser.load(path, include=['uriParameters'],
+                           exclude=['maxLength'])
+        resource = data.resources['/media'].resources['/{mediaId}']
+        self.assertEqual(resource.uriParameters['mediaId'].type, 'string')
+        self.assertIsNone(resource.uriParameters['mediaId'].maxLength)
+
+    def test_excluded_protocols_not_derived(self):
+        raml = "#%RAML 0.8\ntitle: API\nbaseUri: https://localhost\n"
+        self.assertEqual(parser.parse(raml, '.').protocols, ['HTTPS'])
+        data = parser.parse(raml, '.', exclude=['protocols'])
+        self.assertIsNone(data.protocols)
+        self.assertEqual(data.baseUri, 'https://localhost')
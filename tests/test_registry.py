@@ -0,0 +1,218 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from pyraml import parser, RamlException
+from pyraml.instrumentation import ParseStats, observe, current_observer
+from pyraml.registry import SpecRegistry
+
+from .base import SampleParseTestCase
+
+
+class SpecRegistryTestCase(SampleParseTestCase):
+    """ Test registry of parsed specs. """
+
+    def test_cached(self):
+        registry = SpecRegistry()
+        path = self.sample_path('full-config.yaml')
+        root = registry.get(path)
+        self.assertIs(registry.get(path), root)
+        self.assertIn(path, registry)
+        self.assertEqual(registry.stats.misses, 1)
+        self.assertEqual(registry.stats.hits, 1)
+
+    def test_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_load(uri):
+            calls.append(uri)
+            started.set()
+            release.wait(5)
+            return object()
+
+        registry = SpecRegistry(loader=slow_load)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(registry.get('api.raml')))
+            for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while registry.stats.coalesced < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_failed_load_not_cached(self):
+        def failing_load(uri):
+            raise IOError(uri)
+
+        registry = SpecRegistry(loader=failing_load)
+        self.assertRaises(IOError, registry.get, 'api.raml')
+        self.assertRaises(IOError, registry.get, 'api.raml')
+        self.assertEqual(registry.stats.errors, 2)
+        self.assertEqual(len(registry), 0)
+
+    def test_interrupted_load(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def interrupted_load(uri):
+            started.set()
+            release.wait(5)
+            raise KeyboardInterrupt()
+
+        registry = SpecRegistry(loader=interrupted_load)
+        errors = []
+
+        def wait():
+            try:
+                registry.get('api.raml')
+            except RamlException as e:
+                errors.append(e)
+
+        waiter = threading.Thread(target=wait)
+        interrupted = []
+
+        def load():
+            try:
+                registry.get('api.raml')
+            except KeyboardInterrupt:
+                interrupted.append(True)
+
+        owner = threading.Thread(target=load)
+        owner.start()
+        started.wait(5)
+        waiter.start()
+        while registry.stats.coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        owner.join()
+        waiter.join()
+
+        self.assertEqual(interrupted, [True])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(registry.stats.errors, 1)
+        self.assertEqual(len(registry), 0)
+
+    def test_caller_observer_kept(self):
+        registry = SpecRegistry()
+        stats = ParseStats()
+        with observe(stats):
+            registry.get(self.sample_path('root-elements-includes.yaml'))
+            self.assertIs(current_observer(), stats)
+        self.assertTrue(stats.includes)
+        self.assertIn('yaml_load', stats.phases)
+
+    def test_lru_eviction(self):
+        registry = SpecRegistry(max_entries=2, loader=lambda uri: object())
+        registry.get('a.raml')
+        registry.get('b.raml')
+        registry.get('a.raml')
+        registry.get('c.raml')
+        self.assertIn('a.raml', registry)
+        self.assertNotIn('b.raml', registry)
+        self.assertEqual(registry.stats.evictions, 1)
+
+    def test_memory_budget(self):
+        path = self.sample_path('full-config.yaml')
+        registry = SpecRegistry(max_bytes=1)
+        registry.get(path)
+        self.assertGreater(registry.total_size, 1)
+        registry.get(self.sample_path('null-elements.yaml'))
+        self.assertEqual(len(registry), 1)
+        self.assertNotIn(path, registry)
+
+    def test_ttl(self):
+        now = [0.0]
+        registry = SpecRegistry(
+            ttl=10, loader=lambda uri: object(), clock=lambda: now[0])
+        root = registry.get('api.raml')
+        now[0] = 9
+        self.assertIs(registry.get('api.raml'), root)
+        now[0] = 10
+        self.assertIsNot(registry.get('api.raml'), root)
+        self.assertEqual(registry.stats.expirations, 1)
+
+    def test_mtime_revalidation(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        for name in ('root-elements-includes.yaml', 'include'):
+            source = self.sample_path(name)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(tmp_dir, name))
+            else:
+                shutil.copy(source, tmp_dir)
+        path = os.path.join(tmp_dir, 'root-elements-includes.yaml')
+
+        registry = SpecRegistry(check_mtime=True)
+        root = registry.get(path)
+        self.assertIs(registry.get(path), root)
+
+        included = os.path.join(
+            tmp_dir, 'include', 'include-non-yaml-single-line.txt')
+        stat = os.stat(included)
+        os.utime(included, (stat.st_atime, stat.st_mtime + 10))
+        self.assertIsNot(registry.get(path), root)
+
+    def test_source_changed_during_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        shutil.copytree(self.sample_path('include'),
+                        os.path.join(tmp_dir, 'include'))
+        path = os.path.join(tmp_dir, 'include', 'include-action.yaml')
+        included = os.path.join(tmp_dir, 'include', 'get.yaml')
+
+        def load_and_edit(uri):
+            root = parser.load(uri)
+            # Edited after it was read
+            stat = os.stat(included)
+            os.utime(included, (stat.st_atime, stat.st_mtime + 10))
+            return root
+
+        registry = SpecRegistry(check_mtime=True, loader=load_and_edit)
+        root = registry.get(path)
+        self.assertIsNot(registry.get(path), root)
+
+    def test_custom_loader_uri(self):
+        calls = []
+
+        def load_memory(uri):
+            calls.append(uri)
+            return object()
+
+        registry = SpecRegistry(loader=load_memory)
+        root = registry.get('mem://api.raml')
+        self.assertEqual(calls, ['mem://api.raml'])
+        self.assertIn('mem://api.raml', registry)
+        self.assertIs(registry.get('mem://api.raml'), root)
+
+    def test_invalidated_during_load(self):
+        calls = []
+
+        def invalidating_load(uri):
+            calls.append(uri)
+            if len(calls) == 1:
+                registry.invalidate('api.raml')
+            elif len(calls) == 2:
+                registry.invalidate()
+            return object()
+
+        registry = SpecRegistry(loader=invalidating_load)
+        first = registry.get('api.raml')
+        self.assertNotIn('api.raml', registry)
+        self.assertIsNot(registry.get('api.raml'), first)
+        self.assertNotIn('api.raml', registry)
+        registry.get('api.raml')
+        self.assertIn('api.raml', registry)
+        self.assertEqual(len(calls), 3)
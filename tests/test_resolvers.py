@@ -0,0 +1,118 @@
+import mock
+
+from pyraml import parser, RamlException, RamlNotFoundException
+from pyraml.provenance import include_source
+from pyraml.raml_elements import ParserRamlInclude
+from pyraml.resolvers import IncludeResolver, MemoryResolver, ResolverRegistry
+
+from .base import SampleParseTestCase
+
+
+API = """#%RAML 0.8
+title: !include title.txt
+baseUri: http://localhost
+traits:
+  - !include traits/paged.yaml
+/users: !include resources/users.yaml
+"""
+
+USERS = """displayName: Users
+get:
+  description: !include ../descriptions/list-users.txt
+"""
+
+
+class UpperCaseResolver(IncludeResolver):
+    """ Serves ``upper://<text>`` as ``<TEXT>`` """
+
+    def fetch(self, location):
+        return location[len('upper://'):].upper(), 'text/plain'
+
+
+class MemoryResolverTestCase(SampleParseTestCase):
+    """ Test loading of documents held in memory. """
+
+    def setUp(self):
+        self.paged = {'paged': {'queryParameters': {'page': {
+            'type': 'integer'}}}}
+        self.resolver = MemoryResolver({
+            'mem://api/api.raml': API,
+            'mem://api/title.txt': b'In-memory API',
+            'mem://api/traits/paged.yaml': self.paged,
+            'mem://api/resources/users.yaml': USERS,
+            'mem://api/descriptions/list-users.txt': 'List users',
+        })
+
+    def test_load_from_memory(self):
+        data = parser.load('mem://api/api.raml',
+                           resolvers={'mem://': self.resolver})
+        self.assertEqual(data.title, 'In-memory API')
+        self.assertEqual(include_source(data.title), 'mem://api/title.txt')
+        users = data.resources['/users']
+        self.assertEqual(users.displayName, 'Users')
+        self.assertEqual(users.methods['get'].description, 'List users')
+        self.assertEqual(
+            include_source(users.methods['get'].description),
+            'mem://api/descriptions/list-users.txt')
+        self.assertEqual(
+            data.traits['paged'].queryParameters['page'].type, 'integer')
+
+    def test_loaded_data_used_as_is(self):
+        with mock.patch('pyraml.parser.load_yaml_shallow',
+                        wraps=parser.load_yaml_shallow) as load_yaml_shallow:
+            data = parser.load('mem://api/api.raml',
+                               resolvers={'mem://': self.resolver})
+        loaded = [call[0][0] for call in load_yaml_shallow.call_args_list]
+        self.assertEqual(loaded, [USERS])
+        self.assertIn('paged', data.traits)
+        # Documents of the resolver are never changed
+        self.assertEqual(self.paged, {'paged': {'queryParameters': {
+            'page': {'type': 'integer'}}}})
+
+    def test_includes_in_loaded_data(self):
+        self.resolver.add('mem://api/traits/paged.yaml', {
+            'paged': {'description': ParserRamlInclude('paged.txt')}})
+        self.resolver.add('mem://api/traits/paged.txt', 'Paged')
+        data = parser.load('mem://api/api.raml',
+                           resolvers={'mem://': self.resolver})
+        self.assertEqual(data.traits['paged'].description, 'Paged')
+
+    def test_parse_with_resolvers(self):
+        raml = "#%RAML 0.8\ntitle: !include upper://api\n" \
+               "baseUri: http://localhost\n" \
+               "documentation: !include include/include-documentation.yaml\n"
+        data = parser.parse(raml, self.sample_path(),
+                            resolvers={'upper://': UpperCaseResolver()})
+        self.assertEqual(data.title, 'API')
+        # Other includes are still loaded from local files
+        self.assertTrue(data.documentation)
+
+    def test_missing_document(self):
+        self.assertRaises(
+            RamlNotFoundException, parser.load, 'mem://api/none.raml',
+            resolvers={'mem://': self.resolver})
+
+
+class ResolverRegistryTestCase(SampleParseTestCase):
+    """ Test selection of resolvers. """
+
+    def test_longest_prefix_wins(self):
+        short, long_ = MemoryResolver(), MemoryResolver()
+        registry = ResolverRegistry({'mem://': short})
+        registry.register('mem://api/', long_)
+        self.assertIs(registry.find('mem://api/x.raml'), long_)
+        self.assertIs(registry.find('mem://other.raml'), short)
+        self.assertIsNone(registry.find('http://example.com/api.raml'))
+        self.assertEqual(len(ResolverRegistry(registry)), 2)
+
+    def test_empty_prefix(self):
+        self.assertRaises(RamlException, ResolverRegistry,
+                          {'': MemoryResolver()})
+
+    def test_relative_locations(self):
+        resolver = MemoryResolver()
+        self.assertEqual(resolver.dirname('mem://api.raml'), 'mem://')
+        self.assertEqual(resolver.join('mem://', 'a/../b.yaml'),
+                         'mem://b.yaml')
+        self.assertEqual(resolver.join('mem://api/v1', '../c.txt'),
+                         'mem://api/c.txt')
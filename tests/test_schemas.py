@@ -0,0 +1,215 @@
+import io
+import tempfile
+import unittest
+
+import mock
+
+from pyraml import parser
+from pyraml.fields import JSONData, SchemaData, parse_xml_string
+from pyraml.schemas import (
+    RamlSchemaException, XMLSchemaCache, XMLSchemaValidator, xsd_supported)
+from pyraml.validation import ValidationPlans
+
+from .base import SampleParseTestCase
+
+
+RAML = """#%RAML 0.8
+title: Schemas
+baseUri: http://localhost
+schemas:
+  - user: '{"type": "object", "title": "user"}'
+/users:
+  post:
+    body:
+      application/json:
+        schema: user
+    responses:
+      201:
+        body:
+          application/json:
+            schema: '{"type": "object", "title": "user"}'
+  put:
+    body:
+      application/json:
+        schema: '{"type": "array"}'
+  patch:
+    body:
+      application/json:
+        schema: '{"type": "array"}'
+      text/plain:
+        schema: unknown
+"""
+
+
+class SchemaRegistryTestCase(SampleParseTestCase):
+    """ Test sharing of schemas of bodies. """
+
+    def test_named_schemas_shared(self):
+        data = parser.parse(RAML, '.')
+        user = data.schemas['user']
+        methods = data.resources['/users'].methods
+        self.assertIs(methods['post'].body['application/json'].schema, user)
+        # Inline copy of a declared schema is the declared instance too
+        self.assertIs(
+            methods['post'].responses[201].body['application/json'].schema,
+            user)
+
+    def test_equal_inline_schemas_decoded_once(self):
+        with mock.patch.object(JSONData, 'load_data',
+                               wraps=JSONData().load_data) as load_data:
+            data = parser.parse(RAML, '.')
+        decoded = [call[0][0] for call in load_data.call_args_list]
+        self.assertEqual(decoded.count('{"type": "array"}'), 1)
+        methods = data.resources['/users'].methods
+        self.assertIs(methods['put'].body['application/json'].schema,
+                      methods['patch'].body['application/json'].schema)
+
+    def test_trusted_parse_shares_schemas(self):
+        data = parser.parse(RAML, '.', trusted=True)
+        body = data.resources['/users'].methods['post'].body
+        self.assertIs(body['application/json'].schema, data.schemas['user'])
+
+    def test_unknown_name_kept(self):
+        data = parser.parse(RAML, '.')
+        body = data.resources['/users'].methods['patch'].body['text/plain']
+        self.assertEqual(body.schema, 'unknown')
+        self.assertEqual(data.indexes.bodies_by_schema['unknown'], [body])
+        self.assertEqual(len(data.indexes.bodies_by_schema['user']), 1)
+
+    def test_decoded_without_parse(self):
+        schema = SchemaData().to_python('{"type": "object"}')
+        self.assertEqual(schema, {'type': 'object'})
+        self.assertIsNot(SchemaData().to_python('{"type": "object"}'), schema)
+
+
+XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="user">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="name" type="xs:string" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>"""
+
+XSD_RAML = """#%RAML 0.8
+title: XML
+baseUri: http://localhost
+schemas:
+  - user: |
+""" + "".join("      " + line + "\n" for line in XSD.splitlines()) + """
+/users:
+  post:
+    body:
+      text/xml:
+        schema: user
+"""
+
+
+class XMLSchemaCacheTestCase(unittest.TestCase):
+    """ Test cache of compiled XML schemas. """
+
+    def setUp(self):
+        self.schemas = [parse_xml_string(XSD) for _ in range(3)]
+
+    def test_compiled_lazily(self):
+        cache = XMLSchemaCache()
+        validator = cache.validator(self.schemas[0])
+        self.assertFalse(validator.compiled)
+        self.assertIs(cache.validator(self.schemas[0]), validator)
+
+    def test_bounded(self):
+        cache = XMLSchemaCache(max_entries=2)
+        first = cache.validator(self.schemas[0])
+        second = cache.validator(self.schemas[1])
+        # Recently used validators are kept
+        self.assertIs(cache.validator(self.schemas[0]), first)
+        cache.validator(self.schemas[2])
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.validator(self.schemas[0]), first)
+        # Dropped validator is created again
+        self.assertIsNot(cache.validator(self.schemas[1]), second)
+        self.assertEqual(len(cache), 2)
+
+    @unittest.skipIf(xsd_supported(), "lxml is installed")
+    def test_lxml_required(self):
+        validator = XMLSchemaValidator(self.schemas[0])
+        self.assertRaises(RamlSchemaException, validator.validate, b'<user/>')
+        self.assertFalse(validator.compiled)
+
+    @unittest.skipUnless(xsd_supported(), "lxml is not installed")
+    def test_validate_payloads(self):
+        cache = XMLSchemaCache()
+        schema = self.schemas[0]
+        valid = b'<user><name>a</name><name>b</name></user>'
+        self.assertEqual(cache.validate(schema, valid), [])
+        self.assertEqual(cache.validate(schema, valid.decode('utf-8')), [])
+        self.assertEqual(cache.validate(schema, io.BytesIO(valid)), [])
+        self.assertEqual(len(cache.validate(schema, b'<user/>')), 1)
+        self.assertEqual(
+            len(cache.validate(schema, io.BytesIO(b'<user><x/></user>'))), 1)
+        self.assertTrue(cache.validator(schema).compiled)
+
+    @unittest.skipUnless(xsd_supported(), "lxml is not installed")
+    def test_top_level_nodes_before_root(self):
+        cache = XMLSchemaCache()
+        payload = (b'<?xml version="1.0"?>\n<!-- c --><?pi x?>'
+                   b'<user><name>a</name><name>b</name></user>')
+        self.assertEqual(cache.validate(self.schemas[0], payload), [])
+        self.assertEqual(
+            cache.validate(self.schemas[0], io.BytesIO(payload)), [])
+        self.assertEqual(len(cache.validate(
+            self.schemas[0], io.BytesIO(b'<!-- c --><user/>'))), 1)
+
+    @unittest.skipUnless(xsd_supported(), "lxml is not installed")
+    def test_compiled_once(self):
+        from lxml import etree
+        cache = XMLSchemaCache()
+        with mock.patch.object(etree, 'XMLSchema',
+                               wraps=etree.XMLSchema) as xml_schema:
+            for _ in range(3):
+                cache.validate(self.schemas[0], b'<user><name/></user>')
+        self.assertEqual(xml_schema.call_count, 1)
+
+    @unittest.skipUnless(xsd_supported(), "lxml is not installed")
+    def test_request_bodies_validated(self):
+        plans = ValidationPlans(parser.parse(XSD_RAML, '.'), prefix='')
+        plan, uri_values = plans.match('POST', '/users')
+        self.assertEqual(plan.validate_request(
+            uri_values, '', lambda name: None,
+            b'<user><name>a</name></user>', 'text/xml'), [])
+        errors = plan.validate_request(
+            uri_values, '', lambda name: None, b'<user/>', 'text/xml')
+        self.assertEqual(len(errors), 1)
+
+    @unittest.skipUnless(xsd_supported(), "lxml is not installed")
+    def test_external_entities_not_resolved(self):
+        # lxml < 5 resolves external entities by default
+        from lxml import etree
+        with mock.patch.object(etree, 'XMLParser',
+                               wraps=etree.XMLParser) as xml_parser:
+            with mock.patch.object(etree, 'iterparse',
+                                   wraps=etree.iterparse) as iterparse:
+                XMLSchemaCache().validate(self.schemas[0], b'<user/>')
+                XMLSchemaCache().validate(
+                    self.schemas[0], io.BytesIO(b'<user/>'))
+                parse_xml_string(b'<user/>', untrusted=True)
+        for call in xml_parser.call_args_list + iterparse.call_args_list:
+            self.assertFalse(call[1]['resolve_entities'])
+            self.assertTrue(call[1]['no_network'])
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as f:
+            f.write('secret-content')
+            f.flush()
+            payload = (
+                '<?xml version="1.0"?>\n'
+                '<!DOCTYPE user [<!ENTITY xxe SYSTEM "file://{0}">]>\n'
+                '<user><x>&xxe;</x></user>'.format(f.name)).encode('utf-8')
+            cache = XMLSchemaCache()
+            errors = cache.validate(self.schemas[0], payload) + \
+                cache.validate(self.schemas[0], io.BytesIO(payload))
+            self.assertEqual(len(errors), 2)
+            self.assertNotIn('secret-content', ' '.join(errors))
+            document = parse_xml_string(payload, untrusted=True)
+            self.assertNotIn('secret-content',
+                             ''.join(document.itertext()))
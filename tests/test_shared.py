@@ -0,0 +1,102 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from pyraml.shared import (
+    RamlSharedSpecException, SharedSpec, encode, write_shared_file,
+    open_shared_file, create_shared_memory, attach_shared_memory)
+from pyraml.serialization import to_data
+
+from .base import SampleParseTestCase
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+class SharedSpecTestCase(SampleParseTestCase):
+    """ Test views over encoded RAML trees. """
+
+    def setUp(self):
+        self.data = self.load('full-config.yaml')
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'api.shared')
+        write_shared_file(self.data, path)
+        self.spec = open_shared_file(path)
+        self.addCleanup(self.spec.close)
+
+    def test_root_fields(self):
+        root = self.spec.root
+        self.assertEqual(root.title, self.data.title)
+        self.assertEqual(list(root.protocols), self.data.protocols)
+        self.assertEqual(root.mediaType, self.data.mediaType)
+        self.assertIs(root.model_class, self.data.__class__)
+        self.assertRaises(AttributeError, getattr, root, 'missing')
+
+    def test_resources(self):
+        resources = self.spec.root.resources
+        self.assertEqual(list(resources), list(self.data.resources))
+        media = resources['/media']
+        self.assertEqual(media.displayName, 'Media collection')
+        self.assertIsNone(media.parentResource)
+        item = media.resources['/{mediaId}']
+        self.assertEqual(item.parentResource.displayName, 'Media collection')
+        self.assertRaises(KeyError, resources.__getitem__, '/missing')
+
+    def test_map_keys_decoded_once(self):
+        self.assertEqual(self.spec.root.resources['/media'].displayName,
+                         'Media collection')
+        with mock.patch.object(self.spec, '_value',
+                               wraps=self.spec._value) as value:
+            resources = self.spec.root.resources
+            self.assertIn('/tags', resources)
+            self.assertNotIn('/missing', resources)
+            self.assertNotIn([], resources)
+        # root, resources and the value of '/tags'
+        self.assertEqual(value.call_count, 3)
+
+    def test_methods_and_parameters(self):
+        expected = self.data.resources['/media'].methods['get']
+        method = self.spec.root.resources['/media'].methods['get']
+        self.assertEqual(set(method.queryParameters),
+                         set(expected.queryParameters))
+        for name, parameter in expected.queryParameters.items():
+            self.assertEqual(method.queryParameters[name].type, parameter.type)
+        self.assertEqual(list(method.responses), list(expected.responses))
+        head = self.spec.root.resources['/'].methods['head']
+        self.assertIn('knotty', head.is_[-1])
+
+    def test_materialize(self):
+        self.assertEqual(to_data(self.spec.root.materialize()),
+                         to_data(self.data))
+
+    def test_strings_stored_once(self):
+        encoded = encode(self.data)
+        self.assertEqual(encoded.count(b'Media collection'), 1)
+
+    def test_invalid_buffer(self):
+        self.assertRaises(RamlSharedSpecException, SharedSpec, b'\0' * 32)
+
+    @unittest.skipIf(shared_memory is None, 'shared_memory is not available')
+    def test_shared_memory(self):
+        block = create_shared_memory(self.data)
+        try:
+            # Not unregistered for real: the block is attached by the
+            # process which created it
+            with mock.patch('multiprocessing.resource_tracker.'
+                            'unregister') as unregister:
+                with attach_shared_memory(block.name) as spec:
+                    self.assertEqual(spec.root.title, self.data.title)
+            if sys.version_info < (3, 13) and os.name != 'nt':
+                # Attaching process must not unlink the block at exit
+                unregister.assert_called_once_with(
+                    block._name, 'shared_memory')
+        finally:
+            block.close()
+            block.unlink()
@@ -0,0 +1,100 @@
+import glob
+import threading
+import unittest
+
+import yaml
+
+from pyraml import parser
+from pyraml.entities import RamlBody
+from pyraml.fields import Reference
+from pyraml.serialization import to_data
+
+from .base import SampleParseTestCase
+
+
+THREADS = 8
+ROUNDS = 2
+
+
+def _run_threads(target, count=THREADS):
+    """ Run ``target(index)`` in ``count`` threads started at once, return
+    exceptions raised by them
+    """
+    errors = []
+    barrier = threading.Barrier(count) if hasattr(threading, 'Barrier') \
+        else None
+
+    def run(index):
+        try:
+            if barrier is not None:
+                barrier.wait()
+            target(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class ConcurrentParseTestCase(SampleParseTestCase):
+    """ Test parsing from many threads at once. """
+
+    def test_parallel_loads_give_same_trees(self):
+        paths = sorted(glob.glob(self.sample_path('*.yaml')))
+        # Every thread mixes plain, projected and trusted loads, so
+        # options of concurrent parses are different
+        variants = [{}, {'exclude': ['description']}, {'trusted': True}]
+        expected = dict(
+            ((path, i), to_data(parser.load(path, **kwargs)))
+            for path in paths for i, kwargs in enumerate(variants))
+        mismatches = []
+
+        def load_all(index):
+            for _ in range(ROUNDS):
+                for path in paths:
+                    i = (index + len(path)) % len(variants)
+                    data = to_data(parser.load(path, **variants[i]))
+                    if data != expected[path, i]:
+                        mismatches.append((path, variants[i]))
+
+        self.assertEqual(_run_threads(load_all), [])
+        self.assertEqual(mismatches, [])
+
+    def test_parallel_lazy_references(self):
+        field = Reference('pyraml.entities.RamlBody')
+
+        def convert(index):
+            for _ in range(100):
+                self.assertIsInstance(
+                    field.to_python({'schema': 'x'}), RamlBody)
+
+        self.assertEqual(_run_threads(convert), [])
+        self.assertIs(field.ref_class, RamlBody)
+
+    def test_parallel_unknown_file_types(self):
+        types = []
+
+        def guess(index):
+            types.append(parser._guess_mime_type('api.txt'))
+
+        self.assertEqual(_run_threads(guess), [])
+        self.assertEqual(set(types), set(['text/plain']))
+
+
+class GlobalStateTestCase(unittest.TestCase):
+    """ Test pyraml leaves process-wide PyYAML loaders alone. """
+
+    def test_safe_loader_untouched(self):
+        self.assertNotIn('!include', yaml.SafeLoader.yaml_constructors)
+        data = yaml.safe_load('b: 1\na: 2\na: 3\n')
+        self.assertIs(type(data), dict)
+        self.assertEqual(data, {'a': 3, 'b': 1})
+
+    def test_raml_loader_knows_include(self):
+        self.assertIsInstance(
+            parser.load_yaml('a: !include b.yaml').get('a'),
+            parser.ParserRamlInclude)
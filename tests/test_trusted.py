@@ -0,0 +1,116 @@
+import glob
+
+from pyraml import parser
+from pyraml.entities import RamlNamedParameters
+from pyraml.fields import Or, Reference, List, String, Int, Float, JSONData
+from pyraml.model import Model
+from pyraml.serialization import to_data
+
+from .base import SampleParseTestCase
+
+
+def _types(value):
+    """ Types of all nodes of a parsed tree, in traversal order """
+    rv = [type(value).__name__]
+    if isinstance(value, Model):
+        for field_name in value.__class__._structure:
+            if field_name != 'parentResource':
+                rv.extend(_types(getattr(value, field_name, None)))
+    elif isinstance(value, dict):
+        for key, val in value.items():
+            rv.extend(_types(key))
+            rv.extend(_types(val))
+    elif isinstance(value, list):
+        for item in value:
+            rv.extend(_types(item))
+    return rv
+
+
+class TrustedParseTestCase(SampleParseTestCase):
+    """ Test parsing of trusted documents without validation. """
+
+    def assertSameTree(self, validated, trusted):
+        self.assertEqual(to_data(validated), to_data(trusted))
+        self.assertEqual(_types(validated), _types(trusted))
+
+    def test_samples_parsed_same_as_validated(self):
+        paths = glob.glob(self.sample_path('*.yaml'))
+        self.assertTrue(paths)
+        for path in paths:
+            validated = parser.load(path)
+            trusted = parser.load(path, trusted=True)
+            self.assertSameTree(validated, trusted)
+
+    def test_inline_document_parsed_same_as_validated(self):
+        raml = """#%RAML 0.8
+title: Trusted
+baseUri: http://example.com/{version}
+version: 1
+securedBy: [null, oauth_2_0: {scopes: [read]}]
+schemas:
+  - user: '{"type": "object"}'
+  - note: <note/>
+resourceTypes:
+  - collection:
+      get:
+        description: list <<resourcePathName>>
+traits:
+  - paged:
+      queryParameters:
+        page: {type: integer, minimum: 1}
+/users:
+  type: collection
+  is: [paged]
+  /{userId}:
+    uriParameters:
+      userId:
+        - type: integer
+        - type: string
+          enum: [me]
+    put:
+      body:
+        application/json:
+          schema: user
+          example: '{"name": "x", "age": 3}'
+    delete:
+"""
+        self.assertSameTree(parser.parse(raml, '.'),
+                            parser.parse(raml, '.', trusted=True))
+
+    def test_projection_combined(self):
+        path = self.sample_path('full-config.yaml')
+        self.assertSameTree(
+            parser.load(path, exclude=['description']),
+            parser.load(path, exclude=['description'], trusted=True))
+
+    def test_invalid_values_not_checked(self):
+        path = self.sample_path('invalid', 'invalid-protocol.yaml')
+        self.assertRaises(ValueError, parser.load, path)
+        data = parser.load(path, trusted=True)
+        self.assertEqual(data.protocols, ['IAMINVALIDPROTOCOL'])
+
+
+class TrustedConversionTestCase(SampleParseTestCase):
+    """ Test conversion of single values without validation. """
+
+    def test_or_picks_variant_by_type(self):
+        field = Or(String(), Int(), Float())
+        for value in ['a', 1, 1.5, None]:
+            self.assertEqual(field.trusted_to_python(value),
+                             field.to_python(value))
+        self.assertRaises(ValueError, field.trusted_to_python, [])
+
+    def test_or_tries_decoding_variants(self):
+        field = Or(JSONData(), String())
+        self.assertEqual(field.trusted_to_python('{"a": 1}'), {'a': 1})
+        self.assertEqual(field.trusted_to_python('not json'), 'not json')
+
+    def test_reference_or_list(self):
+        field = Or(Reference(RamlNamedParameters),
+                   List(Reference(RamlNamedParameters)))
+        single = field.trusted_to_python({'type': 'integer'})
+        self.assertIsInstance(single, RamlNamedParameters)
+        self.assertEqual(single.type, 'integer')
+        alternatives = field.trusted_to_python([{'type': 'integer'}, {}])
+        self.assertEqual(len(alternatives), 2)
+        self.assertIsInstance(alternatives[1], RamlNamedParameters)
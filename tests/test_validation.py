@@ -0,0 +1,188 @@
+import json
+import unittest
+
+from pyraml import parser
+from pyraml.validation import ValidationPlans, _jsonschema
+
+from .base import SampleParseTestCase, ASGI
+
+if ASGI:
+    from .asgi_client import call_asgi, recording_app
+
+
+class ValidationPlansTestCase(SampleParseTestCase):
+    """ Test validation plans of RAML methods. """
+
+    def setUp(self):
+        self.plans = ValidationPlans(
+            self.load('full-config.yaml'), prefix='')
+
+    def validate(self, method, path, query='', headers=None, body=None,
+                 content_type=None):
+        headers = headers or {}
+        plan, uri_values = self.plans.match(method, path)
+        return plan.validate_request(
+            uri_values, query, lambda name: headers.get(name), body,
+            content_type)
+
+    def test_valid_request(self):
+        errors = self.validate(
+            'GET', '/media', 'page=2&offset=0',
+            {'zencoder-api-key': ['0123456789']},
+            b'{"input": "hola"}', 'application/json')
+        self.assertEqual(errors, [])
+
+    def test_parameters(self):
+        errors = self.validate('GET', '/media', 'page=0&offset=x&offset=1')
+        self.assertEqual(sorted(errors), [
+            "offset: can't be repeated",
+            "page: '0' is less than 1",
+            "zencoder-api-key: required",
+        ])
+
+    def test_uri_parameters(self):
+        self.assertEqual(self.validate('GET', '/media/0123456789'), [])
+        self.assertEqual(
+            self.validate('GET', '/media/0123456789x'),
+            ["mediaId: '0123456789x' is longer than 10"])
+
+    def test_body(self):
+        headers = {'zencoder-api-key': ['0123456789']}
+        errors = self.validate('GET', '/media', '', headers, b'{',
+                               'application/json')
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('body: invalid JSON'))
+        self.assertEqual(
+            self.validate('GET', '/media', '', headers, b'x', 'text/csv'),
+            ['body: unexpected media type text/csv'])
+
+    def test_body_without_media_type(self):
+        headers = {'zencoder-api-key': ['0123456789']}
+        self.assertEqual(
+            self.validate('GET', '/media', '', headers, b'{"input": 1}'),
+            ['body: missing media type'])
+        self.assertEqual(self.validate('GET', '/media', '', headers, b''), [])
+        errors = self.validate('GET', '/media', '', headers, b'',
+                               'application/json')
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('body: invalid JSON'))
+
+    @unittest.skipIf(_jsonschema() is None, 'jsonschema is not installed')
+    def test_invalid_json_schema(self):
+        plans = ValidationPlans(parser.parse(
+            '#%RAML 0.8\n'
+            'title: Sample API\n'
+            'baseUri: https://example.com\n'
+            '/items:\n'
+            '  post:\n'
+            '    body:\n'
+            '      application/json:\n'
+            '        schema: \'{"type": 1}\'\n'
+            '  put:\n'
+            '    body:\n'
+            '      application/json:\n'
+            '        schema: \'{"type": "object"}\'\n', '.'))
+        plan, uri_values = plans.match('POST', '/items')
+        # Documents are checked to be well-formed only
+        self.assertEqual(plan.validate_request(
+            uri_values, '', lambda name: None, b'[1]', 'application/json'),
+            [])
+        self.assertEqual(len(plan.validate_request(
+            uri_values, '', lambda name: None, b'[', 'application/json')), 1)
+        plan, uri_values = plans.match('PUT', '/items')
+        self.assertEqual(len(plan.validate_request(
+            uri_values, '', lambda name: None, b'[1]', 'application/json')), 1)
+
+    def test_statuses(self):
+        plan, _ = self.plans.match('GET', '/media')
+        self.assertIsNone(plan.validate_status(400))
+        self.assertEqual(plan.validate_status(500),
+                         'response: undeclared status 500')
+
+    def test_non_integer_statuses_skipped(self):
+        plans = ValidationPlans(parser.parse(
+            '#%RAML 0.8\n'
+            'title: Sample API\n'
+            'baseUri: https://example.com\n'
+            '/items:\n'
+            '  get:\n'
+            '    responses:\n'
+            '      200:\n'
+            '      default:\n'
+            '  post:\n'
+            '    responses:\n'
+            '      2XX:\n', '.'))
+        plan, _ = plans.match('GET', '/items')
+        self.assertIsNone(plan.validate_status(200))
+        self.assertEqual(plan.validate_status(500),
+                         'response: undeclared status 500')
+        plan, _ = plans.match('POST', '/items')
+        self.assertIsNone(plan.validate_status(500))
+
+    def test_undescribed_request(self):
+        self.assertEqual(self.plans.match('DELETE', '/media'), (None, None))
+
+
+@unittest.skipUnless(ASGI, 'ASGI requires Python 3.5+')
+class ValidationMiddlewareTestCase(SampleParseTestCase):
+    """ Test ASGI validation middleware. """
+
+    def setUp(self):
+        from pyraml.asgi import ValidationMiddleware
+
+        self.app_calls = []
+        self.response_errors = []
+        self.middleware = ValidationMiddleware(
+            recording_app(self.app_calls, 500),
+            self.load('full-config.yaml'), prefix='',
+            response_sample_rate=1.0,
+            on_response_error=lambda scope, e: self.response_errors.append(e))
+
+    def request(self, path, query=b'', headers=(), body=b'', raw_path=None):
+        scope = {'type': 'http', 'method': 'GET', 'path': path,
+                 'query_string': query, 'headers': list(headers)}
+        if raw_path is not None:
+            scope['raw_path'] = raw_path
+        return call_asgi(self.middleware, scope, body)
+
+    def uri_errors(self, path, raw_path=None):
+        sent = self.request(path, raw_path=raw_path)
+        if sent[0]['status'] != 400:
+            return []
+        errors = json.loads(sent[1]['body'].decode('utf-8'))['errors']
+        return [e for e in errors if e.startswith('mediaId')]
+
+    def test_uri_parameters_decoded_once(self):
+        # Encoded slash is a part of the segment
+        self.assertEqual(
+            self.uri_errors('/media/a/0123456789', b'/media/a%2F0123456789'),
+            ["mediaId: 'a/0123456789' is longer than 10"])
+        self.assertEqual(
+            self.uri_errors('/media/a%2F0123456789',
+                            b'/media/a%252F0123456789'),
+            ["mediaId: 'a%2F0123456789' is longer than 10"])
+        # Servers without raw_path
+        self.assertEqual(
+            self.uri_errors('/media/a%2F0123456789'),
+            ["mediaId: 'a%2F0123456789' is longer than 10"])
+
+    def test_invalid_request_rejected(self):
+        sent = self.request('/media', b'page=0')
+        self.assertEqual(sent[0]['status'], 400)
+        errors = json.loads(sent[1]['body'].decode('utf-8'))['errors']
+        self.assertIn("page: '0' is less than 1", errors)
+        self.assertEqual(self.app_calls, [])
+        self.assertEqual(
+            self.middleware.request_latency['GET /media'].count, 1)
+
+    def test_valid_request_passed(self):
+        sent = self.request(
+            '/media', headers=[(b'Zencoder-Api-Key', b'0123456789'),
+                               (b'Content-Type', b'application/json')],
+            body=b'{"input": "hola"}')
+        self.assertEqual(sent[0]['status'], 500)
+        self.assertEqual(self.app_calls, [b'{"input": "hola"}'])
+        self.assertEqual(self.response_errors,
+                         ['response: undeclared status 500'])
+        self.assertEqual(
+            self.middleware.response_latency['GET /media'].count, 1)